@@ -0,0 +1,211 @@
+# Memory leaderboard by Hanisha Kovvuru
+# Keeps the result of every finished game of Memory in an SQLite file, so players can compare
+# their times across games. Rows are only ever added. Two indexes keep the lookups fast however
+# many games are stored: one orders the games of each board size by time and moves (the top of
+# the leaderboard), the other does the same per player (personal bests).
+#
+# Finished games are handed to a writer thread through a queue, so a game that ends never waits
+# for the disk; the thread opens the file and writes whatever has queued up in one transaction.
+#
+# Example: python leaderboard.py --rows 4 --top 10
+#          python leaderboard.py --player Hanisha
+
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.memory_leaderboard.sqlite')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    columns INTEGER NOT NULL,
+    elapsed_ms INTEGER NOT NULL,
+    moves INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_board ON games (rows, columns, elapsed_ms, moves);
+CREATE INDEX IF NOT EXISTS games_by_player ON games (player, rows, columns, elapsed_ms, moves);
+'''
+
+COLUMNS = 'player, rows, columns, elapsed_ms, moves, played_at'
+
+
+# User-defined functions
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the Memory leaderboard')
+    parser.add_argument('--file', default=DEFAULT_PATH, help='leaderboard file (default: %(default)s)')
+    parser.add_argument('--rows', type=int, default=4, help='number of tile rows of the board')
+    parser.add_argument('--columns', type=int, default=None, help='number of tile columns (default: same as rows)')
+    parser.add_argument('--top', type=int, default=10, help='number of games to show')
+    parser.add_argument('--player', help='also show the best game of this player')
+    args = parser.parse_args()
+
+    columns = args.columns if args.columns is not None else args.rows
+    leaderboard = Leaderboard(args.file)
+    print_leaderboard(leaderboard, args.rows, columns, args.top, args.player)
+    leaderboard.close()
+
+
+def print_leaderboard(leaderboard, rows, columns, count=10, player=None):
+    # Print the best games of a board size and, if a player is given, that player's best game
+    # - leaderboard is the Leaderboard to read
+    # - rows and columns are the int size of the board
+    # - count is the int number of games to show
+    # - player is the string name of a player, or None
+
+    print('Best games on a %d x %d board' % (rows, columns))
+    for rank, entry in enumerate(leaderboard.top(rows, columns, count), 1):
+        print('%4d. %-20s %8.1f s %5d moves' % (rank, entry['player'], entry['elapsed_ms'] / 1000, entry['moves']))
+    if player is not None:
+        best = leaderboard.personal_best(player, rows, columns)
+        if best is None:
+            print('%s has not finished a %d x %d board yet' % (player, rows, columns))
+        else:
+            print('Best of %s: %.1f s in %d moves, rank %d' % (player, best['elapsed_ms'] / 1000, best['moves'],
+                                                              leaderboard.rank(rows, columns, best['elapsed_ms'],
+                                                                               best['moves'])))
+
+
+def to_entry(row):
+    # Return the dictionary for a row read from the games table
+    # - row is the tuple of the columns in COLUMNS
+    return dict(zip(('player', 'rows', 'columns', 'elapsed_ms', 'moves', 'played_at'), row))
+
+
+# User-defined classes
+
+class Leaderboard:
+    # An object in this class stores finished games in an SQLite file and answers top-N and personal best queries.
+    # Games are written on a thread of its own; queries run on the thread that asks.
+
+    def __init__(self, path=DEFAULT_PATH):
+        # Initialize a Leaderboard. The file is opened, and created if it does not exist yet, on the writer thread.
+        # - self is the Leaderboard to initialize
+        # - path is the string name of the SQLite file
+
+        self.path = path
+        self.connection = None  # connection of the thread that queries, opened on the first query
+        self.pending = queue.Queue()  # games waiting for the writer, then None to stop it
+        self.write_error = None  # exception raised in the writer
+        self.writer = threading.Thread(target=self.write_games, daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        # Return a new connection to the file, creating the table and indexes if needed; every thread needs its own
+        connection = sqlite3.connect(self.path)
+        # With a write-ahead log, queries can run while the writer commits
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        with connection:
+            connection.executescript(SCHEMA)
+        return connection
+
+    def query(self, sql, parameters):
+        # Return the cursor of a query run on the connection of the querying thread
+        # - sql is the string SELECT statement
+        # - parameters is the tuple of values for its placeholders
+        if self.connection is None:
+            self.connection = self.connect()
+        return self.connection.execute(sql, parameters)
+
+    def submit(self, player, rows, columns, elapsed_ms, moves):
+        # Queue a finished game to be written; returns at once
+        # - player is the string name of the player
+        # - rows and columns are the int size of the board
+        # - elapsed_ms is the int time the game took in milliseconds
+        # - moves is the int number of pairs turned over
+        self.pending.put((player, rows, columns, elapsed_ms, moves, time.time()))
+
+    def write_games(self):
+        # Write queued games until None is queued; runs on the writer thread, which also opens the file
+        try:
+            connection = self.connect()
+        except sqlite3.Error as error:
+            connection = None
+            self.write_error = error
+        try:
+            while True:
+                games = [self.pending.get()]
+                # Everything that queued up meanwhile goes into the same transaction
+                while True:
+                    try:
+                        games.append(self.pending.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in games
+                games = [game for game in games if game is not None]
+                try:
+                    if connection is not None:
+                        with connection:
+                            connection.executemany('INSERT INTO games (%s) VALUES (?, ?, ?, ?, ?, ?)' % COLUMNS, games)
+                except sqlite3.Error as error:
+                    self.write_error = error
+                for game in games:
+                    self.pending.task_done()
+                if stop:
+                    self.pending.task_done()
+                    return
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def flush(self):
+        # Wait until every submitted game is written.
+        # Raises the error the writer ran into, if any.
+        self.pending.join()
+        if self.write_error is not None:
+            error = self.write_error
+            self.write_error = None
+            raise error
+
+    def close(self):
+        # Write the remaining games and close the file
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        if self.write_error is not None:
+            raise self.write_error
+
+    def top(self, rows, columns, count=10):
+        # Return the list of the best games on a board size, fastest first and fewest moves on equal times
+        # - rows and columns are the int size of the board
+        # - count is the int number of games to return
+        cursor = self.query(
+            'SELECT %s FROM games WHERE rows = ? AND columns = ? ORDER BY elapsed_ms, moves LIMIT ?' % COLUMNS,
+            (rows, columns, count))
+        return [to_entry(row) for row in cursor]
+
+    def personal_best(self, player, rows, columns):
+        # Return the best game of a player on a board size, or None if the player has not finished one
+        # - player is the string name of the player
+        # - rows and columns are the int size of the board
+        row = self.query(
+            'SELECT %s FROM games WHERE player = ? AND rows = ? AND columns = ? ORDER BY elapsed_ms, moves LIMIT 1'
+            % COLUMNS, (player, rows, columns)).fetchone()
+        if row is None:
+            return None
+        return to_entry(row)
+
+    def rank(self, rows, columns, elapsed_ms, moves):
+        # Return the int place a game with this time and number of moves has on the board size's leaderboard
+        # - rows and columns are the int size of the board
+        # - elapsed_ms and moves are the result of the game
+        count = self.query(
+            'SELECT COUNT(*) FROM games WHERE rows = ? AND columns = ? AND '
+            '(elapsed_ms < ? OR (elapsed_ms = ? AND moves < ?))',
+            (rows, columns, elapsed_ms, elapsed_ms, moves)).fetchone()[0]
+        return count + 1
+
+
+if __name__ == '__main__':
+    main()
@@ -3,36 +3,242 @@
 # A single-person game that tracks the score of the player as the time taken to complete the game, where a lower score is better.
 # Multiple players can take turns playing the game and compete by comparing their scores.
 
+import time
+LAUNCH_TIME = time.perf_counter()  # taken before the other imports, to time the whole startup
+import argparse
+import os
+import sys
 import pygame
 import random
-import time
+from collections import deque
+
+# The shared helpers live in the pygame_common package at the top of the repository
+GAME_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(GAME_DIRECTORY))
+from pygame_common.assets import AssetManager
+from pygame_common.render import DirtyRenderer
+from pygame_common.text import TextCache
+from pygame_common.timers import Scheduler
+from pygame_common.profiler import FrameProfiler, NullProfiler
+from pygame_common.startup import init_pygame, StartupTimer
+from memory_par import read_par, rate_game
+
+# Size of the window unless it is resizable or fullscreen; the score font is 72 at this size
+WINDOW_SIZE = (500, 400)
 
 # User-defined functions
 
 def main():
-    # Initialize pygame
-    pygame.init()
+    # Read the board size from the command line
+    parser = argparse.ArgumentParser(description='Memory game')
+    parser.add_argument('--rows', type=int, default=4, help='number of tile rows')
+    parser.add_argument('--columns', type=int, default=None, help='number of tile columns (default: same as rows)')
+    parser.add_argument('--generate-faces', action='store_true', help='draw a distinct face for every pair instead of repeating the images')
+    parser.add_argument('--profile', action='store_true', help='show frame timings on screen')
+    parser.add_argument('--trace', help='write the timings of the last frames to this CSV or JSON file on exit')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the board shuffle (default: random)')
+    parser.add_argument('--record', help='write the input of the game to this file')
+    parser.add_argument('--replay', help='replay a recorded game as fast as possible and print its result')
+    parser.add_argument('--draw', action='store_true', help='with --replay, draw every frame in a window')
+    parser.add_argument('--startup-report', action='store_true', help='print how long after launch the first frames were shown')
+    parser.add_argument('--exit-after-startup', action='store_true', help='print the startup report and quit once the images are shown')
+    parser.add_argument('--resizable', action='store_true', help='let the window be resized; the board is laid out again to fit')
+    parser.add_argument('--fullscreen', action='store_true', help='play fullscreen at the resolution of the desktop')
+    parser.add_argument('--player', default=None, help='name the finished game is stored under on the leaderboard (default: login name)')
+    parser.add_argument('--leaderboard', default=None, help='leaderboard file (default: .memory_leaderboard.sqlite in the home directory)')
+    parser.add_argument('--no-leaderboard', action='store_true', help='do not store the finished game')
+    parser.add_argument('--capture', help='write the frames to this video file (through ffmpeg) or to numbered PNG files if it ends in .png; '
+                                          'with --replay the frames are made without a window, as fast as the encoder allows')
+    parser.add_argument('--capture-fps', type=int, default=30, help='frame rate of --capture')
+    args = parser.parse_args()
+    if args.record and args.resizable:
+        # Clicks are recorded as window positions, which only replay correctly in a window of the recorded size
+        parser.error('--record cannot be combined with --resizable')
+    if args.capture and args.resizable:
+        parser.error('--capture cannot be combined with --resizable, since every frame must have the same size')
+    if args.capture:
+        from pygame_common.capture import get_encoder_error
+        # Find out now, not when the first frame is written, that the video cannot be made
+        encoder_error = get_encoder_error(args.capture)
+        if encoder_error is not None:
+            parser.error(encoder_error)
+    # Initialize only the parts of pygame the game uses
+    init_pygame()
+    if args.replay:
+        surface = None
+        capture = None
+        if args.draw or args.capture:
+            from pygame_common.replay import InputLog
+            # Captured replays are drawn in a hidden window unless they are also shown
+            surface = pygame.display.set_mode(InputLog(args.replay).settings['size'], 0 if args.draw else pygame.HIDDEN)
+        if args.capture:
+            from pygame_common.capture import FrameCapture
+            capture = FrameCapture(args.capture, surface, args.capture_fps)
+        game = replay(args.replay, surface, args.draw or capture is not None, capture)
+        if capture is not None:
+            capture.close()
+            print('frames: %d' % capture.frames)
+        print('moves: %d  score: %d  finished: %s' % (game.moves, game.score, not game.continue_game))
+        pygame.quit()
+        return
     # create a pygame display window and get its surface
-    w_surface = pygame.display.set_mode((500, 400))
+    if args.fullscreen:
+        w_surface = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    elif args.resizable:
+        w_surface = pygame.display.set_mode(WINDOW_SIZE, pygame.RESIZABLE)
+    else:
+        w_surface = pygame.display.set_mode(WINDOW_SIZE)
     # set the title of the display window
     pygame.display.set_caption('Memory')   
+    # The game never uses mouse motion, and those events would wake the loop up when it is idle
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
     # create a game object
-    game = Game(w_surface)
+    seed = args.seed
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    startup = None
+    if args.startup_report or args.exit_after_startup:
+        startup = StartupTimer(LAUNCH_TIME, args.exit_after_startup)
+        startup.mark('pygame started')
+    # The images are read while the first frame already shows the board
+    game = Game(w_surface, rows=args.rows, columns=args.columns, generate_faces=args.generate_faces,
+                rng=random.Random(seed), load_in_background=True)
+    game.startup = startup
+    if args.record:
+        from pygame_common.replay import InputRecorder
+        game.recorder = InputRecorder(args.record, seed, get_settings(game))
+    if not args.no_leaderboard:
+        # The file is opened and written on the leaderboard's own thread, so the game never waits for it
+        import getpass
+        from leaderboard import Leaderboard, DEFAULT_PATH
+        game.leaderboard = Leaderboard(args.leaderboard or DEFAULT_PATH)
+        game.player = args.player or getpass.getuser()
+    if args.profile or args.trace:
+        game.start_profiling(args.profile)
+    if args.capture:
+        from pygame_common.capture import FrameCapture
+        # A frame the writer has no room for is dropped rather than slowing the game down
+        game.capture = FrameCapture(args.capture, w_surface, args.capture_fps, block=False)
     # start the main game loop by calling the play method on the game object
     game.play()
+    if game.capture is not None:
+        game.capture.close((game.clock() - game.start_time) / game.thousand)
+        print('frames: %d  dropped: %d' % (game.capture.frames, game.capture.dropped))
+    if args.trace:
+        game.profiler.dump(args.trace)
+    if game.recorder is not None:
+        game.recorder.finish(game.recorder.last_update_tick)
+    if not game.continue_game and game.par is not None:
+        print('moves: %d  par: %.1f  %s' % (game.moves, game.par, rate_game(game.moves, game.par)))
+    if game.leaderboard is not None:
+        import sqlite3
+        from leaderboard import print_leaderboard
+        # A leaderboard file that cannot be written or read costs the standings, not the shutdown
+        try:
+            game.leaderboard.flush()
+            if not game.continue_game:
+                print_leaderboard(game.leaderboard, game.rows, game.columns, 10, game.player)
+        except sqlite3.Error as error:
+            print('warning: the leaderboard %s could not be used: %s' % (game.leaderboard.path, error))
+        finally:
+            game.leaderboard.close()
     # quit pygame and clean up the pygame window
     pygame.quit() 
 
 
+def get_settings(game):
+    # Return the dictionary of settings a recording needs to create the same game again
+    # - game is the Game being recorded
+    return {'game': 'memory', 'size': list(game.surface.get_size()), 'rows': game.rows, 'columns': game.columns,
+            'generate_faces': game.generate_faces, 'reveal_time': game.reveal_time,
+            'queue_clicks': game.queue_clicks}
+
+
+def replay(path, surface=None, draw=False, capture=None):
+    # Play a recorded game again on a virtual clock, as fast as possible, and return the Game.
+    # The game is updated only at the recorded ticks, which are enough to reach the same result.
+    # - path is the string name of the recording
+    # - surface is the Surface to play on (an off-screen one of the recorded size when None)
+    # - draw is True to draw every recorded update
+    # - capture is a FrameCapture of the surface that every drawn frame is written to, or None
+
+    from pygame_common.replay import InputLog, UPDATE
+    from pygame_common.timers import VirtualClock
+    log = InputLog(path)
+    settings = log.settings
+    if settings.get('game') != 'memory':
+        raise ValueError('%s is not a Memory recording' % path)
+    if surface is None:
+        surface = pygame.Surface(settings['size'])
+    clock = VirtualClock()
+    game = Game(surface, rows=settings['rows'], columns=settings['columns'],
+                generate_faces=settings['generate_faces'], clock=clock.now, rng=random.Random(log.seed))
+    game.reveal_time = settings['reveal_time']
+    game.queue_clicks = settings['queue_clicks']
+    game.capture = capture
+    for tick, record_type, event in log.records + [(log.end_tick, UPDATE, None)]:
+        if event is not None:
+            game.handle_event([event])
+        elif record_type == UPDATE:
+            if capture is not None and game.continue_game:
+                # Between the recorded updates only the time score changes, once a second.
+                # Running update() there could start timers at other times than in the recording.
+                for second in range(clock.time // game.thousand + 1, (tick - 1) // game.thousand + 1):
+                    clock.time = second * game.thousand
+                    game.score = second
+                    game.draw()
+            clock.time = tick
+            if game.continue_game:
+                game.update()
+                game.decide_continue()
+            if draw:
+                game.draw()
+    return game
+
+
+def build_deck(pair_count, faces):
+    # Return the list of face names for a board, two of each, cycling through the faces when there are more pairs than faces
+    # - pair_count is the int number of pairs on the board
+    # - faces is the list of face names to use
+    deck = [faces[index % len(faces)] for index in range(pair_count)]
+    return deck + deck
+
+
+def make_face(number, size, text_cache):
+    # Return a Surface with a generated face: a coloured square with the face number on it
+    # - number is the int number of the face
+    # - size is the (width, height) of the face
+    # - text_cache is the TextCache used to render the number
+    face = pygame.Surface(size)
+    color = pygame.Color(0)
+    # Spread the hues with the golden angle so neighbouring numbers get different colours
+    color.hsva = ((number * 137.508) % 360, 60 + (number * 7) % 40, 60 + (number * 11) % 40, 100)
+    face.fill(color)
+    fontsize = min(size) // 2
+    if fontsize >= 8:
+        text_image = text_cache.render(str(number), '', fontsize, 'white')
+        face.blit(text_image, text_image.get_rect(center=face.get_rect().center))
+    return face
+
+
 # User-defined classes
 
 class Game:
     # An object in this class represents a complete game.
 
-    def __init__(self, surface):
+    def __init__(self, surface, assets=None, text_cache=None, rows=4, columns=None, generate_faces=False, clock=None, rng=None,
+                 load_in_background=False):
         # Initialize a Game.
         # - self is the Game to initialize
         # - surface is the display window surface object
+        # - assets is an optional AssetManager to share loaded images with other games
+        # - text_cache is an optional TextCache to share fonts and rendered text with other games
+        # - rows and columns are the int size of the board (columns defaults to rows)
+        # - generate_faces is True to draw a distinct face for every pair instead of repeating the images
+        # - clock is a function returning the time in int milliseconds (pygame.time.get_ticks when None);
+        #   simulations pass a virtual clock so they run at CPU speed
+        # - rng is the random.Random used to shuffle the board (the random module when None)
+        # - load_in_background is True to read the images on a thread while the first frames show empty tiles
 
         # === objects that are part of every game
         self.surface = surface
@@ -40,52 +246,153 @@ class Game:
         self.bg_color = pygame.Color(self.black)
         self.FPS = 60
         self.game_Clock = pygame.time.Clock()
+        if clock is None:
+            clock = pygame.time.get_ticks
+        self.clock = clock
+        self.start_time = clock()
+        if rng is None:
+            rng = random
+        self.rng = rng
         self.close_clicked = False
         self.continue_game = True
+        self.profiler = NullProfiler()
+        # An InputRecorder when the game's input is being recorded
+        self.recorder = None
+        # A StartupTimer when the time to the first frame is being measured
+        self.startup = None
+        # A FrameCapture every frame that changed is written to
+        self.capture = None
+        # A leaderboard.Leaderboard the finished game is submitted to, under the name in player
+        self.leaderboard = None
+        self.player = None
+        self.load_in_background = load_in_background
+        # Events received while the loop slept in wait_for_event, handled on the next frame
+        self.waited_events = []
+        # Only the tiles and score that changed are drawn and pushed to the display
+        self.renderer = DirtyRenderer(surface)
+        self.dirty_tiles = []
+        self.shown_score = None
+        if text_cache is None:
+            text_cache = TextCache()
+        self.text_cache = text_cache
         
         # === game specific objects
         self.thousand = 1000
-        self.board_size = 4
+        if columns is None:
+            columns = rows
+        if rows < 1 or columns < 1 or (rows * columns) % 2 != 0:
+            raise ValueError('the board needs an even number of tiles, not %d x %d' % (rows, columns))
+        self.rows = rows
+        self.columns = columns
+        self.pair_count = rows * columns // 2
+        self.generate_faces = generate_faces
         self.board = []
         self.score = 0
+        # Milliseconds from the start of the game to the last update
+        self.elapsed_ms = 0
+        # Counted when a pair is found, so the end of the game is known without looking at every tile
+        self.matched_pairs = 0
+        # Number of pairs of tiles the player has turned over
+        self.moves = 0
+        # Expected number of moves of the best play with perfect memory, read from the par table (None if it has no entry)
+        self.par = read_par(self.pair_count)
         self.selected_tile = []
+        # Two selected tiles stay shown for reveal_time milliseconds while the loop keeps running.
+        # Clicks made in that time are either rejected or queued and replayed afterwards.
+        self.scheduler = Scheduler(self.clock)
+        self.reveal_time = self.thousand
+        self.revealing = False
+        self.queue_clicks = False
+        self.queued_clicks = deque(maxlen=2)
+        if assets is None:
+            assets = AssetManager(GAME_DIRECTORY)
+        self.assets = assets
         self.create_board()
 
     def create_board(self):
         # Create the game board.
         # - self is the Game whose board is created       
         
-        # Width of each tile is the total surface width divided by 5 (need a 5th row to display the score on a black surface) and height is just 4 parts of the surface height
-        # They are 5 rows and 4 columns
-        
-        width = self.surface.get_width() // (self.board_size + 1)
-        height = self.surface.get_height() // self.board_size
+        width, height = self.get_tile_size()
+        if width < 1 or height < 1:
+            raise ValueError('a %d x %d board does not fit in the window' % (self.rows, self.columns))
+        self.tile_width = width
+        self.tile_height = height
         index = 0
         # All images that will be revealed as the player clicks on the tiles
-        self.filenames = ['image1.bmp','image2.bmp','image3.bmp','image4.bmp','image5.bmp','image6.bmp','image7.bmp','image8.bmp']
+        faces = ['image1.bmp','image2.bmp','image3.bmp','image4.bmp','image5.bmp','image6.bmp','image7.bmp','image8.bmp']
         # The default (? mark) image which is assigned to all tiles to hide the real images
         self.default_filename = 'image0.bmp' 
-        # We need all 8 images twice
-        self.filenames = self.filenames + self.filenames
-        random.shuffle(self.filenames)
+        # Boards with more pairs than images either repeat the images or get generated faces
+        self.generated_numbers = []
+        if self.generate_faces:
+            self.generated_numbers = list(range(len(faces), self.pair_count))
+            self.add_generated_faces()
+            faces.extend('face%d' % number for number in self.generated_numbers)
+        # We need every face twice
+        self.filenames = build_deck(self.pair_count, faces)
+        self.rng.shuffle(self.filenames)
+        # Load every image once, scaled to the tile size, and pack them into a single atlas shared by all tiles
+        self.atlas_filenames = [self.default_filename] + faces[:self.pair_count]
+        if self.load_in_background:
+            self.assets.start_loading([name for name in self.atlas_filenames if name.endswith('.bmp')])
+        # An AssetManager shared with an earlier game may already hold every image
+        if not self.assets.is_loading():
+            self.assets.build_atlas(self.atlas_filenames, (width, height))
         
         # for each row index
-        for row_index in range(0,self.board_size):
+        for row_index in range(0,self.rows):
          # create row as an empty list
             row = []
             # for each column index
-            for col_index in range(0,self.board_size):
+            for col_index in range(0,self.columns):
                 # create tile using row index and column index
                 x = col_index * width 
                 y = row_index * height
                 # Creates a tile object for every column in each row of the board
-                tile = Tile(x,y,width, height, self.filenames[index], self.default_filename, self.black, self.surface)
+                tile = Tile(x,y,width, height, self.filenames[index], self.default_filename, self.black, self.surface, self.assets)
                 # append tile to row
                 row.append(tile)
                 # Increases the index by one, which allows to call for the next item in the self.filenames list when loop is run again
                 index = index + 1
             # append row to board
             self.board.append(row)
+
+    def get_tile_size(self):
+        # Return the (width, height) of a tile for the size of the window
+        # - self is the Game whose tiles are laid out
+
+        # Width of each tile is the total surface width divided by one more than the number of columns (need an extra column to display the score on a black surface)
+        # and height is the surface height divided by the number of rows
+        return self.surface.get_width() // (self.columns + 1), self.surface.get_height() // self.rows
+
+    def add_generated_faces(self):
+        # Draw the generated faces at the current tile size and put them in the asset manager
+        # - self is the Game whose faces are drawn
+        for number in self.generated_numbers:
+            self.assets.add_image('face%d' % number, make_face(number, (self.tile_width, self.tile_height), self.text_cache))
+
+    def resize(self, surface):
+        # Lay the board out again for a window that changed size.
+        # The tile images are scaled again only if the tile size changed.
+        # - self is the Game to lay out
+        # - surface is the display window surface object after the change
+
+        self.surface = surface
+        self.renderer.set_surface(surface)
+        width, height = self.get_tile_size()
+        # A window too small for the board still gets a board, just one that is hard to see
+        width = max(1, width)
+        height = max(1, height)
+        if (width, height) != (self.tile_width, self.tile_height):
+            self.tile_width = width
+            self.tile_height = height
+            self.add_generated_faces()
+            if not self.assets.is_loading():
+                self.assets.build_atlas(self.atlas_filenames, (width, height))
+        for row_index, row in enumerate(self.board):
+            for col_index, tile in enumerate(row):
+                tile.set_area(col_index * width, row_index * height, width, height, surface)
         
 
     def play(self):
@@ -93,21 +400,78 @@ class Game:
         # Play the game until the player presses the close box.
         # - self is the Game that should be continued or not.
         
+        profiler = self.profiler
         while not self.close_clicked:  # until player clicks close box
             # play frame
+            profiler.begin_frame()
             self.handle_event()
+            profiler.mark('handle_event')
             self.draw()
+            profiler.mark('draw')
             if self.continue_game:
                 self.update()
                 self.decide_continue()
+                profiler.mark('update')
+            if self.is_static():
+                # Nothing to draw until an event arrives, a timer is due or the score changes
+                self.wait_for_event()
+            else:
                 self.game_Clock.tick(self.FPS)  # run at most with FPS Frames Per Second 
+            profiler.mark('tick')
+            profiler.end_frame()
+
+    def is_static(self):
+        # Return True if the next frame would draw nothing unless an event or timer changes the game
+        # - self is the Game to check
+        return (not self.dirty_tiles and self.score == self.shown_score and not self.renderer.is_dirty()
+                and not self.assets.is_loading())
+
+    def get_wait_time(self):
+        # Return the int milliseconds until the game changes by itself, which is when a timer is due
+        # or the score reaches the next second, or None if only an event can change it
+        # - self is the Game to check
+
+        timeout = self.scheduler.time_until_next()
+        if self.continue_game:
+            next_second = self.thousand - (self.clock() - self.start_time) % self.thousand
+            if timeout is None or next_second < timeout:
+                timeout = next_second
+        return timeout
 
-    def handle_event(self):
+    def wait_for_event(self):
+        # Sleep until an event arrives or until the next time the game changes by itself.
+        # - self is the Game that waits
+
+        timeout = self.get_wait_time()
+        if timeout is None:
+            # The game is over and no timers are left, so only an event can change anything
+            event = pygame.event.wait()
+        else:
+            event = pygame.event.wait(max(1, timeout))
+        if event.type != pygame.NOEVENT:
+            self.waited_events.append(event)
+
+    def start_profiling(self, overlay=True):
+        # Record how long every phase of a frame takes
+        # - self is the Game to profile
+        # - overlay is True to show the statistics on screen
+        self.profiler = FrameProfiler(['handle_event', 'update', 'draw', 'tick'])
+        if overlay:
+            self.renderer.add_overlay(lambda renderer: self.profiler.draw_overlay(renderer, self.text_cache))
+
+    def handle_event(self, events=None):
         # Handle each user event by changing the game state appropriately.
         # - self is the Game whose events will be handled
+        # - events is the list of events to handle, or None to take them from pygame
 
-        events = pygame.event.get()
+        if events is None:
+            # Events that arrived while the game was waiting come first
+            events = self.waited_events + pygame.event.get()
+            self.waited_events = []
+        resized = False
         for event in events:
+            if self.recorder is not None:
+                self.recorder.record_input_after_update(event)
             # Check if pygame is told to quit (window is closed)
             if event.type == pygame.QUIT:
                 # Stops the game
@@ -116,6 +480,15 @@ class Game:
             elif event.type == pygame.MOUSEBUTTONUP and self.continue_game:
                 # Call to the handle_mouse_up function that implements the actions to be taken after mouse button up event has happened
                 self.handle_mouse_up(event)
+            # Check if the window has to be repainted, for example after being uncovered
+            elif event.type == pygame.VIDEOEXPOSE:
+                self.renderer.mark_all()
+            # Check if the window changed size; dragging its edge sends many of these at once
+            elif event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+                resized = True
+        # Lay the board out once for all the size changes of this frame
+        if resized and pygame.display.get_surface() is not None:
+            self.resize(pygame.display.get_surface())
                 
     
     def handle_mouse_up(self, event):
@@ -123,33 +496,88 @@ class Game:
         # taking appropriate actions.
         # - self is the Game where the mouse up occurred.
         # - event is the pygame.event.Event object to handle
-        
-        # for each row
-        for row in self.board:
-            # for each column or tile in the row
-            for tile in row:
-                # The three if conditions check for whether the tile is clicked, the tile is not exposed and they are maximum of two tile filenames under self.selected_tile respectively. 
-                if tile.get_rect().collidepoint(event.pos) and not tile.get_expose() and len(self.selected_tile) <= 2:
-                    # Collect the selcted tiles under a empty list (self.selected_tile)
-                    self.selected_tile.append(tile)
-                    # Expose the tile by calling the tile class (to create a tile object) and setting self.expose to be true
-                    tile.set_expose(True)
+
+        # While a pair is being shown the click is queued for later or ignored
+        if self.revealing:
+            if self.queue_clicks:
+                self.queued_clicks.append(event.pos)
+            return
+        self.select_at(event.pos)
+
+    def select_at(self, position):
+        # Select the tile at a position of the window, if it can be selected
+        # - self is the Game where the tile is selected
+        # - position is the (x, y) position that was clicked
+
+        tile = self.get_tile_at(position)
+        # The three if conditions check for whether a tile is clicked, the tile is not exposed and fewer than two tiles are under self.selected_tile respectively. 
+        if tile is not None and not tile.get_expose() and len(self.selected_tile) < 2:
+            # Collect the selcted tiles under a empty list (self.selected_tile)
+            self.selected_tile.append(tile)
+            # Expose the tile by calling the tile class (to create a tile object) and setting self.expose to be true
+            self.expose_tile(tile, True)
+
+    def get_tile_at(self, position):
+        # Return the Tile at a position of the window, or None if the position is not on the board.
+        # The tiles form a grid, so the row and column follow from the position directly.
+        # - position is the (x, y) position to look up
+        col_index = position[0] // self.tile_width
+        row_index = position[1] // self.tile_height
+        if 0 <= row_index < self.rows and 0 <= col_index < self.columns:
+            return self.board[row_index][col_index]
+        return None
+
+    def expose_tile(self, tile, expose):
+        # Expose or hide a tile and remember that it has to be drawn again
+        # - tile is the Tile to change
+        # - expose is the boolean value to set on the tile
+        tile.set_expose(expose)
+        self.dirty_tiles.append(tile)
         
     def draw(self):
-        # Draw all game objects
+        # Draw the game objects that changed since the last frame
         # - self is the Game to draw 
         
-        self.surface.fill(self.bg_color) # clear the display surface first
-        # Display the score
-        self.show_score(self.score)
-        
-        # Draw each tile to the surface
-        for row in self.board:
-            for tile in row:
-                # Call to the tile class and draw function (under tile class) allows for the tile to be drawn onto the surface
+        if self.assets.is_loading() and self.assets.is_ready():
+            # The images read in the background have arrived; draw every tile again with them
+            self.assets.build_atlas(self.atlas_filenames, (self.tile_width, self.tile_height))
+            self.renderer.mark_all()
+        if self.renderer.full:
+            self.surface.fill(self.bg_color) # clear the display surface first
+            # Display the score
+            self.show_score(self.score)
+            # Draw each tile to the surface
+            for row in self.board:
+                for tile in row:
+                    # Call to the tile class and draw function (under tile class) allows for the tile to be drawn onto the surface
+                    tile.draw()
+        else:
+            # The score only has to be drawn again when the number of seconds changed
+            if self.score != self.shown_score:
+                self.show_score(self.score)
+            # Draw the tiles that were exposed or hidden since the last frame
+            for tile in self.dirty_tiles:
                 tile.draw()
+                self.renderer.mark(tile.get_rect())
+        self.dirty_tiles.clear()
         
-        pygame.display.update() # make the updated surface appear on the display
+        changed = self.renderer.flush() # make the changed parts of the surface appear on the display
+        if changed and self.capture is not None:
+            # Frames that changed nothing are covered by the last captured one
+            self.capture.capture(self.surface, (self.clock() - self.start_time) / self.thousand)
+        if self.startup is not None:
+            self.check_startup()
+
+    def check_startup(self):
+        # Record when the first frame and the first frame with the images reached the display
+        # - self is the Game being started
+        self.startup.mark('first frame')
+        if not self.assets.is_loading():
+            self.startup.mark('images shown')
+            self.startup.report()
+            if self.startup.quit_when_done:
+                self.close_clicked = True
+            self.startup = None
 
     def update(self):
         
@@ -157,71 +585,99 @@ class Game:
         # - self is the Game to update
         
         # Tracks the score by recording the seconds passed since the start of the game
-        self.score = pygame.time.get_ticks()//self.thousand
+        now = self.clock()
+        self.elapsed_ms = now - self.start_time
+        self.score = self.elapsed_ms//self.thousand
         
-        # When two tiles are selected 
-        if len(self.selected_tile) == 2:         
-            # If the filename of the first tile and the the filename of the second tile are the same
-            if self.selected_tile[0].get_filename() == self.selected_tile[1].get_filename() :
-                # We reduce the speed of the game to expose the selected tiles for short time
-                pygame.time.delay(self.thousand)
-                
-                # For the two tiles selected
-                for i in range(2):
-                    # Set the tile to stay exposed
-                    self.selected_tile[i].set_expose(True)
-                    # Draw the exposed tile image permanently
-                    self.selected_tile[i].draw()
-                # Remove all the tiles under the self.selected_tile list. This needs to be done so we can look at the next two selected tiles. Two tiles are compared at once.
-                self.selected_tile.clear()
-            
-            # If the filename of the first tile is not same as the filename of the second tile
-            elif self.selected_tile[0].get_filename() != self.selected_tile[1].get_filename():
-                # We reduce the speed of the game to expose the selected tiles for short time
-                pygame.time.delay(self.thousand)
-                
-                # For the two tiles selected
-                for i in range(2):
-                    # Set the tile to not stay exposed
-                    self.selected_tile[i].set_expose(False)
-                    # Draw the default tile image
-                    self.selected_tile[i].draw()
-                # Remove all the tiles under the self.selected_tile list. This needs to be done so we can look at the next two selected tiles. Two tiles are compared at once.
-                self.selected_tile.clear()
+        # Run the timers that are due, such as the end of showing a pair of tiles
+        timers_run = self.scheduler.update(now)
+        
+        # When two tiles are selected, keep them shown for a short time before comparing them
+        if len(self.selected_tile) == 2 and not self.revealing:
+            self.revealing = True
+            self.moves += 1
+            # A matching pair is counted straight away, so finding the last pair ends the game
+            if self.selected_tile[0].get_filename() == self.selected_tile[1].get_filename():
+                self.matched_pairs += 1
+            self.scheduler.schedule(self.reveal_time, self.compare_selected, now)
+
+        if self.recorder is not None:
+            self.recorder.record_update(now - self.start_time, timers_run > 0)
+
+    def compare_selected(self):
+        # Compare the two selected tiles once they have been shown for reveal_time.
+        # - self is the Game whose selected tiles are compared
+
+        # If the filename of the first tile and the the filename of the second tile are the same
+        if self.selected_tile[0].get_filename() == self.selected_tile[1].get_filename() :
+            # For the two tiles selected
+            for i in range(2):
+                # Set the tile to stay exposed and draw the exposed tile image permanently
+                self.expose_tile(self.selected_tile[i], True)
+        
+        # If the filename of the first tile is not same as the filename of the second tile
+        else:
+            # For the two tiles selected
+            for i in range(2):
+                # Set the tile to not stay exposed and draw the default tile image
+                self.expose_tile(self.selected_tile[i], False)
+
+        # Remove all the tiles under the self.selected_tile list. This needs to be done so we can look at the next two selected tiles. Two tiles are compared at once.
+        self.selected_tile.clear()
+        self.revealing = False
+
+        # Replay the clicks that were queued while the pair was shown
+        while self.queued_clicks and not self.revealing and len(self.selected_tile) < 2:
+            self.select_at(self.queued_clicks.popleft())
+        self.queued_clicks.clear()
                 
     def show_score(self, score):
-        # Makes the score (time passed in second) of the player appear on the screen in the top right corner
+        # Makes the score (time passed in second) of the player appear on the screen in the top right corner,
+        # with the par of the board below it and, once the game is over, how the moves compare with it
         # - score is the int seconds passed since the start of the game
         
-        # Show the game score in white 72 font size at the top right corner
+        # Show the game score in white at the top right corner, in 72 font size in a 500 x 400 window
         text_string = str(score)
-        fontsize = 72
+        scale = min(self.surface.get_width() / WINDOW_SIZE[0], self.surface.get_height() / WINDOW_SIZE[1])
+        fontsize = max(8, round(72 * scale))
         fg_color = 'white'
-        text_font = pygame.font.SysFont('', fontsize)
-        text_image = text_font.render(text_string, True, fg_color, self.bg_color)
-        location = (self.surface.get_width()-text_image.get_width(),0)
-        self.surface.blit(text_image, location)
+        text_images = [self.text_cache.render(text_string, '', fontsize, fg_color, self.bg_color)]
+        if self.par is not None:
+            lines = ['par %d' % round(self.par)]
+            if not self.continue_game:
+                lines.append(rate_game(self.moves, self.par))
+            for line in lines:
+                text_images.append(self.text_cache.render(line, '', max(8, round(24 * scale)), fg_color, self.bg_color))
+        # The score lives in the column to the right of the board, so the tiles are never covered
+        score_area = self.get_score_area()
+        score_area.height = sum(text_image.get_height() for text_image in text_images)
+        self.surface.fill(self.bg_color, score_area)
+        self.surface.set_clip(score_area)
+        y = 0
+        for text_image in text_images:
+            self.surface.blit(text_image, (self.surface.get_width() - text_image.get_width(), y))
+            y = y + text_image.get_height()
+        self.surface.set_clip(None)
+        self.renderer.mark(score_area)
+        self.shown_score = score
+
+    def get_score_area(self):
+        # Return the Rect of the column to the right of the board where the score is shown
+        board_right = self.board[0][-1].get_rect().right
+        return pygame.Rect(board_right, 0, self.surface.get_width() - board_right, self.surface.get_height())
 
     def decide_continue(self):
         # Determine if the game should continue
         # - self is the Game to update
         
-        # Integer variable to keep track of how many tiles are exposed on the board
-        num_exposed_tile = 0
-        
-        # For every row in the board
-        for row in self.board:
-            # for every column/tile in the row
-            for tile in row:
-                # If the tile is exposed
-                if tile.get_expose():
-                    # Increase the integer variable by 1
-                    num_exposed_tile +=1
-        
-        # If all 16 tiles are exposed
-        if num_exposed_tile == 16:
+        # If all pairs are found
+        if self.matched_pairs == self.pair_count and self.continue_game:
             # The game ends
             self.continue_game = False 
+            # Show the score again, now with the moves rated against the par
+            self.shown_score = None
+            if self.leaderboard is not None:
+                self.leaderboard.submit(self.player, self.rows, self.columns, self.elapsed_ms, self.moves)
 
 class Tile:
     # An object in this class represents a Rectangular tile
@@ -229,7 +685,7 @@ class Tile:
     # A tile can be selected if the tile is not exposed yet.
     # If the non-exposed tile is selected its hidden image is exposed.
 
-    def __init__(self, x, y, width, height, filename, default_filename, fg_color, surface):
+    def __init__(self, x, y, width, height, filename, default_filename, fg_color, surface, assets):
         # Initialize a tile to contain an image
         # - x is the int x coord of the upper left corner
         # - y is the int y coord of the upper left corner
@@ -238,15 +694,14 @@ class Tile:
         # - filename is the list of filenames of all the hidden images
         # - default_filename is the string filename of the default image
         # - fg_color is the string foreground colour of the rectangle underneath the image of the tile
+        # - assets is the AssetManager that holds the loaded images
         
-        self.x = x
-        self.y = y
-        self.rect = pygame.Rect(self.x, self.y, width, height)
-        self.surface = surface
+        self.set_area(x, y, width, height, surface)
         self.fg_color = pygame.Color(fg_color)
-        self.border_width = 3
+        self.loading_color = pygame.Color('gray30')  # drawn while the images are being read
         self.filename = filename
         self.default_filename = default_filename
+        self.assets = assets
         # A boolean varaible which signifies whether a tile is exposed or not. It's initial value is set to false since the game starts with no tiles being exposed.
         self.expose = False
        
@@ -254,19 +709,36 @@ class Tile:
         # Draw the Tile's image and a rectangle black border
         # - self is the Tile
         
+        if self.assets.is_loading():
+            # The images are still being read; show a plain tile until they arrive
+            self.surface.fill(self.loading_color, self.rect)
         # If the tile is set to expose
-        if self.expose:
+        elif self.expose:
             # Draw the hidden image of the tile onto the tile's surface
-            self.surface.blit(pygame.image.load(self.filename),(self.x, self.y))
+            image, area = self.assets.get(self.filename)
+            self.surface.blit(image, (self.x, self.y), area)
         
         # If the tile is not set to expose
         else:
             # Draw the default image of the tile onto the tile's surface
-            self.surface.blit(pygame.image.load(self.default_filename),(self.x, self.y))
+            image, area = self.assets.get(self.default_filename)
+            self.surface.blit(image, (self.x, self.y), area)
             
         # Draw the black rectangle border of all tiles
-        pygame.draw.rect(self.surface, self.fg_color, self.rect, self.border_width)
+        if self.border_width > 0:
+            pygame.draw.rect(self.surface, self.fg_color, self.rect, self.border_width)
     
+    def set_area(self, x, y, width, height, surface):
+        # Place the tile at a position and size, for example after the window was resized
+        # - x, y, width and height are as in __init__
+        # - surface is the display window surface object to draw on
+        self.x = x
+        self.y = y
+        self.rect = pygame.Rect(self.x, self.y, width, height)
+        self.surface = surface
+        # The border is 3 pixels wide on full size tiles and thinner (or left out) on small tiles
+        self.border_width = min(3, min(width, height) // 10)
+
     def get_expose(self):
         # A getter method that gets whether a tile is exposed (True) or not exposed (False)
         return self.expose
@@ -285,4 +757,5 @@ class Tile:
         return self.filename
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+# Par scores for Memory by Hanisha Kovvuru
+# The par of a board is the expected number of moves (pairs of tiles turned over) a player with
+# perfect memory needs when every move is the best one. Which tiles hide which faces does not
+# matter to such a player, only how many tiles were never seen and how many were seen once but
+# whose partner is still hidden, so the game is a chain of (unseen, known) states. Every move
+# leaves fewer unseen tiles, and the expected moves of a state follow from those of the states
+# with one or two unseen tiles less; the analyzer fills a memo table row by row (one row per
+# number of unseen tiles) and keeps, for every state, which move is best:
+#
+#   - turn over an unseen tile first; if it shows a known face, finish that pair, otherwise
+#     turn over another unseen tile, or a known one to learn the new face without risking
+#     showing a second new face
+#   - or turn over a known tile first and then an unseen one
+#
+# The par of every board up to 5000 pairs (a 100 x 100 board) is kept in a small table file,
+# four bytes a board, that the game reads one value of when it starts. A Monte Carlo check
+# plays many shuffled boards with the analyzer's moves on a pool of processes and compares
+# the mean number of moves with the computed par.
+#
+# The par assumes every pair has a face of its own. Boards with more pairs than images repeat
+# them unless the faces are generated, which gives more ways to match, so their par is high.
+#
+# Example: python memory_par.py --sizes 4x4 6x6 10x10
+#          python memory_par.py --check --games 20000 --sizes 2x2 4x4 6x6
+#          python memory_par.py --build-table --max-pairs 5000
+
+import argparse
+import math
+import os
+import random
+import statistics
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'memory_par.bin')
+
+# Table file: magic, number of boards, then the par of 1, 2, ... pairs as little-endian float32
+TABLE_MAGIC = b'MPAR'
+TABLE_HEADER = struct.Struct('<4sI')
+TABLE_VALUE = struct.Struct('<f')
+
+# (table path, pairs) -> par read by read_par, so games played by the thousand read the file once per board
+_read_pars = {}
+
+
+# User-defined functions
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute the par of Memory boards')
+    parser.add_argument('--sizes', nargs='+', default=['4x4'], help='board sizes as ROWSxCOLUMNS')
+    parser.add_argument('--check', action='store_true', help='compare the par with the mean of played games')
+    parser.add_argument('--games', type=int, default=10000, help='number of games per board size for --check')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes for --check (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game of --check')
+    parser.add_argument('--build-table', action='store_true', help='write the par of every board up to --max-pairs to the table file')
+    parser.add_argument('--max-pairs', type=int, default=5000, help='number of pairs of the largest board in the table')
+    parser.add_argument('--table', default=TABLE_PATH, help='table file (default: %(default)s)')
+    args = parser.parse_args()
+
+    if args.build_table:
+        write_par_table(args.table, args.max_pairs)
+        print('wrote the par of 1 to %d pairs to %s' % (args.max_pairs, args.table))
+        return
+    pair_counts = []
+    for text in args.sizes:
+        rows, columns = parse_size(text)
+        if (rows * columns) % 2 != 0:
+            parser.error('a %s board has an odd number of tiles' % text)
+        pair_counts.append(rows * columns // 2)
+    analyzer = ParAnalyzer()
+    if not args.check:
+        print('%-8s %6s %10s %10s' % ('board', 'pairs', 'par', 'per pair'))
+        for text, pairs in zip(args.sizes, pair_counts):
+            par = analyzer.get_par(pairs)
+            print('%-8s %6d %10.3f %10.4f' % (text, pairs, par, par / pairs))
+        return
+    results = run_check(pair_counts, args.games, args.workers, args.seed)
+    print('%-8s %6s %10s %10s %8s %7s' % ('board', 'pairs', 'par', 'mean', 'error', 'z'))
+    for text, pairs in zip(args.sizes, pair_counts):
+        moves = results[pairs]
+        par = analyzer.get_par(pairs)
+        mean = statistics.mean(moves)
+        error = statistics.pstdev(moves) / math.sqrt(len(moves))
+        z = (mean - par) / error if error > 0 else 0.0
+        print('%-8s %6d %10.3f %10.3f %8.3f %7.2f' % (text, pairs, par, mean, error, z))
+
+
+def parse_size(text):
+    # Return the (rows, columns) of a board size written as ROWSxCOLUMNS or as a single number
+    # - text is the string size
+    parts = text.lower().split('x')
+    rows = int(parts[0])
+    columns = int(parts[1]) if len(parts) > 1 else rows
+    return rows, columns
+
+
+def read_par(pairs, path=TABLE_PATH):
+    # Return the float par of a board with a number of pairs from the table file, or None if the
+    # board is larger than the table or there is no table; reads one value, not the whole file,
+    # and only the first time a board asks for it
+    # - pairs is the int number of pairs of the board
+    # - path is the string name of the table file
+
+    key = (path, pairs)
+    if key not in _read_pars:
+        _read_pars[key] = read_table_value(pairs, path)
+    return _read_pars[key]
+
+
+def read_table_value(pairs, path):
+    # Return the float par of a board with a number of pairs read from a table file, or None
+    # - pairs is the int number of pairs of the board
+    # - path is the string name of the table file
+
+    try:
+        with open(path, 'rb') as table_file:
+            magic, count = TABLE_HEADER.unpack(table_file.read(TABLE_HEADER.size))
+            if magic != TABLE_MAGIC or not 1 <= pairs <= count:
+                return None
+            table_file.seek(TABLE_HEADER.size + (pairs - 1) * TABLE_VALUE.size)
+            return TABLE_VALUE.unpack(table_file.read(TABLE_VALUE.size))[0]
+    except (OSError, struct.error):
+        return None
+
+
+def write_par_table(path, max_pairs):
+    # Compute the par of every board from 1 to max_pairs pairs and write them to a table file
+    # - path is the string name of the table file
+    # - max_pairs is the int number of pairs of the largest board
+
+    analyzer = ParAnalyzer(keep_rows=False)
+    analyzer.extend(2 * max_pairs)
+    values = np.array(analyzer.pars[1:max_pairs + 1], dtype='<f4')
+    with open(path, 'wb') as table_file:
+        table_file.write(TABLE_HEADER.pack(TABLE_MAGIC, max_pairs))
+        table_file.write(values.tobytes())
+
+
+def rate_game(moves, par):
+    # Return a short string rating a finished game against the par, such as '2 over par'
+    # - moves is the int number of moves the game took
+    # - par is the float par of the board
+    difference = moves - round(par)
+    if difference == 0:
+        return 'at par'
+    if difference < 0:
+        return '%d under par' % -difference
+    return '%d over par' % difference
+
+
+def shifted(row, shift, length):
+    # Return the array of row[k + shift] for k in range(length), with 0 where k + shift is outside row
+    # - row is the numpy array to read
+    # - shift is the int offset added to every index
+    # - length is the int length of the result
+
+    result = np.zeros(length)
+    start = max(0, -shift)
+    stop = min(length, len(row) - shift)
+    if stop > start:
+        result[start:stop] = row[start + shift:stop + shift]
+    return result
+
+
+# Every worker process keeps one analyzer, whose memo table grows to the largest board it played
+_worker_analyzer = None
+
+
+def play_games(pairs, seeds):
+    # Play a batch of games with the best moves in a worker process and return their numbers of moves
+    # - pairs is the int number of pairs of the board
+    # - seeds is the list of int seeds, one per game
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = ParAnalyzer()
+    return [_worker_analyzer.play_game(pairs, random.Random(seed)) for seed in seeds]
+
+
+def run_check(pair_counts, games, workers=None, first_seed=0, batch_size=500):
+    # Play games of every board size on a process pool and return a dictionary from the
+    # number of pairs to the list of numbers of moves the games took
+    # - pair_counts is the list of int numbers of pairs
+    # - games is the int number of games for every board
+    # - workers is the int number of processes, or None for one per CPU
+    # - first_seed is the int seed of the first game of every board
+    # - batch_size is the int number of games sent to a worker at once
+
+    results = dict((pairs, []) for pairs in pair_counts)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for pairs in pair_counts:
+            for start in range(0, games, batch_size):
+                seeds = list(range(first_seed + start, first_seed + min(games, start + batch_size)))
+                futures.append((pairs, executor.submit(play_games, pairs, seeds)))
+        for pairs, future in futures:
+            results[pairs].extend(future.result())
+    return results
+
+
+# User-defined classes
+
+class ParAnalyzer:
+    # An object in this class computes the expected number of moves of the best play from any
+    # (unseen, known) state and remembers the results and the best moves in a memo table.
+
+    def __init__(self, keep_rows=True):
+        # Initialize a ParAnalyzer with the row of the finished board.
+        # - self is the ParAnalyzer to initialize
+        # - keep_rows is True to keep every row of the memo table, False to keep only the two
+        #   rows the next one is computed from, which is enough for the par of large boards
+
+        self.keep_rows = keep_rows
+        # unseen -> (expected moves, known tile first, known tile second) arrays indexed by known.
+        # Only entries where unseen - known is even are states; the others are never read.
+        self.rows = {0: (np.zeros(1), np.zeros(1, bool), np.zeros(1, bool))}
+        self.size = 0  # largest number of unseen tiles computed
+        self.pars = [0.0]  # pairs -> expected moves from the start of the board
+
+    def extend(self, unseen):
+        # Compute the rows of the memo table up to a number of unseen tiles
+        # - self is the ParAnalyzer
+        # - unseen is the int number of unseen tiles of the last row
+
+        for u in range(self.size + 1, unseen + 1):
+            k = np.arange(u + 1, dtype=float)
+            new = (u - k) / u  # chance that a tile turned over from the unseen ones shows a new face
+            before = self.rows[u - 1][0]
+            after_known_matched = shifted(before, -1, u + 1)  # one unseen and one known tile less
+            after_new_seen = shifted(before, 1, u + 1)  # one unseen tile less, one known tile more
+
+            # Unseen tile first, then either another unseen tile (its partner with 1 chance in u - 1,
+            # the partner of a known tile, to be matched on the next move, or a second new face)...
+            if u >= 2:
+                two_before = self.rows[u - 2][0]
+                same_known = shifted(two_before, 0, u + 1)
+                two_new = shifted(two_before, 2, u + 1)
+                unseen_second = ((1 + same_known) + k * (2 + same_known) + (u - 2 - k) * (1 + two_new)) / (u - 1)
+            else:
+                unseen_second = np.zeros(u + 1)
+            # ...or a known tile, which only shows the new face
+            known_second = 1 + after_new_seen
+            use_known_second = (k >= 1) & (known_second < unseen_second)
+            unseen_first = k / u * (1 + after_known_matched) + new * np.where(use_known_second, known_second,
+                                                                                unseen_second)
+            # Known tile first, then an unseen tile: its partner, the partner of another known tile or a new face
+            known_first = ((1 + after_known_matched) + (k - 1) * (2 + after_known_matched)) / u + new * (1 + after_new_seen)
+            use_known_first = (k >= 1) & (known_first < unseen_first)
+
+            self.rows[u] = (np.where(use_known_first, known_first, unseen_first), use_known_first, use_known_second)
+            if not self.keep_rows and u >= 3:
+                del self.rows[u - 2]
+            if u % 2 == 0:
+                self.pars.append(float(self.rows[u][0][0]))
+            self.size = u
+
+    def get_par(self, pairs):
+        # Return the float expected number of moves of the best play on a board with a number of pairs
+        # - self is the ParAnalyzer
+        # - pairs is the int number of pairs of the board
+        self.extend(2 * pairs)
+        return self.pars[pairs]
+
+    def get_row(self, unseen):
+        # Return the memo table row of a number of unseen tiles, computing it if needed
+        # - self is the ParAnalyzer
+        # - unseen is the int number of unseen tiles
+        self.extend(unseen)
+        row = self.rows.get(unseen)
+        if row is None:
+            raise ValueError('the row of %d unseen tiles was not kept' % unseen)
+        return row
+
+    def expected_moves(self, unseen, known):
+        # Return the float expected number of moves of the best play from a state
+        # - self is the ParAnalyzer
+        # - unseen is the int number of tiles never turned over
+        # - known is the int number of tiles seen once whose partner is still unseen
+        if not 0 <= known <= unseen or (unseen - known) % 2 != 0:
+            raise ValueError('%d unseen tiles cannot include the partners of %d known tiles' % (unseen, known))
+        return float(self.get_row(unseen)[0][known])
+
+    def play_game(self, pairs, rng):
+        # Play a shuffled board with the best moves and return the int number of moves it took
+        # - self is the ParAnalyzer
+        # - pairs is the int number of pairs of the board
+        # - rng is the random.Random used to shuffle the board
+
+        # Turning over an unseen tile takes the next face of the shuffled deck
+        deck = list(range(pairs)) * 2
+        rng.shuffle(deck)
+        known = set()  # faces seen once whose partner is still unseen
+        moves = 0
+        while deck:
+            expected, use_known_first, use_known_second = self.get_row(len(deck))
+            count = len(known)
+            moves = moves + 1
+            if count > 0 and use_known_first[count]:
+                first = next(iter(known))
+                second = deck.pop()
+                if second == first:
+                    known.remove(first)
+                elif second in known:
+                    # The other pair is finished on the next move
+                    known.remove(second)
+                    moves = moves + 1
+                else:
+                    known.add(second)
+                continue
+            first = deck.pop()
+            if first in known:
+                known.remove(first)
+            elif count > 0 and use_known_second[count]:
+                known.add(first)
+            else:
+                second = deck.pop()
+                if second in known:
+                    known.remove(second)
+                    known.add(first)
+                    moves = moves + 1
+                elif second != first:
+                    known.add(first)
+                    known.add(second)
+        return moves
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+# Headless Memory simulations by Hanisha Kovvuru
+# Plays many games of Memory without a window, using scripted players instead of the mouse.
+# The games use the real Game and Tile classes with a virtual clock, so the time a pair of
+# tiles stays shown costs nothing and the games run as fast as the CPU allows.
+# Games are spread over a pool of processes and the results are summarised per player
+# strategy and board size.
+#
+# Example: python memory_sim.py --games 2000 --strategies random perfect limited:6 --sizes 4x4 6x6
+
+import os
+# The games never open a window, so no real video driver is needed
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import json
+import random
+import statistics
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
+import memory
+from memory_par import parse_size
+from pygame_common.timers import VirtualClock
+
+# User-defined functions
+
+def main():
+    parser = argparse.ArgumentParser(description='Play Memory games headless with scripted players')
+    parser.add_argument('--games', type=int, default=1000, help='number of games per strategy and board size')
+    parser.add_argument('--strategies', nargs='+', default=['random', 'perfect', 'limited:8'],
+                        help='players to simulate: random, perfect or limited:N')
+    parser.add_argument('--sizes', nargs='+', default=['4x4'], help='board sizes as ROWSxCOLUMNS')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--json', help='also write the summary to this JSON file')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes]
+    results = run_simulations(args.strategies, sizes, args.games, args.workers, args.seed)
+    summary = summarise(results)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(summary, json_file, indent=2)
+
+
+def make_player(strategy, rng):
+    # Return the Player for a strategy name
+    # - strategy is 'random', 'perfect' or 'limited:N' for a memory of N tiles
+    # - rng is the random.Random used by the player
+    if strategy == 'random':
+        return RandomPlayer(rng)
+    if strategy == 'perfect':
+        return PerfectMemoryPlayer(rng)
+    if strategy.startswith('limited:'):
+        return LimitedMemoryPlayer(rng, int(strategy.split(':', 1)[1]))
+    raise ValueError('unknown strategy %r' % strategy)
+
+
+def play_game(strategy, rows, columns, seed, surface=None, assets=None):
+    # Play one game of Memory with a scripted player and return a dictionary with the result
+    # - strategy is the name of the player strategy
+    # - rows and columns are the int size of the board
+    # - seed is the int seed of the board shuffle and the player
+    # - surface and assets can be passed in to reuse them between games
+
+    if surface is None:
+        surface = pygame.Surface((500, 400))
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    game = memory.Game(surface, assets, rows=rows, columns=columns, clock=clock.now, rng=rng)
+    player = make_player(strategy, rng)
+    player.start(game)
+
+    start = time.perf_counter()
+    while game.continue_game:
+        # Turn over two tiles, telling the player what they show
+        for pick in range(2):
+            row_index, col_index = player.choose(game)
+            tile = game.board[row_index][col_index]
+            event = pygame.event.Event(pygame.MOUSEBUTTONUP, pos=tile.get_rect().center, button=1)
+            game.handle_mouse_up(event)
+            player.observe((row_index, col_index), tile.get_filename())
+        matched = game.selected_tile[0].get_filename() == game.selected_tile[1].get_filename()
+        # Start showing the pair, let the reveal time pass and compare the tiles
+        game.update()
+        game.decide_continue()
+        clock.advance(game.reveal_time)
+        game.update()
+        player.finish_turn(matched)
+    return {'strategy': strategy, 'rows': rows, 'columns': columns, 'seed': seed,
+            'moves': game.moves, 'game_ms': clock.now(),
+            'cpu_ms': (time.perf_counter() - start) * 1000}
+
+
+# Every worker process keeps one surface and asset manager for all of its games
+_worker_surface = None
+_worker_assets = None
+
+
+def play_games(strategy, rows, columns, seeds):
+    # Play a batch of games in a worker process and return their results
+    # - strategy, rows and columns are as in play_game
+    # - seeds is the list of int seeds, one per game
+    global _worker_surface, _worker_assets
+    if _worker_surface is None:
+        _worker_surface = pygame.Surface((500, 400))
+        _worker_assets = memory.AssetManager(memory.GAME_DIRECTORY)
+    return [play_game(strategy, rows, columns, seed, _worker_surface, _worker_assets) for seed in seeds]
+
+
+def run_simulations(strategies, sizes, games, workers=None, first_seed=0, batch_size=50):
+    # Play games for every strategy and board size on a process pool and return all results
+    # - strategies is the list of strategy names
+    # - sizes is the list of (rows, columns) board sizes
+    # - games is the int number of games for every strategy and size
+    # - workers is the int number of processes, or None for one per CPU
+    # - first_seed is the int seed of the first game of every group
+    # - batch_size is the int number of games sent to a worker at once
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for strategy in strategies:
+            for rows, columns in sizes:
+                for start in range(0, games, batch_size):
+                    seeds = list(range(first_seed + start, first_seed + min(games, start + batch_size)))
+                    futures.append(executor.submit(play_games, strategy, rows, columns, seeds))
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def summarise(results):
+    # Return a list of move count and time statistics for every strategy and board size
+    # - results is the list of game result dictionaries
+
+    groups = OrderedDict()
+    for result in results:
+        key = (result['strategy'], result['rows'], result['columns'])
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for (strategy, rows, columns), group in groups.items():
+        moves = [result['moves'] for result in group]
+        cpu = [result['cpu_ms'] for result in group]
+        game_time = [result['game_ms'] / 1000 for result in group]
+        summary.append({'strategy': strategy, 'board': '%dx%d' % (rows, columns), 'games': len(group),
+                        'moves_mean': statistics.mean(moves),
+                        'moves_stdev': statistics.pstdev(moves),
+                        'moves_median': statistics.median(moves),
+                        'moves_min': min(moves), 'moves_max': max(moves),
+                        'game_seconds_mean': statistics.mean(game_time),
+                        'cpu_ms_mean': statistics.mean(cpu)})
+    return summary
+
+
+def print_summary(summary):
+    # Print the summary as a table
+    # - summary is the list returned by summarise
+    print('%-12s %-8s %6s %9s %8s %7s %5s %5s %10s %8s' % ('strategy', 'board', 'games', 'moves', 'stdev', 'median',
+                                                          'min', 'max', 'game s', 'cpu ms'))
+    for row in summary:
+        print('%-12s %-8s %6d %9.2f %8.2f %7.1f %5d %5d %10.1f %8.3f' % (
+            row['strategy'], row['board'], row['games'], row['moves_mean'], row['moves_stdev'],
+            row['moves_median'], row['moves_min'], row['moves_max'], row['game_seconds_mean'], row['cpu_ms_mean']))
+
+
+# User-defined classes
+
+class TileSet:
+    # An object in this class is a set of board positions that also supports picking a random member quickly.
+
+    def __init__(self, positions=()):
+        self.items = []
+        self.index = {}
+        for position in positions:
+            self.add(position)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, position):
+        return position in self.index
+
+    def add(self, position):
+        if position not in self.index:
+            self.index[position] = len(self.items)
+            self.items.append(position)
+
+    def remove(self, position):
+        # Move the last item into the hole so removing stays cheap
+        index = self.index.pop(position, None)
+        if index is None:
+            return
+        last = self.items.pop()
+        if index < len(self.items):
+            self.items[index] = last
+            self.index[last] = index
+
+    def choice(self, rng, exclude=None):
+        # Return a random position, avoiding exclude if there is any other
+        position = rng.choice(self.items)
+        if position == exclude and len(self.items) > 1:
+            while position == exclude:
+                position = rng.choice(self.items)
+        return position
+
+
+class Player:
+    # An object in this class keeps track of the tiles a player has turned over and the pairs it has found.
+    # Subclasses decide which tiles to turn over with choose(game), which returns the (row, column) of the next tile.
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.picks = []
+
+    def start(self, game):
+        # Get ready for a new game
+        # - game is the memory.Game that will be played
+        self.hidden = TileSet((row, col) for row in range(game.rows) for col in range(game.columns))
+        self.picks = []
+
+    def observe(self, position, face):
+        # Remember what a turned over tile shows
+        # - position is the (row, column) of the tile
+        # - face is the filename of the tile's image
+        self.picks.append((position, face))
+
+    def finish_turn(self, matched):
+        # Called after both tiles of a turn are compared
+        # - matched is True if the two tiles showed the same face
+        if matched:
+            for position, face in self.picks:
+                self.hidden.remove(position)
+        self.picks = []
+
+
+class RandomPlayer(Player):
+    # A player that turns over random hidden tiles and remembers nothing.
+
+    def choose(self, game):
+        exclude = self.picks[0][0] if self.picks else None
+        return self.hidden.choice(self.rng, exclude)
+
+
+class LimitedMemoryPlayer(Player):
+    # A player that remembers the faces of the last few tiles it saw and uses them to find pairs.
+
+    def __init__(self, rng, slots=None):
+        # - slots is the int number of tiles the player can remember, or None for no limit
+        Player.__init__(self, rng)
+        self.slots = slots
+
+    def start(self, game):
+        Player.start(self, game)
+        self.unknown = TileSet(self.hidden.items)  # hidden tiles whose face is not remembered
+        self.memory = OrderedDict()  # position -> face, oldest first
+        self.by_face = {}  # face -> set of remembered positions
+
+    def choose(self, game):
+        if not self.picks:
+            # Start with a pair that is already known, if there is one
+            for face, positions in self.by_face.items():
+                if len(positions) >= 2:
+                    return next(iter(positions))
+            if self.unknown:
+                return self.unknown.choice(self.rng)
+            return next(iter(self.memory))
+
+        # Second tile: finish the pair if its partner is remembered, otherwise try an unknown tile
+        first_position, first_face = self.picks[0]
+        for position in self.by_face.get(first_face, ()):
+            if position != first_position:
+                return position
+        if self.unknown:
+            return self.unknown.choice(self.rng, first_position)
+        return self.hidden.choice(self.rng, first_position)
+
+    def observe(self, position, face):
+        Player.observe(self, position, face)
+        self.unknown.remove(position)
+        self.memory.pop(position, None)
+        self.memory[position] = face
+        self.by_face.setdefault(face, set()).add(position)
+        if self.slots is not None and len(self.memory) > self.slots:
+            self.forget(*self.memory.popitem(last=False))
+
+    def forget(self, position, face):
+        # Stop remembering a tile; it becomes unknown again if it is still hidden
+        positions = self.by_face[face]
+        positions.discard(position)
+        if not positions:
+            del self.by_face[face]
+        if position in self.hidden:
+            self.unknown.add(position)
+
+    def finish_turn(self, matched):
+        if matched:
+            for position, face in self.picks:
+                if position in self.memory:
+                    del self.memory[position]
+                    self.forget(position, face)
+                self.unknown.remove(position)
+        Player.finish_turn(self, matched)
+
+
+class PerfectMemoryPlayer(LimitedMemoryPlayer):
+    # A player that remembers every tile it has seen.
+
+    def __init__(self, rng):
+        LimitedMemoryPlayer.__init__(self, rng, None)
+
+
+if __name__ == '__main__':
+    main()
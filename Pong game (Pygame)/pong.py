@@ -9,44 +9,308 @@
 
 # Credits: Used pong-hints.py as a foundation to start my code. Also, used certain segemnts of code from pre-poke framework (.py) and Poke the Dots v3 (.py) in my code.
 
+import time
+LAUNCH_TIME = time.perf_counter()  # taken before the other imports, to time the whole startup
+import argparse, os, sys
 import pygame, random, math
+from collections import defaultdict
+
+# The shared helpers live in the pygame_common package at the top of the repository
+GAME_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(GAME_DIRECTORY))
+from pygame_common.render import DirtyRenderer
+from pygame_common.text import TextCache
+from pygame_common.profiler import FrameProfiler, NullProfiler
+from pygame_common.startup import init_pygame, StartupTimer
+from pygame_common.view import View
+from pong_ai import PaddleAI, LEVELS
+
+# Size of the playing field; a window of another size shows the field scaled to fit
+FIELD_SIZE = (500, 400)
+
+# The paddle each key moves
+PADDLE_KEYS = {pygame.K_q: 'left', pygame.K_a: 'left', pygame.K_p: 'right', pygame.K_l: 'right'}
 
 # User-defined functions
 def main():
-    # initialize all pygame modules 
-    pygame.init()
+    # read the frame and physics rates from the command line
+    parser = argparse.ArgumentParser(description='Pong')
+    parser.add_argument('--fps', type=int, default=120, help='highest number of frames drawn per second (0 for no limit)')
+    parser.add_argument('--physics-rate', type=int, default=60, help='number of physics steps per second')
+    parser.add_argument('--speedup', type=float, default=1.0, help='factor the ball speed is multiplied by on every paddle hit')
+    parser.add_argument('--profile', action='store_true', help='show frame timings on screen')
+    parser.add_argument('--trace', help='write the timings of the last frames to this CSV or JSON file on exit')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the ball start position (default: random)')
+    parser.add_argument('--record', help='write the input of the game to this file')
+    parser.add_argument('--replay', help='replay a recorded game as fast as possible and print its result')
+    parser.add_argument('--draw', action='store_true', help='with --replay, draw every physics step in a window')
+    parser.add_argument('--ai', choices=['left', 'right', 'both'], help='let the computer move this paddle')
+    parser.add_argument('--ai-level', choices=sorted(LEVELS), default='normal', help='how well the computer plays')
+    parser.add_argument('--startup-report', action='store_true', help='print how long after launch the first frame was shown')
+    parser.add_argument('--exit-after-startup', action='store_true', help='print the startup report and quit after the first frame')
+    parser.add_argument('--resizable', action='store_true', help='let the window be resized; the field is scaled to fit')
+    parser.add_argument('--fullscreen', action='store_true', help='play fullscreen at the resolution of the desktop')
+    parser.add_argument('--capture', help='write the frames to this video file (through ffmpeg) or to numbered PNG files if it ends in .png; '
+                                          'with --replay the frames are made without a window, as fast as the encoder allows')
+    parser.add_argument('--capture-fps', type=int, default=60, help='frame rate of --capture')
+    parser.add_argument('--low-latency', action='store_true',
+                        help='read input just before simulating and draw ahead of the newest physics step instead of behind it')
+    parser.add_argument('--poll-keys', action='store_true',
+                        help='move the paddles by all the keys held down instead of by the last key event, so holding both keys of a paddle stops it')
+    parser.add_argument('--latency-probe', action='store_true', help='measure the time from a key press to the frame showing it and print it on exit')
+    args = parser.parse_args()
+    if args.capture and args.resizable:
+        parser.error('--capture cannot be combined with --resizable, since every frame must have the same size')
+    if args.capture:
+        from pygame_common.capture import get_encoder_error
+        # Find out now, not when the first frame is written, that the video cannot be made
+        encoder_error = get_encoder_error(args.capture)
+        if encoder_error is not None:
+            parser.error(encoder_error)
+    # initialize only the pygame modules the game uses
+    init_pygame()
+    if args.replay:
+        surface = None
+        capture = None
+        if args.draw or args.capture:
+            from pygame_common.replay import InputLog
+            # Captured replays are drawn in a hidden window unless they are also shown
+            flags = pygame.HIDDEN if not args.draw else 0 if args.capture else pygame.RESIZABLE
+            surface = pygame.display.set_mode(InputLog(args.replay).settings['size'], flags)
+        if args.capture:
+            from pygame_common.capture import FrameCapture
+            capture = FrameCapture(args.capture, surface, args.capture_fps)
+        game = replay(args.replay, surface, args.draw or capture is not None, capture)
+        if capture is not None:
+            capture.close()
+            print('frames: %d' % capture.frames)
+        print('steps: %d  score: %d - %d  finished: %s' % (game.steps, game.left_score, game.right_score,
+                                                          not game.continue_game))
+        pygame.quit()
+        return
     # create a pygame display window
-    pygame.display.set_mode((500, 400))
+    if args.fullscreen:
+        pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    elif args.resizable:
+        pygame.display.set_mode(FIELD_SIZE, pygame.RESIZABLE)
+    else:
+        pygame.display.set_mode(FIELD_SIZE)
     # set the title of the display window
     pygame.display.set_caption('Pong')
     # get the display surface
     w_surface = pygame.display.get_surface() 
     # create a game object
-    game = Game(w_surface)
+    seed = args.seed
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    game = Game(w_surface, rng=random.Random(seed), field_size=FIELD_SIZE)
+    if args.startup_report or args.exit_after_startup:
+        game.startup = StartupTimer(LAUNCH_TIME, args.exit_after_startup)
+        game.startup.mark('pygame started')
+    game.FPS = args.fps
+    game.physics_rate = args.physics_rate
+    game.ball_speedup = args.speedup
+    game.low_latency = args.low_latency
+    game.poll_keys = args.poll_keys
+    if args.latency_probe:
+        from pygame_common.latency import LatencyProbe
+        game.latency_probe = LatencyProbe()
+    if args.ai:
+        reaction_steps, error = LEVELS[args.ai_level]
+        for side in (['left', 'right'] if args.ai == 'both' else [args.ai]):
+            game.add_ai(side, reaction_steps, error)
+    if args.record:
+        from pygame_common.replay import InputRecorder
+        game.recorder = InputRecorder(args.record, seed, get_settings(game))
+    if args.profile or args.trace:
+        game.start_profiling(args.profile)
+    if args.capture:
+        from pygame_common.capture import FrameCapture
+        # A frame the writer has no room for is dropped rather than slowing the game down
+        game.capture = FrameCapture(args.capture, w_surface, args.capture_fps, block=False)
     # start the main game loop by calling the play method on the game object
     game.play() 
+    if game.latency_probe is not None:
+        game.latency_probe.report()
+    if game.capture is not None:
+        game.capture.close(game.steps / game.physics_rate)
+        print('frames: %d  dropped: %d' % (game.capture.frames, game.capture.dropped))
+    if args.trace:
+        game.profiler.dump(args.trace)
+    if game.recorder is not None:
+        game.recorder.finish(game.steps)
     # quit pygame and clean up the pygame window
     pygame.quit() 
 
 
+def get_settings(game):
+    # Return the dictionary of settings a recording needs to create the same game again
+    # - game is the Game being recorded
+    return {'game': 'pong', 'size': list(game.field_size), 'ball_speedup': game.ball_speedup,
+            'max_ball_speed': game.max_ball_speed, 'poll_keys': game.poll_keys,
+            'ai': [[ai.side, ai.reaction_steps, ai.error] for ai in game.ai_players]}
+
+
+def replay(path, surface=None, draw=False, capture=None):
+    # Play a recorded game again, running the physics steps back to back, and return the Game.
+    # Every input is handled before the same step it was handled before when it was recorded.
+    # - path is the string name of the recording
+    # - surface is the Surface to play on (an off-screen one of the recorded size when None);
+    #   the field keeps the recorded size whatever the size of the surface
+    # - draw is True to draw every physics step
+    # - capture is a FrameCapture of the surface that every drawn frame is written to, or None
+
+    from pygame_common.replay import InputLog
+    log = InputLog(path)
+    settings = log.settings
+    if settings.get('game') != 'pong':
+        raise ValueError('%s is not a Pong recording' % path)
+    if surface is None:
+        surface = pygame.Surface(settings['size'])
+    game = Game(surface, rng=random.Random(log.seed), field_size=settings['size'])
+    game.ball_speedup = settings['ball_speedup']
+    game.max_ball_speed = settings['max_ball_speed']
+    game.poll_keys = settings.get('poll_keys', False)
+    for side, reaction_steps, error in settings.get('ai', []):
+        game.add_ai(side, reaction_steps, error)
+    game.capture = capture
+    records = log.records
+    index = 0
+    while game.steps < log.end_tick:
+        events = []
+        while index < len(records) and records[index][0] <= game.steps:
+            if records[index][2] is not None:
+                events.append(records[index][2])
+            index = index + 1
+        if events:
+            game.handle_events(events)
+        game.step()
+        if draw:
+            # The recorded events are not the window's, so window changes are handled here
+            if pygame.event.get((pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED, pygame.VIDEOEXPOSE)):
+                game.resize(pygame.display.get_surface())
+            game.draw()
+    return game
+
+
+def sweep_circle_rect(start, motion, radius, rect):
+    # Returns the time of impact of a moving circle with a rectangle as a float fraction of the
+    # motion between 0 and 1, or None if they do not touch during the motion.
+    # The circle hits the rectangle when its center reaches the rectangle grown by the radius,
+    # where the corners of the grown rectangle are rounded with the radius.
+    # - start is the (x, y) center of the circle before the motion
+    # - motion is the (x, y) distance the circle moves
+    # - radius is the radius of the circle
+    # - rect is the pygame.Rect to test against
+
+    # Find when the center is inside the grown rectangle along both axes at once
+    t_enter = -math.inf
+    t_exit = math.inf
+    for low, high, position, distance in ((rect.left - radius, rect.right + radius, start[0], motion[0]),
+                                          (rect.top - radius, rect.bottom + radius, start[1], motion[1])):
+        if distance == 0:
+            if position < low or position > high:
+                return None
+        else:
+            t_low = (low - position) / distance
+            t_high = (high - position) / distance
+            t_enter = max(t_enter, min(t_low, t_high))
+            t_exit = min(t_exit, max(t_low, t_high))
+    if t_enter > t_exit or t_exit < 0 or t_enter > 1:
+        return None
+    t = max(t_enter, 0.0)
+
+    # Outside both edge ranges of the rectangle the ball can only touch the rounded corner
+    x = start[0] + motion[0] * t
+    y = start[1] + motion[1] * t
+    if (x < rect.left or x > rect.right) and (y < rect.top or y > rect.bottom):
+        corner = (rect.left if x < rect.left else rect.right, rect.top if y < rect.top else rect.bottom)
+        return sweep_circle_point(start, motion, radius, corner)
+    return t
+
+
+def sweep_circle_point(start, motion, radius, point):
+    # Returns the time of impact of a moving circle with a point as in sweep_circle_rect, or None
+    # - start, motion and radius describe the moving circle as in sweep_circle_rect
+    # - point is the (x, y) point to test against
+
+    offset_x = start[0] - point[0]
+    offset_y = start[1] - point[1]
+    c = offset_x * offset_x + offset_y * offset_y - radius * radius
+    if c <= 0:
+        return 0.0  # already touching
+    a = motion[0] * motion[0] + motion[1] * motion[1]
+    b = 2 * (offset_x * motion[0] + offset_y * motion[1])
+    discriminant = b * b - 4 * a * c
+    if a == 0 or discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / (2 * a)
+    if 0 <= t <= 1:
+        return t
+    return None
+
+
 # User-defined classes
 
 class Game:
     # An object in this class represents a complete game.
 
-    def __init__(self, surface):
+    def __init__(self, surface, text_cache=None, rng=None, field_size=None):
         # Initialize a Game.
         # - self is the Game to initialize
         # - surface is the display window surface object
+        # - text_cache is an optional TextCache to share fonts and rendered text with other games
+        # - rng is the random.Random used to place the ball (the random module when None)
+        # - field_size is the (width, height) of the playing field (the size of the surface when None).
+        #   The game is played in field coordinates and drawn scaled to fit the surface.
 
         # === objects that are part of every game
         self.surface = surface
+        if field_size is None:
+            field_size = surface.get_size()
+        self.field_size = tuple(field_size)
+        self.view = View(self.field_size, surface.get_size())
+        self.bar_color = 'gray15'  # fills the parts of the window the field does not cover
         self.bg_color = 'black'
         self.fg_color = 'white'
-        self.FPS = 60
+        self.FPS = 120
         self.game_Clock = pygame.time.Clock()
+        # The physics runs physics_rate steps per second whatever the frame rate is.
+        # Frames in between two steps are drawn at positions interpolated between them.
+        self.physics_rate = 60
+        self.max_steps_per_frame = 5  # a slow frame catches up at most this many steps
+        # In low latency mode the loop sleeps before reading input rather than after drawing, and
+        # frames are drawn ahead of the newest physics step with the current velocities instead of
+        # between the last two steps, so a key press shows without waiting for the next step
+        self.low_latency = False
+        # With poll_keys the paddles move by all the keys held down instead of by the last key event
+        self.poll_keys = False
+        self.pressed = defaultdict(bool)  # key -> True while held down, for poll_keys
+        # A LatencyProbe measuring how long key presses take to show
+        self.latency_probe = None
+        self.steps = 0  # number of physics steps run so far
         self.close_clicked = False
         self.continue_game = True
+        self.profiler = NullProfiler()
+        # An InputRecorder when the game's input is being recorded
+        self.recorder = None
+        # PaddleAI players that move a paddle before every physics step
+        self.ai_players = []
+        # A StartupTimer when the time to the first frame is being measured
+        self.startup = None
+        # A FrameCapture every drawn frame is written to
+        self.capture = None
+        if rng is None:
+            rng = random
+        self.rng = rng
+        # Only the areas where objects moved or scores changed are drawn and pushed to the display
+        self.renderer = DirtyRenderer(surface)
+        self.drawn_rects = []
+        self.shown_scores = None
+        self.score_rects = []
+        if text_cache is None:
+            text_cache = TextCache()
+        self.text_cache = text_cache
                
         # === game specific objects
         # Paddle
@@ -55,17 +319,20 @@ class Game:
         self.right_paddle_x_coord  = 375
         paddle_width = 10
         paddle_height = 50
-        self.left_paddle = Paddle(self.left_paddle_x_coord,self.surface.get_height()//2,paddle_width,paddle_height,self.fg_color,self.surface)
-        self.right_paddle = Paddle(self.right_paddle_x_coord,self.surface.get_height()//2,paddle_width,paddle_height,self.fg_color,self.surface)   
+        self.left_paddle = Paddle(self.left_paddle_x_coord,self.field_size[1]//2,paddle_width,paddle_height,self.fg_color,self.surface,self.view)
+        self.right_paddle = Paddle(self.right_paddle_x_coord,self.field_size[1]//2,paddle_width,paddle_height,self.fg_color,self.surface,self.view)   
         
         # Ball
         self.small_ball_radius = 5
         self.four = 4  # Need to use this literal multiple times, so assigned it to a variable
-        self.small_ball_x_coord = random.randint(self.left_paddle_x_coord, self.right_paddle_x_coord)  # The ball should start near the horizontal-center of the window (between the left and right paddles), to start the game fairly
-        self.small_ball_y_coord = random.randint(self.small_ball_radius, self.surface.get_height() - self.small_ball_radius)
+        self.small_ball_x_coord = self.rng.randint(self.left_paddle_x_coord, self.right_paddle_x_coord)  # The ball should start near the horizontal-center of the window (between the left and right paddles), to start the game fairly
+        self.small_ball_y_coord = self.rng.randint(self.small_ball_radius, self.field_size[1] - self.small_ball_radius)
         self.small_ball_center = [self.small_ball_x_coord, self.small_ball_y_coord]
         self.small_ball_velocity = [self.four,1]
-        self.small_ball = Ball(self.fg_color,self.small_ball_radius, self.small_ball_center, self.small_ball_velocity, self.surface)
+        self.small_ball = Ball(self.fg_color,self.small_ball_radius, self.small_ball_center, self.small_ball_velocity, self.surface, self.view)
+        # Every paddle hit multiplies the ball speed by ball_speedup, up to max_ball_speed pixels per step
+        self.ball_speedup = 1.0
+        self.max_ball_speed = 40
         
         # Initialize scores of the two players
         self.left_score = 0
@@ -76,32 +343,157 @@ class Game:
         # Play the game until the player presses the close box.
         # - self is the Game that should be continued or not.
 
+        accumulator = 0.0  # seconds of game time that have passed but not been simulated yet
+        previous_time = time.perf_counter()
+        profiler = self.profiler
         while not self.close_clicked:  # until player clicks close box
             # play frame
+            profiler.begin_frame()
+            if self.low_latency:
+                # Wait for the next frame before reading input, so it is as fresh as possible when drawn
+                self.game_Clock.tick(self.FPS)
+                profiler.mark('tick')
             self.handle_events()
-            self.draw()
-            
-            if self.continue_game:
-                self.update()
-                self.decide_continue()
-            self.game_Clock.tick(self.FPS)  # run at most with FPS Frames Per Second 
+            profiler.mark('handle_events')
+
+            # Run as many fixed physics steps as the time since the last frame needs
+            step_time = 1 / self.physics_rate
+            now = time.perf_counter()
+            accumulator = accumulator + now - previous_time
+            previous_time = now
+            steps = 0
+            while accumulator >= step_time and steps < self.max_steps_per_frame:
+                self.step()
+                accumulator = accumulator - step_time
+                steps = steps + 1
+            if accumulator >= step_time:
+                # The machine cannot keep up; drop the backlog instead of falling further behind
+                accumulator = accumulator % step_time
+            profiler.mark('update')
+
+            # Draw the objects part of the way between the last two physics steps
+            # (or as far ahead of the last one in low latency mode)
+            if self.low_latency:
+                self.draw(1.0 + accumulator / step_time)
+            else:
+                self.draw(accumulator / step_time)
+            profiler.mark('draw')
+            if not self.low_latency:
+                self.game_Clock.tick(self.FPS)  # run at most with FPS Frames Per Second 
+                profiler.mark('tick')
+            profiler.end_frame()
+
+    def start_profiling(self, overlay=True):
+        # Record how long every phase of a frame takes
+        # - self is the Game to profile
+        # - overlay is True to show the statistics on screen
+        self.profiler = FrameProfiler(['handle_events', 'update', 'draw', 'tick'])
+        if overlay:
+            self.renderer.add_overlay(lambda renderer: self.profiler.draw_overlay(renderer, self.text_cache))
+
+    def add_ai(self, side, reaction_steps=6, error=20.0):
+        # Let the computer move a paddle
+        # - self is the Game
+        # - side is 'left' or 'right'
+        # - reaction_steps and error set how well it plays, as in pong_ai.PaddleAI
+        self.ai_players.append(PaddleAI(side, reaction_steps, error, self.rng))
+
+    def step(self):
+        # Run one fixed physics step.
+        # - self is the Game to step
+
+        # Remember where the objects were so frames can be drawn between this step and the next
+        self.left_paddle.save_position()
+        self.right_paddle.save_position()
+        self.small_ball.save_position()
+        if self.continue_game:
+            for ai in self.ai_players:
+                ai.control(self)
+            self.update()
+            self.decide_continue()
+        self.steps = self.steps + 1
+
+    def resize(self, surface):
+        # Fit the field into a window that changed size and draw everything again
+        # - self is the Game to fit
+        # - surface is the display window surface object after the change
 
-    def handle_events(self):
+        self.surface = surface
+        self.renderer.set_surface(surface)
+        self.view.resize(surface.get_size())
+        for moving_object in (self.left_paddle, self.right_paddle, self.small_ball):
+            moving_object.surface = surface
+        self.drawn_rects = []
+        self.score_rects = []
+
+    def handle_events(self, events=None):
         # Handle each user event by changing the game state appropriately.
         # - self is the Game whose events will be handled
+        # - events is the list of events to handle, or None to take them from pygame
 
-        events = pygame.event.get()
+        if events is None:
+            events = pygame.event.get()
+        now = time.perf_counter()
+        resized = False
         for event in events:
+            if self.recorder is not None:
+                self.recorder.record(self.steps, event)
             # Checks if the pygame window is closed
             if event.type == pygame.QUIT:
                 self.close_clicked = True
             # Checks if any key on the keyboard is pressed
             elif event.type == pygame.KEYDOWN:
-                self.handle_key_down(event)
+                if self.latency_probe is not None and event.key in PADDLE_KEYS:
+                    self.probe_key(event.key, now)
+                if self.poll_keys:
+                    self.pressed[event.key] = True
+                else:
+                    self.handle_key_down(event)
             # Checks if any key on the keyboard is released
             elif event.type == pygame.KEYUP:
-                self.handle_key_up(event)
+                if self.latency_probe is not None and event.key in PADDLE_KEYS:
+                    self.latency_probe.cancel(PADDLE_KEYS[event.key])
+                if self.poll_keys:
+                    self.pressed[event.key] = False
+                else:
+                    self.handle_key_up(event)
+            # Checks if the window has to be repainted, for example after being uncovered
+            elif event.type == pygame.VIDEOEXPOSE:
+                self.renderer.mark_all()
+            # Checks if the window changed size; dragging its edge sends many of these at once
+            elif event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+                resized = True
+        # Fit the field once for all the size changes of this frame
+        if resized and pygame.display.get_surface() is not None:
+            self.resize(pygame.display.get_surface())
+        if self.poll_keys:
+            # The key state is built from the events alone, which are what a recording keeps,
+            # so a replay moves the paddles exactly as the game did
+            self.apply_pressed_keys()
+
+    def apply_pressed_keys(self):
+        # Set the velocities of the paddles the computer does not move from the keys held down;
+        # a paddle whose two keys are both held stays still
+        # - self is the Game object
+        pressed = self.pressed
+        computer_sides = [ai.side for ai in self.ai_players]
+        if 'left' not in computer_sides:
+            self.left_paddle.set_vertical_velocity((pressed[pygame.K_a] - pressed[pygame.K_q]) * self.paddle_increment)
+        if 'right' not in computer_sides:
+            self.right_paddle.set_vertical_velocity((pressed[pygame.K_l] - pressed[pygame.K_p]) * self.paddle_increment)
 
+    def probe_key(self, key, now):
+        # Start measuring how long a paddle key takes to move the paddle on screen
+        # - self is the Game object
+        # - key is the pygame key constant of a paddle key
+        # - now is the float time.perf_counter() the key was read at
+        side = PADDLE_KEYS[key]
+        paddle = self.left_paddle if side == 'left' else self.right_paddle
+        # Only a paddle at rest is measured; on a moving paddle the next frame changes anyway
+        if paddle.vertical_velocity != 0 or not self.drawn_rects:
+            return
+        drawn_top = self.drawn_rects[0 if side == 'left' else 1].top
+        self.latency_probe.start(side, drawn_top, now)
 
     def handle_key_down(self,event):
         # reponds to KEYDOWN event (when key is pressed)
@@ -137,17 +529,57 @@ class Game:
             # Makes the right paddle stationary when p is released 
             self.right_paddle.set_vertical_velocity(0)         
 
-    def draw(self):
-        # Draw all game objects.
+    def draw(self, alpha=1.0):
+        # Draw the parts of the game that changed since the last frame.
         # - self is the Game to draw
+        # - alpha is the float fraction of the way from the previous physics step to the last one to draw the objects at
+
+        moving_objects = [self.left_paddle, self.right_paddle, self.small_ball]
+        new_rects = [moving_object.get_rect(alpha) for moving_object in moving_objects]
 
-        self.surface.fill(pygame.Color(self.bg_color)) # clear the display surface first
-        self.show_score()
-        self.left_paddle.draw()
-        self.right_paddle.draw()
-        self.small_ball.draw()
+        # clear the display surface first, with bars where the window is wider or taller than the field
+        if self.renderer.full and not self.view.identity:
+            self.surface.fill(pygame.Color(self.bar_color))
+        # A ball leaving the field is drawn and erased only inside it, so the bars stay as they are
+        self.surface.set_clip(self.view.field_rect)
+        if self.renderer.full:
+            self.surface.fill(pygame.Color(self.bg_color), self.view.field_rect)
+            self.show_score()
+        else:
+            # Erase the objects that moved at their old position and update both positions
+            for old_rect, new_rect in zip(self.drawn_rects, new_rects):
+                if old_rect != new_rect:
+                    self.surface.fill(pygame.Color(self.bg_color), old_rect)
+                    self.renderer.mark(old_rect)
+                    self.renderer.mark(new_rect)
+            # Redraw the scores when they changed or when a moving object was erased on top of them
+            scores = (self.left_score, self.right_score)
+            if scores != self.shown_scores or any(self.renderer.collides(rect) for rect in self.score_rects):
+                self.show_score()
+
+        # Objects are drawn again when anything near them changed, since erasing may have touched them
+        for moving_object, new_rect in zip(moving_objects, new_rects):
+            if self.renderer.collides(new_rect):
+                moving_object.draw(alpha)
+        self.surface.set_clip(None)
+        self.drawn_rects = new_rects
       
-        pygame.display.update() # make the updated surface appear on the display
+        self.renderer.flush() # make the changed parts of the surface appear on the display
+        if self.latency_probe is not None:
+            now = time.perf_counter()
+            self.latency_probe.check('left', new_rects[0].top, now)
+            self.latency_probe.check('right', new_rects[1].top, now)
+            self.latency_probe.end_frame()
+        if self.capture is not None:
+            # The frame shows the game alpha of the way through the last physics step
+            self.capture.capture(self.surface, (self.steps - 1 + alpha) / self.physics_rate)
+        if self.startup is not None:
+            # Record when the first frame reached the display
+            self.startup.mark('first frame')
+            self.startup.report()
+            if self.startup.quit_when_done:
+                self.close_clicked = True
+            self.startup = None
 
 
     def update(self):
@@ -163,22 +595,37 @@ class Game:
         
     def collide(self):
         # Checks if the ball collides with the paddles on the relative side and make the ball bounce. 
+        # The whole path of the ball during the step is tested, so a fast ball cannot pass through a paddle.
         
-        # Makes the ball only bounce off right side of the left paddle
-        if self.left_paddle.rect.collidepoint(self.small_ball_center) and self.small_ball_velocity[0] == -self.four:
-            for i in range(0,2):
-                self.small_ball_velocity[i] = - self.small_ball_velocity[i]
-
-        # Makes the ball only bounce off left side of the right paddle
-        if self.right_paddle.rect.collidepoint(self.small_ball_center) and self.small_ball_velocity[0] == self.four:
-            for i in range(0,2):
-                self.small_ball_velocity[i] = - self.small_ball_velocity[i]
+        start = self.small_ball.move_start
+        motion = [self.small_ball_center[i] - start[i] for i in range(0,2)]
+        # Makes the ball only bounce off the left paddle while moving left and off the right paddle while moving right
+        for paddle, direction in ((self.left_paddle, -1), (self.right_paddle, 1)):
+            if motion[0] * direction <= 0:
+                continue
+            t = sweep_circle_rect(start, motion, self.small_ball_radius, paddle.rect)
+            if t is not None:
+                self.bounce(start, motion, t)
+                return
+
+    def bounce(self, start, motion, t):
+        # Makes the ball bounce back from the point where it touched a paddle and use the rest of the step moving away
+        # - start and motion are the ball's position before the step and the distance it moved
+        # - t is the float fraction of the step at which the ball touched the paddle
+
+        speed = math.hypot(self.small_ball_velocity[0], self.small_ball_velocity[1])
+        factor = self.ball_speedup
+        if speed * factor > self.max_ball_speed:
+            factor = self.max_ball_speed / speed
+        for i in range(0,2):
+            self.small_ball_velocity[i] = - self.small_ball_velocity[i] * factor
+            self.small_ball_center[i] = start[i] + motion[i] * t + self.small_ball_velocity[i] * (1 - t)
         
             
     def score(self):
         # Tracks the socre of the left and right players 
         
-        if self.small_ball_center[0] >= self.surface.get_width() - self.small_ball_radius:
+        if self.small_ball_center[0] >= self.field_size[0] - self.small_ball_radius:
             self.left_score += 1        
         if self.small_ball_center[0] <= self.small_ball_radius:
             self.right_score += 1
@@ -187,23 +634,32 @@ class Game:
     def show_score(self):
         # Makes the score of the left and right player appear on the screen in their relative places
         
-        # Applies to both left and right score images
-        fontsize = 72
-        text_font = pygame.font.SysFont('', fontsize)
+        # Applies to both left and right score images; 72 on a field shown at its own size
+        fontsize = max(8, round(72 * self.view.scale))
+        left, top = self.view.point(0, 0)
+        right = self.view.point(self.field_size[0], 0)[0]
         
         # Specific to left score image 
         left_text_string = str(self.left_score)
-        left_text_image = text_font.render(left_text_string, True, self.fg_color, self.bg_color)
-        left_location = (0,0)   
+        left_text_image = self.text_cache.render(left_text_string, '', fontsize, self.fg_color, self.bg_color)
+        left_location = (left,top)   
         
         # Specific to right score image
         right_text_string = str(self.right_score)
-        right_text_image = text_font.render(right_text_string, True, self.fg_color, self.bg_color)
-        right_location = (self.surface.get_width()-right_text_image.get_width(),0)
+        right_text_image = self.text_cache.render(right_text_string, '', fontsize, self.fg_color, self.bg_color)
+        right_location = (right-right_text_image.get_width(),top)
         
+        # Clear the old scores, which may have been wider than the new ones
+        for rect in self.score_rects:
+            self.surface.fill(pygame.Color(self.bg_color), rect)
+            self.renderer.mark(rect)
+
         # Draw the score of the left and right player
-        self.surface.blit(left_text_image, left_location)  
-        self.surface.blit(right_text_image, right_location)
+        self.score_rects = [self.surface.blit(left_text_image, left_location),
+                            self.surface.blit(right_text_image, right_location)]
+        for rect in self.score_rects:
+            self.renderer.mark(rect)
+        self.shown_scores = (self.left_score, self.right_score)
 
     def decide_continue(self):
         # Check and remember if the game should continue
@@ -216,20 +672,42 @@ class Game:
 class Paddle:
     # An object in this class represents a Paddle that moves
 
-    def __init__(self,x,y,width,height,color,surface):
+    def __init__(self,x,y,width,height,color,surface,view=None):
         # - self is the Paddle object
-        # - x, y are the top left corner coordinates of the rectangle of type int
+        # - x, y are the top left corner coordinates of the rectangle of type int, in field coordinates
         # - width is the width of the rectangle of type int
         # - height is the height of the rectangle of type int
         # - surface is the pygame.Surface object on which the rectangle is drawn
+        # - view is the View from the field to the surface (the field is the whole surface when None)
 
         self.rect = pygame.Rect(x,y,width,height)
         self.color = pygame.Color(color)
         self.surface = surface
+        if view is None:
+            view = View(surface.get_size(), surface.get_size())
+        self.view = view
         self.vertical_velocity = 0  # paddle is not moving at the start
-    def draw(self):
+        self.previous_top = self.rect.top  # where the paddle was before the last physics step
+    def draw(self, alpha=1.0):
         # - self is the Paddle object to draw
-        pygame.draw.rect(self.surface,self.color,self.rect)
+        # - alpha is the float fraction of the way from the previous position to the current one (see get_rect)
+        pygame.draw.rect(self.surface,self.color,self.get_rect(alpha))
+    def get_rect(self, alpha=1.0):
+        # returns the area of the surface covered by the Paddle object, part of the way from its previous position
+        # - self is the Paddle object
+        # - alpha is the float fraction of the way from the previous position to the current one;
+        #   above 1 the paddle is drawn that far into the next step at its current velocity
+        rect = self.rect.copy()
+        if alpha > 1:
+            top = self.rect.top + self.vertical_velocity * (alpha - 1)
+            rect.top = round(min(max(top, 0), self.view.field_size[1] - rect.height))
+        else:
+            rect.top = round(self.previous_top + (self.rect.top - self.previous_top) * alpha)
+        return self.view.rect(rect)
+    def save_position(self):
+        # remembers the current position as the previous one before a physics step
+        # - self is the Paddle object
+        self.previous_top = self.rect.top
     def set_vertical_velocity(self,vertical_distance):
         # set the vertical velocity of the Paddle object
         # - self is the Paddle object
@@ -242,8 +720,8 @@ class Paddle:
         # Allows the movement of the rectangle
         self.rect.move_ip(0, self.vertical_velocity) 
         # Stops the paddle from going above the top of the window
-        if self.rect.bottom >= self.surface.get_height():
-            self.rect.bottom = self.surface.get_height()
+        if self.rect.bottom >= self.view.field_size[1]:
+            self.rect.bottom = self.view.field_size[1]
         # Stops the paddle from going below the bottom of the window
         elif self.rect.top  <= 0:
             self.rect.top = 0
@@ -251,12 +729,13 @@ class Paddle:
 class Ball:
     # An object in this class represents a Ball that moves
     
-    def __init__(self, ball_color, ball_radius, ball_center, ball_velocity, surface):
+    def __init__(self, ball_color, ball_radius, ball_center, ball_velocity, surface, view=None):
         # - self is the Ball object 
         # - ball_color is the color of the ball
-        # - ball_center is the x and y coordinates of the ball of type list
+        # - ball_center is the x and y coordinates of the ball of type list, in field coordinates
         # - ball_velocity is the velocity of the ball in x and y direction of type list
         # - surface is the pygame.Surface object on which the ball is drawn
+        # - view is the View from the field to the surface (the field is the whole surface when None)
         
         
         self.color = pygame.Color(ball_color)
@@ -264,12 +743,19 @@ class Ball:
         self.center = ball_center
         self.velocity = ball_velocity
         self.surface = surface
+        if view is None:
+            view = View(surface.get_size(), surface.get_size())
+        self.view = view
+        self.previous_center = list(ball_center)  # where the ball was before the last physics step
+        self.move_start = list(ball_center)  # where the ball was before its last move
     
     def move(self):
         # - moves the ball that is stays within the game window
         # - self is the Ball object
         
-        size = self.surface.get_size() # (500, 400)
+        size = self.view.field_size # (500, 400)
+        # Remember where the move starts so collisions can be checked along the whole path
+        self.move_start = list(self.center)
         
         # Moves the ball in both x and y direction
         for i in range(0,2):
@@ -284,8 +770,39 @@ class Ball:
                 # reached the maximum for this coordinate (right and bottom), bounce back
                 self.velocity[i] = - self.velocity[i] 
                 
-    def draw(self):
+    def draw(self, alpha=1.0):
         # - self is the Ball object to draw
-        pygame.draw.circle(self.surface, self.color, self.center, self.radius)
-        
-main()
+        # - alpha is the float fraction of the way from the previous position to the current one (see get_center)
+        pygame.draw.circle(self.surface, self.color, self.get_center(alpha), self.view.length(self.radius))
+
+    def get_center(self, alpha=1.0):
+        # returns the int center of the Ball object on the surface, part of the way from its previous position
+        # - self is the Ball object
+        # - alpha is the float fraction of the way from the previous position to the current one;
+        #   above 1 the ball is drawn that far into the next step at its current velocity, kept inside the field
+        if alpha > 1:
+            ahead = alpha - 1
+            size = self.view.field_size
+            x = min(max(self.center[0] + self.velocity[0] * ahead, self.radius), size[0] - self.radius)
+            y = min(max(self.center[1] + self.velocity[1] * ahead, self.radius), size[1] - self.radius)
+            return self.view.point(x, y)
+        previous = self.previous_center
+        return self.view.point(previous[0] + (self.center[0] - previous[0]) * alpha,
+                               previous[1] + (self.center[1] - previous[1]) * alpha)
+
+    def get_rect(self, alpha=1.0):
+        # returns the area covered by the Ball object, with a pixel of margin for rounding
+        # - self is the Ball object
+        # - alpha is the float fraction of the way from the previous position to the current one
+        center = self.get_center(alpha)
+        radius = self.view.length(self.radius)
+        size = 2 * radius + 2
+        return pygame.Rect(center[0] - radius - 1, center[1] - radius - 1, size, size)
+
+    def save_position(self):
+        # remembers the current position as the previous one before a physics step
+        # - self is the Ball object
+        self.previous_center[:] = self.center
+
+if __name__ == '__main__':
+    main()
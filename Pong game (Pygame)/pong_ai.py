@@ -0,0 +1,136 @@
+# Computer player for Pong by Hanisha Kovvuru
+# Moves a paddle to where the ball will reach it. Instead of running the game forward step by
+# step, the crossing point is worked out directly: Ball.move keeps moving the ball by its
+# velocity and turns it around on the first step it has gone past an edge, so along each axis
+# the ball only ever visits the points start + k * speed and turns at the first of those points
+# outside the window. Between those two turning points the motion repeats, so the position after
+# any number of steps is the unfolded position folded back with a modulo.
+#
+# The player sees the ball a few steps late (reaction_steps) and aims a random distance off the
+# crossing point (error, in pixels), picked again for every new shot; both set the difficulty.
+# pong_batch.BatchPaddleAI uses the same formulas on NumPy arrays for thousands of matches.
+
+import math
+import random
+from collections import deque
+
+# Difficulty presets: (reaction_steps, error)
+LEVELS = {'easy': (12, 40.0), 'normal': (6, 20.0), 'hard': (2, 6.0), 'perfect': (0, 0.0)}
+
+
+# User-defined functions
+
+def turning_points(start, speed, low, high):
+    # Return the (lower, upper) points where the ball turns around along one axis
+    # - start is the float position of the ball
+    # - speed is the float distance moved per step, more than 0
+    # - low and high are the float positions the ball's center may not go past
+    lower = start + speed * (math.ceil((low - start) / speed) - 1)
+    upper = start + speed * (math.floor((high - start) / speed) + 1)
+    return lower, upper
+
+
+def fold(start, velocity, steps, low, high):
+    # Return the position of the ball along one axis after a number of steps
+    # - start is the float position of the ball
+    # - velocity is the float velocity of the ball along the axis
+    # - steps is the int number of steps
+    # - low and high are the float positions the ball's center may not go past
+
+    speed = abs(velocity)
+    if speed == 0:
+        return start
+    lower, upper = turning_points(start, speed, low, high)
+    period = 2 * (upper - lower)
+    # The phase runs from lower up to upper and back down again
+    phase = start - lower if velocity > 0 else period - (start - lower)
+    phase = (phase + speed * steps) % period
+    if phase <= period / 2:
+        return lower + phase
+    return lower + period - phase
+
+
+def predict_crossing(center, velocity, line_x, direction, width, height, radius):
+    # Return (y, steps): where the ball's center will be when it next crosses a vertical line while
+    # moving in a direction, and the int number of steps until then. Paddles are not taken into account.
+    # Returns None if the ball does not move horizontally.
+    # - center and velocity are the (x, y) of the ball
+    # - line_x is the float x coordinate of the line
+    # - direction is 1 for crossing while moving right, -1 for crossing while moving left
+    # - width and height are the size of the playing field
+    # - radius is the radius of the ball
+
+    speed = abs(velocity[0])
+    if speed == 0:
+        return None
+    lower, upper = turning_points(center[0], speed, radius, width - radius)
+    period = 2 * (upper - lower)
+    phase = center[0] - lower if velocity[0] > 0 else period - (center[0] - lower)
+    line_phase = line_x - lower if direction > 0 else period - (line_x - lower)
+    steps = math.ceil(((line_phase - phase) % period) / speed)
+    return fold(center[1], velocity[1], steps, radius, height - radius), steps
+
+
+# User-defined classes
+
+class PaddleAI:
+    # An object in this class moves one paddle of a pong.Game towards where the ball will reach it.
+
+    def __init__(self, side, reaction_steps=6, error=20.0, rng=None):
+        # Initialize a PaddleAI.
+        # - self is the PaddleAI to initialize
+        # - side is 'left' or 'right', the paddle to move
+        # - reaction_steps is the int number of steps the player sees the ball late
+        # - error is the float standard deviation in pixels of where the player aims
+        # - rng is the random.Random used for the aim (the random module when None)
+
+        if side not in ('left', 'right'):
+            raise ValueError('side must be left or right, not %r' % side)
+        self.side = side
+        self.reaction_steps = reaction_steps
+        self.error = error
+        if rng is None:
+            rng = random
+        self.rng = rng
+        self.seen = deque(maxlen=reaction_steps + 1)  # (center, velocity) of the ball in the last steps
+        self.shot_direction = None  # sign of the horizontal velocity of the ball the aim is for
+        self.aim_offset = 0.0
+
+    def control(self, game):
+        # Set the velocity of the paddle for the next step
+        # - game is the pong.Game being played
+        ball = game.small_ball
+        self.seen.append((tuple(ball.center), tuple(ball.velocity)))
+        paddle = game.left_paddle if self.side == 'left' else game.right_paddle
+        target = self.get_target(game, paddle)
+        offset = target - paddle.rect.centery
+        if abs(offset) * 2 <= game.paddle_increment:
+            direction = 0
+        else:
+            direction = 1 if offset > 0 else -1
+        paddle.set_vertical_velocity(direction * game.paddle_increment)
+
+    def get_target(self, game, paddle):
+        # Return the float y coordinate the paddle should move its center to
+        # - game is the pong.Game being played
+        # - paddle is the Paddle moved by this player
+
+        # The player acts on the oldest state it remembers
+        center, velocity = self.seen[0]
+        direction = 1 if velocity[0] > 0 else -1
+        if direction != self.shot_direction:
+            # A new shot, with a new aiming error, starts whenever the horizontal direction of the ball flips:
+            # off a paddle or off the wall behind one. Bounces off the top and bottom walls keep the aim.
+            # BatchPaddleAI.actions draws a new error in exactly the same cases.
+            self.shot_direction = direction
+            self.aim_offset = self.rng.gauss(0, self.error) if self.error else 0.0
+        radius = game.small_ball_radius
+        if self.side == 'left':
+            crossing = predict_crossing(center, velocity, paddle.rect.right + radius, -1,
+                                        game.field_size[0], game.field_size[1], radius)
+        else:
+            crossing = predict_crossing(center, velocity, paddle.rect.left - radius, 1,
+                                        game.field_size[0], game.field_size[1], radius)
+        if crossing is None:
+            return center[1]
+        return crossing[0] + self.aim_offset
@@ -0,0 +1,343 @@
+# Batch Pong simulator by Hanisha Kovvuru
+# Steps many independent Pong matches at once. The ball and paddle state of every match is
+# kept in NumPy arrays and the rules of pong.py (Paddle.move, Ball.move, the swept paddle
+# collision of Game.collide, Game.score and Game.decide_continue) are applied to all matches
+# with masked array operations, so a step costs about the same whether there are ten matches or ten thousand.
+# Given the same starting state and paddle velocities, every match follows exactly the same
+# path as a single pong.Game. This is meant for training paddle controllers on many matches.
+#
+# Example: python pong_batch.py --matches 10000 --steps 1000
+
+import argparse
+import time
+import numpy as np
+
+from pong_ai import LEVELS
+
+# User-defined functions
+
+def main():
+    # Step a batch of matches with random paddle actions and report the speed
+    parser = argparse.ArgumentParser(description='Batch Pong simulator')
+    parser.add_argument('--matches', type=int, default=10000, help='number of matches stepped together')
+    parser.add_argument('--steps', type=int, default=1000, help='number of steps to run')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the ball spawns and the random actions')
+    parser.add_argument('--ai', nargs=2, metavar=('LEFT', 'RIGHT'),
+                        help='let computer players of these levels (easy, normal, hard, perfect) move the paddles')
+    args = parser.parse_args()
+
+    batch = BatchPong(args.matches, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    players = None
+    if args.ai:
+        players = [BatchPaddleAI(side, args.matches, *LEVELS[level], seed=args.seed + index)
+                   for index, (side, level) in enumerate(zip(('left', 'right'), args.ai))]
+    start = time.perf_counter()
+    for step in range(args.steps):
+        if players:
+            left_action = players[0].actions(batch)
+            right_action = players[1].actions(batch)
+        else:
+            left_action = rng.integers(-1, 2, args.matches)
+            right_action = rng.integers(-1, 2, args.matches)
+        batch.step(left_action, right_action)
+    elapsed = time.perf_counter() - start
+    print('%d matches x %d steps in %.2f s: %.0f match steps per second'
+          % (args.matches, args.steps, elapsed, args.matches * args.steps / elapsed))
+    print('finished matches: %d' % np.count_nonzero(~batch.continue_game))
+    if players:
+        print('mean score: left %.2f, right %.2f' % (batch.left_score.mean(), batch.right_score.mean()))
+
+
+def fold(start, velocity, steps, low, high):
+    # pong_ai.fold for arrays: the position along one axis after a number of steps
+    # - start, velocity and steps are arrays (or numbers) of the same shape
+    # - low and high are the positions the ball's center may not go past
+    speed = np.abs(velocity)
+    moving = speed != 0
+    speed = np.where(moving, speed, 1.0)
+    lower = start + speed * (np.ceil((low - start) / speed) - 1)
+    upper = start + speed * (np.floor((high - start) / speed) + 1)
+    period = 2 * (upper - lower)
+    phase = np.where(velocity > 0, start - lower, period - (start - lower))
+    phase = (phase + speed * steps) % period
+    position = np.where(phase <= period / 2, lower + phase, lower + period - phase)
+    return np.where(moving, position, start)
+
+
+def predict_crossings(center, velocity, line_x, direction, width, height, radius):
+    # pong_ai.predict_crossing for arrays.
+    # Returns (y, steps); y is the ball's y where the ball does not move horizontally.
+    # - center and velocity are (count, 2) arrays of the balls
+    # - line_x, direction, width, height and radius are as in pong_ai.predict_crossing
+    speed = np.abs(velocity[:, 0])
+    moving = speed != 0
+    speed = np.where(moving, speed, 1.0)
+    x = center[:, 0]
+    lower = x + speed * (np.ceil((radius - x) / speed) - 1)
+    upper = x + speed * (np.floor((width - radius - x) / speed) + 1)
+    period = 2 * (upper - lower)
+    phase = np.where(velocity[:, 0] > 0, x - lower, period - (x - lower))
+    line_phase = line_x - lower if direction > 0 else period - (line_x - lower)
+    steps = np.where(moving, np.ceil(((line_phase - phase) % period) / speed), 0)
+    return fold(center[:, 1], velocity[:, 1], steps, radius, height - radius), steps
+
+
+# User-defined classes
+
+class BatchPong:
+    # An object in this class holds the state of many Pong matches played side by side.
+
+    def __init__(self, count, width=500, height=400, seed=None):
+        # Initialize a BatchPong with every match at its starting position.
+        # - self is the BatchPong to initialize
+        # - count is the int number of matches
+        # - width and height are the int size of the playing field, as the window in pong.py
+        # - seed is the int seed of the ball spawn positions, or None
+
+        # The same values as pong.Game
+        self.count = count
+        self.width = width
+        self.height = height
+        self.paddle_increment = 15
+        self.left_paddle_x_coord = 125
+        self.right_paddle_x_coord = 375
+        self.paddle_width = 10
+        self.paddle_height = 50
+        self.ball_radius = 5
+        self.ball_speed = 4
+        self.ball_speedup = 1.0
+        self.max_ball_speed = 40
+        self.winning_score = 11
+        self.rng = np.random.default_rng(seed)
+
+        # Paddles only move vertically, so a paddle is its top y coordinate and its velocity
+        self.left_y = np.zeros(count, dtype=np.int64)
+        self.right_y = np.zeros(count, dtype=np.int64)
+        self.left_velocity = np.zeros(count, dtype=np.int64)
+        self.right_velocity = np.zeros(count, dtype=np.int64)
+        # Ball center and velocity, column 0 is x and column 1 is y.
+        # They become fractional once the ball bounces off a paddle part of the way through a step.
+        self.ball_center = np.zeros((count, 2))
+        self.ball_velocity = np.zeros((count, 2))
+        self.move_start = np.zeros((count, 2))
+        self.left_score = np.zeros(count, dtype=np.int64)
+        self.right_score = np.zeros(count, dtype=np.int64)
+        self.continue_game = np.ones(count, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        # Put matches back to their starting position with a new random ball position
+        # - mask is a boolean array selecting the matches to reset, or None for all of them
+
+        if mask is None:
+            mask = np.ones(self.count, dtype=bool)
+        number = int(np.count_nonzero(mask))
+        self.left_y[mask] = self.height // 2
+        self.right_y[mask] = self.height // 2
+        self.left_velocity[mask] = 0
+        self.right_velocity[mask] = 0
+        # Same ranges as random.randint in pong.Game, which includes both ends
+        self.ball_center[mask, 0] = self.rng.integers(self.left_paddle_x_coord, self.right_paddle_x_coord + 1, number)
+        self.ball_center[mask, 1] = self.rng.integers(self.ball_radius, self.height - self.ball_radius + 1, number)
+        self.ball_velocity[mask] = (self.ball_speed, 1)
+        self.left_score[mask] = 0
+        self.right_score[mask] = 0
+        self.continue_game[mask] = True
+
+    def set_actions(self, left_action=None, right_action=None):
+        # Set the paddle velocities the way holding the keys does in pong.Game
+        # - left_action and right_action are arrays (or single ints) of -1 (up), 0 (stop) or 1 (down),
+        #   or None to leave the paddles as they are
+        if left_action is not None:
+            self.left_velocity[:] = np.asarray(left_action) * self.paddle_increment
+        if right_action is not None:
+            self.right_velocity[:] = np.asarray(right_action) * self.paddle_increment
+
+    def step(self, left_action=None, right_action=None):
+        # Advance every unfinished match by one frame and return the points scored in it
+        # - left_action and right_action are as in set_actions
+        # Returns (left_points, right_points), int arrays of the points each player got this step
+
+        self.set_actions(left_action, right_action)
+        active = self.continue_game
+        self.move_paddles(active)
+        self.move_ball(active)
+        self.collide(active)
+        left_points, right_points = self.score(active)
+        # Game.decide_continue: a match stops once a player reaches 11 points
+        self.continue_game &= (self.left_score < self.winning_score) & (self.right_score < self.winning_score)
+        return left_points, right_points
+
+    def move_paddles(self, active):
+        # Paddle.move for both paddles: move, then keep the paddle inside the window
+        for paddle_y, velocity in ((self.left_y, self.left_velocity), (self.right_y, self.right_velocity)):
+            moved = paddle_y + velocity
+            # The bottom check comes first, as in Paddle.move
+            moved = np.where(moved + self.paddle_height >= self.height, self.height - self.paddle_height,
+                             np.where(moved <= 0, 0, moved))
+            paddle_y[active] = moved[active]
+
+    def move_ball(self, active):
+        # Ball.move: move, then bounce off an edge the ball has gone past
+        center = self.ball_center
+        velocity = self.ball_velocity
+        self.move_start[:] = center
+        center[active] += velocity[active]
+        size = np.array((self.width, self.height))
+        # Both checks use the moved center, and each one reverses the velocity on its own
+        low = (center < self.ball_radius) & active[:, None]
+        velocity[low] = -velocity[low]
+        high = (center + self.ball_radius > size) & active[:, None]
+        velocity[high] = -velocity[high]
+
+    def collide(self, active):
+        # Game.collide: sweep the ball along its move and bounce it off a paddle it is moving towards
+        start = self.move_start
+        motion = self.ball_center - start
+        unchecked = active.copy()
+        for paddle_x, paddle_y, direction in ((self.left_paddle_x_coord, self.left_y, -1),
+                                              (self.right_paddle_x_coord, self.right_y, 1)):
+            t, touched = self.sweep(start, motion, paddle_x, paddle_y)
+            hit = unchecked & touched & (motion[:, 0] * direction > 0)
+            self.bounce(start, motion, t, hit)
+            # As in Game.collide, a ball that bounced off the left paddle is not tested against the right one
+            unchecked &= ~hit
+
+    def sweep(self, start, motion, paddle_x, paddle_y):
+        # sweep_circle_rect from pong.py for every match at once.
+        # Returns (t, touched): the float time of impact and a boolean array of the matches that touch the paddle.
+        radius = self.ball_radius
+        t_enter = np.full(self.count, -np.inf)
+        t_exit = np.full(self.count, np.inf)
+        missed = np.zeros(self.count, dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for low, high, axis in ((paddle_x - radius, paddle_x + self.paddle_width + radius, 0),
+                                    (paddle_y - radius, paddle_y + self.paddle_height + radius, 1)):
+                position = start[:, axis]
+                distance = motion[:, axis]
+                still = distance == 0
+                missed |= still & ((position < low) | (position > high))
+                t_low = (low - position) / distance
+                t_high = (high - position) / distance
+                t_enter = np.where(still, t_enter, np.maximum(t_enter, np.minimum(t_low, t_high)))
+                t_exit = np.where(still, t_exit, np.minimum(t_exit, np.maximum(t_low, t_high)))
+            missed |= (t_enter > t_exit) | (t_exit < 0) | (t_enter > 1)
+            t = np.maximum(t_enter, 0.0)
+
+            # Outside both edge ranges of the paddle the ball can only touch the rounded corner
+            left = paddle_x
+            right = paddle_x + self.paddle_width
+            top = paddle_y
+            bottom = paddle_y + self.paddle_height
+            x = start[:, 0] + motion[:, 0] * t
+            y = start[:, 1] + motion[:, 1] * t
+            at_corner = ((x < left) | (x > right)) & ((y < top) | (y > bottom))
+            offset_x = start[:, 0] - np.where(x < left, left, right)
+            offset_y = start[:, 1] - np.where(y < top, top, bottom)
+            c = offset_x * offset_x + offset_y * offset_y - radius * radius
+            a = motion[:, 0] * motion[:, 0] + motion[:, 1] * motion[:, 1]
+            b = 2 * (offset_x * motion[:, 0] + offset_y * motion[:, 1])
+            discriminant = b * b - 4 * a * c
+            t_corner = (-b - np.sqrt(np.maximum(discriminant, 0))) / (2 * a)
+            touching = c <= 0
+            corner_hit = touching | ((a != 0) & (discriminant >= 0) & (t_corner >= 0) & (t_corner <= 1))
+            t = np.where(at_corner, np.where(touching, 0.0, t_corner), t)
+            missed |= at_corner & ~corner_hit
+        return t, ~missed
+
+    def bounce(self, start, motion, t, hit):
+        # Game.bounce for the matches selected by hit
+        velocity = self.ball_velocity[hit]
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        factor = np.where(speed * self.ball_speedup > self.max_ball_speed, self.max_ball_speed / speed, self.ball_speedup)
+        velocity = -velocity * factor[:, None]
+        t = t[hit][:, None]
+        self.ball_velocity[hit] = velocity
+        self.ball_center[hit] = start[hit] + motion[hit] * t + velocity * (1 - t)
+
+    def score(self, active):
+        # Game.score: a player gets a point while the ball touches the opposite edge
+        x = self.ball_center[:, 0]
+        left_points = (active & (x >= self.width - self.ball_radius)).astype(np.int64)
+        right_points = (active & (x <= self.ball_radius)).astype(np.int64)
+        self.left_score += left_points
+        self.right_score += right_points
+        return left_points, right_points
+
+    def load_game(self, index, game):
+        # Copy the state of a single pong.Game into one match of the batch
+        # - index is the int number of the match
+        # - game is the pong.Game to copy
+        self.left_y[index] = game.left_paddle.rect.top
+        self.right_y[index] = game.right_paddle.rect.top
+        self.left_velocity[index] = game.left_paddle.vertical_velocity
+        self.right_velocity[index] = game.right_paddle.vertical_velocity
+        self.ball_center[index] = game.small_ball.center
+        self.ball_velocity[index] = game.small_ball.velocity
+        self.left_score[index] = game.left_score
+        self.right_score[index] = game.right_score
+        self.continue_game[index] = game.continue_game
+
+
+class BatchPaddleAI:
+    # An object in this class is pong_ai.PaddleAI for one paddle of every match of a BatchPong.
+
+    def __init__(self, side, count, reaction_steps=6, error=20.0, seed=None):
+        # Initialize a BatchPaddleAI.
+        # - self is the BatchPaddleAI to initialize
+        # - side is 'left' or 'right', the paddle to move
+        # - count is the int number of matches
+        # - reaction_steps is the int number of steps the players see the ball late
+        # - error is the float standard deviation in pixels of where the players aim
+        # - seed is the int seed of the aiming errors, or None
+
+        if side not in ('left', 'right'):
+            raise ValueError('side must be left or right, not %r' % side)
+        self.side = side
+        self.reaction_steps = reaction_steps
+        self.error = error
+        self.rng = np.random.default_rng(seed)
+        # The ball (x, y, velocity x, velocity y) of the last reaction_steps + 1 steps, used as a ring
+        self.seen = None
+        self.seen_count = 0
+        self.shot_direction = np.zeros(count)  # sign of the horizontal ball velocity each aim is for, 0 before the first
+        self.aim_offset = np.zeros(count)
+
+    def actions(self, batch):
+        # Return the int array of actions (-1 up, 0 stop, 1 down) for the paddles of every match
+        # - batch is the BatchPong being played
+
+        state = np.concatenate((batch.ball_center, batch.ball_velocity), axis=1)
+        if self.seen is None:
+            self.seen = np.repeat(state[None], self.reaction_steps + 1, axis=0)
+        self.seen[self.seen_count % len(self.seen)] = state
+        self.seen_count += 1
+        # The oldest remembered state, as the deque of PaddleAI; the ring starts filled with the first state
+        oldest = self.seen[self.seen_count % len(self.seen)]
+        center = oldest[:, :2]
+        velocity = oldest[:, 2:]
+
+        # As in PaddleAI.get_target, a new shot starts whenever the horizontal direction of the ball flips
+        # (off a paddle or off the wall behind one); bounces off the top and bottom walls keep the aim
+        direction = np.where(velocity[:, 0] > 0, 1.0, -1.0)
+        new_shot = direction != self.shot_direction
+        self.shot_direction[new_shot] = direction[new_shot]
+        if self.error:
+            self.aim_offset[new_shot] = self.rng.normal(0, self.error, np.count_nonzero(new_shot))
+
+        radius = batch.ball_radius
+        if self.side == 'left':
+            paddle_y = batch.left_y
+            y, steps = predict_crossings(center, velocity, batch.left_paddle_x_coord + batch.paddle_width + radius, -1,
+                                         batch.width, batch.height, radius)
+        else:
+            paddle_y = batch.right_y
+            y, steps = predict_crossings(center, velocity, batch.right_paddle_x_coord - radius, 1,
+                                         batch.width, batch.height, radius)
+        offset = y + self.aim_offset - (paddle_y + batch.paddle_height // 2)
+        return np.where(np.abs(offset) * 2 <= batch.paddle_increment, 0, np.sign(offset)).astype(np.int64)
+
+
+if __name__ == '__main__':
+    main()
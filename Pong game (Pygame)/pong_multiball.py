@@ -0,0 +1,336 @@
+# Multi-ball Pong by Hanisha Kovvuru
+# A stress mode of pong.py with hundreds or thousands of balls on the field at once.
+# One Ball object per ball, moved one at a time and tested against every other ball, slows down
+# with the square of the number of balls. Here the balls are kept as NumPy arrays (one array of
+# centers, one of velocities) and moved all at once. Balls are sorted into a grid of cells as
+# big as a ball, so a ball is only tested against the balls in its own and the neighbouring
+# cells, and the paddles only against the balls in the cells they cover. All balls are drawn
+# with a single Surface.blits call of one pre-drawn ball image.
+#
+# Example: python pong_multiball.py --balls 2000 --profile
+#          python pong_multiball.py --balls 2000 --headless --steps 600
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pygame
+import pong
+from pygame_common.startup import init_pygame
+
+
+# User-defined functions
+
+def main():
+    parser = argparse.ArgumentParser(description='Pong with many balls')
+    parser.add_argument('--balls', type=int, default=1000, help='number of balls')
+    parser.add_argument('--radius', type=int, default=3, help='radius of every ball')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the ball positions and velocities')
+    parser.add_argument('--fps', type=int, default=60, help='highest number of frames drawn per second (0 for no limit)')
+    parser.add_argument('--profile', action='store_true', help='show frame timings on screen')
+    parser.add_argument('--headless', action='store_true', help='run without a window and report the time per step and frame')
+    parser.add_argument('--steps', type=int, default=600, help='with --headless, number of steps to run')
+    parser.add_argument('--resizable', action='store_true', help='let the window be resized; the field is scaled to fit')
+    parser.add_argument('--fullscreen', action='store_true', help='play fullscreen at the resolution of the desktop')
+    parser.add_argument('--capture', help='with --headless, write every step as a frame to this video file (through ffmpeg) '
+                                          'or to numbered PNG files if it ends in .png')
+    args = parser.parse_args()
+    if args.capture:
+        from pygame_common.capture import get_encoder_error
+        # Find out now, not when the first frame is written, that the video cannot be made
+        encoder_error = get_encoder_error(args.capture)
+        if encoder_error is not None:
+            parser.error(encoder_error)
+
+    if args.headless:
+        # No window is shown, but the frames are still drawn and pushed to a display
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    init_pygame()
+    if args.fullscreen and not args.headless:
+        surface = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    elif args.resizable:
+        surface = pygame.display.set_mode(pong.FIELD_SIZE, pygame.RESIZABLE)
+    else:
+        surface = pygame.display.set_mode(pong.FIELD_SIZE)
+    if args.headless:
+        game = MultiBallGame(surface, args.balls, args.radius, seed=args.seed, field_size=pong.FIELD_SIZE)
+        start = time.perf_counter()
+        for step in range(args.steps):
+            game.step()
+        step_time = (time.perf_counter() - start) / args.steps
+        start = time.perf_counter()
+        for step in range(args.steps):
+            game.draw()
+        draw_time = (time.perf_counter() - start) / args.steps
+        print('%d balls: %.2f ms per step, %.2f ms per frame drawn, %d ball pairs touching in the last step'
+              % (args.balls, step_time * 1000, draw_time * 1000, game.contacts))
+        if args.capture:
+            from pygame_common.capture import FrameCapture
+            game.capture = FrameCapture(args.capture, surface, game.physics_rate)
+            start = time.perf_counter()
+            for step in range(args.steps):
+                game.step()
+                game.draw()
+            game.capture.close()
+            elapsed = time.perf_counter() - start
+            print('captured %d frames in %.2f s, %.1f times real time'
+                  % (game.capture.frames, elapsed, args.steps / game.physics_rate / elapsed))
+        pygame.quit()
+        return
+
+    pygame.display.set_caption('Pong (%d balls)' % args.balls)
+    game = MultiBallGame(surface, args.balls, args.radius, seed=args.seed, field_size=pong.FIELD_SIZE)
+    game.FPS = args.fps
+    if args.profile:
+        game.start_profiling()
+    game.play()
+    pygame.quit()
+
+
+# User-defined classes
+
+class BallArray:
+    # An object in this class holds many balls of the same radius as arrays.
+
+    def __init__(self, count, radius, width, height, rng):
+        # Initialize a BallArray with balls at random positions, moving in random directions.
+        # - self is the BallArray to initialize
+        # - count is the int number of balls
+        # - radius is the int radius of every ball
+        # - width and height are the int size of the field
+        # - rng is the numpy.random.Generator used to place the balls
+
+        self.count = count
+        self.radius = radius
+        self.width = width
+        self.height = height
+        self.center = np.column_stack((rng.uniform(radius, width - radius, count),
+                                       rng.uniform(radius, height - radius, count)))
+        angle = rng.uniform(0, 2 * np.pi, count)
+        self.max_speed = 5
+        speed = rng.uniform(2, self.max_speed, count)
+        self.velocity = np.column_stack((np.cos(angle) * speed, np.sin(angle) * speed))
+        self.previous_center = self.center.copy()  # where the balls were before the last step
+
+        # The grid the balls are sorted into; a cell is as wide as a ball
+        self.cell_size = 2 * radius
+        self.columns = width // self.cell_size + 1
+        self.rows = height // self.cell_size + 1
+
+    def save_position(self):
+        # Remember the current positions as the previous ones before a physics step
+        self.previous_center[:] = self.center
+
+    def move(self):
+        # Ball.move for every ball: move, then turn around a ball that has gone past an edge
+        center = self.center
+        velocity = self.velocity
+        center += velocity
+        size = np.array((self.width, self.height))
+        low = center < self.radius
+        velocity[low] = -velocity[low]
+        high = center + self.radius > size
+        velocity[high] = -velocity[high]
+
+    def get_cells(self):
+        # Return (cell x, cell y, order, first, counts): the grid cell of every ball, the balls sorted by
+        # cell, and for every cell the position of its first ball in that order and its number of balls
+        cell_x = np.clip((self.center[:, 0] // self.cell_size).astype(np.int64), 0, self.columns - 1)
+        cell_y = np.clip((self.center[:, 1] // self.cell_size).astype(np.int64), 0, self.rows - 1)
+        cell = cell_y * self.columns + cell_x
+        order = np.argsort(cell, kind='stable')
+        counts = np.bincount(cell, minlength=self.columns * self.rows)
+        first = np.cumsum(counts) - counts
+        return cell_x, cell_y, order, first, counts
+
+    def find_pairs(self, cells):
+        # Return (i, j): int arrays of the pairs of balls in the same or neighbouring cells, each pair once
+        # - cells is the tuple returned by get_cells
+
+        cell_x, cell_y, order, first, counts = cells
+        every_ball = np.arange(self.count)
+        pairs_i = []
+        pairs_j = []
+        # Half of the neighbours, so that every pair of cells is visited once
+        for offset_x, offset_y in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+            neighbour_x = cell_x + offset_x
+            neighbour_y = cell_y + offset_y
+            inside = (neighbour_x >= 0) & (neighbour_x < self.columns) & (neighbour_y < self.rows)
+            neighbour = np.where(inside, neighbour_y * self.columns + neighbour_x, 0)
+            number = np.where(inside, counts[neighbour], 0)
+            total = int(number.sum())
+            if total == 0:
+                continue
+            # Every ball is paired with each ball of the neighbouring cell
+            i = np.repeat(every_ball, number)
+            rank = np.arange(total) - np.repeat(np.cumsum(number) - number, number)
+            j = order[np.repeat(first[neighbour], number) + rank]
+            if offset_x == 0 and offset_y == 0:
+                keep = i < j
+                i = i[keep]
+                j = j[keep]
+            pairs_i.append(i)
+            pairs_j.append(j)
+        if not pairs_i:
+            return every_ball[:0], every_ball[:0]
+        return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+    def collide_balls(self, cells):
+        # Bounce the balls that touch off each other like equal billiard balls and return the number of touching pairs
+        # - cells is the tuple returned by get_cells
+
+        i, j = self.find_pairs(cells)
+        offset = self.center[j] - self.center[i]
+        distance_squared = np.einsum('ij,ij->i', offset, offset)
+        touching = (distance_squared < (2 * self.radius) ** 2) & (distance_squared > 0)
+        i = i[touching]
+        j = j[touching]
+        offset = offset[touching]
+        distance = np.sqrt(distance_squared[touching])
+        normal = offset / distance[:, None]
+        closing = np.einsum('ij,ij->i', self.velocity[i] - self.velocity[j], normal)
+        # Only balls moving towards each other exchange the part of their velocity along the line between them
+        approaching = closing > 0
+        impulse = normal[approaching] * closing[approaching][:, None]
+        np.add.at(self.velocity, i[approaching], -impulse)
+        np.add.at(self.velocity, j[approaching], impulse)
+        # Push the balls apart so they do not stay stuck inside each other
+        push = normal * ((2 * self.radius - distance) / 2)[:, None]
+        np.add.at(self.center, i, -push)
+        np.add.at(self.center, j, push)
+        # A ball hit from several sides in one step gets every impulse at once, which can add
+        # energy in crowded areas, and pushes can move a ball out of the field; both are undone
+        speed = np.hypot(self.velocity[:, 0], self.velocity[:, 1])
+        too_fast = speed > self.max_speed
+        self.velocity[too_fast] *= (self.max_speed / speed[too_fast])[:, None]
+        np.clip(self.center[:, 0], 0, self.width, out=self.center[:, 0])
+        np.clip(self.center[:, 1], 0, self.height, out=self.center[:, 1])
+        return len(i)
+
+    def collide_rect(self, rect, cells):
+        # Bounce the balls that touch a rectangle back the way they came horizontally
+        # - rect is the pygame.Rect of a paddle
+        # - cells is the tuple returned by get_cells
+
+        cell_x, cell_y, order, first, counts = cells
+        # Only the balls in the cells the rectangle (grown by a ball) covers are tested
+        left = max(0, (rect.left - self.radius) // self.cell_size)
+        right = min(self.columns - 1, (rect.right + self.radius) // self.cell_size)
+        top = max(0, (rect.top - self.radius) // self.cell_size)
+        bottom = min(self.rows - 1, (rect.bottom + self.radius) // self.cell_size)
+        if left > right or top > bottom:
+            return
+        grid_cells = (np.arange(top, bottom + 1)[:, None] * self.columns + np.arange(left, right + 1)).ravel()
+        number = counts[grid_cells]
+        total = int(number.sum())
+        if total == 0:
+            return
+        rank = np.arange(total) - np.repeat(np.cumsum(number) - number, number)
+        balls = order[np.repeat(first[grid_cells], number) + rank]
+
+        center = self.center[balls]
+        nearest_x = np.clip(center[:, 0], rect.left, rect.right)
+        nearest_y = np.clip(center[:, 1], rect.top, rect.bottom)
+        touching = (center[:, 0] - nearest_x) ** 2 + (center[:, 1] - nearest_y) ** 2 <= self.radius ** 2
+        # A ball bounces off the side of the paddle it is on when it moves towards the paddle
+        on_left = center[:, 0] < rect.centerx
+        towards = np.where(on_left, self.velocity[balls, 0] > 0, self.velocity[balls, 0] < 0)
+        hit = balls[touching & towards]
+        on_left = on_left[touching & towards]
+        self.velocity[hit, 0] = -self.velocity[hit, 0]
+        self.center[hit, 0] = np.where(on_left, rect.left - self.radius, rect.right + self.radius)
+
+
+class MultiBallGame(pong.Game):
+    # An object in this class is a Pong game played with many balls at once.
+    # The paddles, keys, scores and frame loop are those of pong.Game.
+
+    def __init__(self, surface, balls=1000, radius=3, text_cache=None, seed=None, field_size=None):
+        # Initialize a MultiBallGame.
+        # - self is the MultiBallGame to initialize
+        # - surface is the display window surface object
+        # - balls is the int number of balls
+        # - radius is the int radius of every ball
+        # - text_cache is an optional TextCache to share fonts and rendered text with other games
+        # - seed is the int seed of the ball positions and velocities, or None
+        # - field_size is the (width, height) of the playing field, as in pong.Game
+
+        pong.Game.__init__(self, surface, text_cache, field_size=field_size)
+        self.balls = BallArray(balls, radius, self.field_size[0], self.field_size[1], np.random.default_rng(seed))
+        self.contacts = 0
+        self.make_ball_image()
+
+    def make_ball_image(self):
+        # Draw the picture every ball is drawn with, at the size the view shows the balls
+        # - self is the MultiBallGame
+        radius = self.view.length(self.balls.radius)
+        self.ball_image = pygame.Surface((2 * radius + 1, 2 * radius + 1))
+        self.ball_image.fill(pygame.Color(self.bg_color))
+        self.ball_image.set_colorkey(pygame.Color(self.bg_color))
+        pygame.draw.circle(self.ball_image, pygame.Color(self.fg_color), (radius, radius), radius)
+
+    def resize(self, surface):
+        # Game.resize, also drawing the ball picture again at the new scale
+        pong.Game.resize(self, surface)
+        self.make_ball_image()
+
+    def step(self):
+        # Run one fixed physics step for the paddles and every ball.
+        # - self is the MultiBallGame to step
+        self.left_paddle.save_position()
+        self.right_paddle.save_position()
+        self.balls.save_position()
+        self.update()
+        self.steps = self.steps + 1
+
+    def update(self):
+        # Move the paddles and balls, bounce the balls off each other and the paddles and count the points.
+        # - self is the MultiBallGame to update
+        self.left_paddle.move()
+        self.right_paddle.move()
+        balls = self.balls
+        balls.move()
+        cells = balls.get_cells()
+        self.contacts = balls.collide_balls(cells)
+        balls.collide_rect(self.left_paddle.rect, cells)
+        balls.collide_rect(self.right_paddle.rect, cells)
+        self.score()
+
+    def score(self):
+        # Game.score for every ball
+        x = self.balls.center[:, 0]
+        self.left_score += int(np.count_nonzero(x >= self.field_size[0] - self.balls.radius))
+        self.right_score += int(np.count_nonzero(x <= self.balls.radius))
+
+    def decide_continue(self):
+        # A stress test never ends on points; only the close box stops it
+        pass
+
+    def draw(self, alpha=1.0):
+        # Draw the whole field. With this many balls nearly every part of the window changes,
+        # so the window is redrawn and pushed to the display as a whole.
+        # - self is the MultiBallGame to draw
+        # - alpha is the float fraction of the way from the previous physics step to the last one
+
+        if not self.view.identity:
+            self.surface.fill(pygame.Color(self.bar_color))
+        self.surface.fill(pygame.Color(self.bg_color), self.view.field_rect)
+        self.score_rects = []
+        self.show_score()
+        self.left_paddle.draw(alpha)
+        self.right_paddle.draw(alpha)
+        balls = self.balls
+        view = self.view
+        centers = balls.previous_center + (balls.center - balls.previous_center) * alpha
+        corners = centers * view.scale + (view.offset_x, view.offset_y) - view.length(balls.radius)
+        image = self.ball_image
+        self.surface.blits([(image, position) for position in np.rint(corners).astype(np.int64).tolist()], False)
+        self.renderer.mark_all()
+        self.renderer.flush()
+        if self.capture is not None:
+            self.capture.capture(self.surface, (self.steps - 1 + alpha) / self.physics_rate)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,640 @@
+# Networked Pong by Hanisha Kovvuru
+# Two players on two computers (or two windows) play one Pong match over UDP.
+# The host runs the real match: it moves the left paddle from its own keyboard and the right
+# paddle from the inputs the client sends. The client runs a copy of the match ahead of the
+# host so its own paddle answers the keys at once (client-side prediction). Whenever a
+# snapshot of the host's match arrives that does not agree with what the client predicted
+# for that step, the client goes back to the snapshot and runs the steps since then again
+# with its own inputs (rollback). Snapshots only carry the fields that changed since the last
+# snapshot the client confirmed (delta compression).
+#
+# Both sides can hold back their packets and drop some of them, to try the game at a given
+# round trip time and packet loss without a real network.
+#
+# Example: python pong_net.py host --port 5005
+#          python pong_net.py client --address 127.0.0.1 --port 5005 --latency 50 --loss 0.02
+#          python pong_net.py loopback --rtt 150 --loss 0.05   (both sides headless, with scripted players)
+
+import argparse
+import heapq
+import itertools
+import math
+import random
+import socket
+import struct
+import time
+
+import pygame
+import pong
+from pygame_common.startup import init_pygame
+from pygame_common.timers import VirtualClock
+
+# Packet types
+HELLO = 1  # client -> host: please send me the match
+INPUT = 2  # client -> host: newest snapshot step seen, first input step, count, inputs
+SNAPSHOT = 3  # host -> client: step, base step, newest input step seen, field mask, changed fields
+
+INPUT_HEADER = struct.Struct('<BIIB')
+SNAPSHOT_HEADER = struct.Struct('<BIIIH')
+NO_STEP = 0xFFFFFFFF  # a base step meaning that every field is sent
+
+# The state of a match as sent in snapshots, in the order of get_state
+FIELDS = [('left_top', 'h'), ('left_velocity', 'b'), ('right_top', 'h'), ('right_velocity', 'b'),
+          ('ball_x', 'd'), ('ball_y', 'd'), ('ball_velocity_x', 'd'), ('ball_velocity_y', 'd'),
+          ('left_score', 'B'), ('right_score', 'B'), ('continue_game', 'B')]
+FIELD_FORMATS = [struct.Struct('<' + code) for name, code in FIELDS]
+
+MAX_INPUTS = 64  # most inputs sent in one packet
+HISTORY = 128  # steps of snapshots and predictions kept by either side
+
+
+# User-defined functions
+
+def main():
+    parser = argparse.ArgumentParser(description='Pong over UDP')
+    parser.add_argument('mode', choices=['host', 'client', 'loopback'], help='which side to run')
+    parser.add_argument('--address', default='127.0.0.1', help='address of the host (client) or to listen on (host)')
+    parser.add_argument('--port', type=int, default=5005, help='UDP port of the host')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds to hold back every packet sent')
+    parser.add_argument('--jitter', type=float, default=0, help='up to this many more milliseconds of random delay')
+    parser.add_argument('--loss', type=float, default=0.0, help='fraction of packets sent that are dropped')
+    parser.add_argument('--input-delay', type=int, default=0,
+                        help='physics steps the client waits before using its own input (fewer corrections, slower paddle)')
+    parser.add_argument('--snapshot-interval', type=int, default=1, help='physics steps between two snapshots')
+    parser.add_argument('--rtt', type=float, default=100, help='loopback: round trip time in milliseconds')
+    parser.add_argument('--steps', type=int, default=3600, help='loopback: number of host steps to run')
+    parser.add_argument('--seed', type=int, default=0, help='loopback: seed of the match and of the packet loss')
+    args = parser.parse_args()
+
+    if args.mode == 'loopback':
+        report(run_loopback(args.steps, args.rtt, args.jitter, args.loss, args.input_delay,
+                            args.snapshot_interval, args.seed))
+        return
+
+    init_pygame()
+    surface = pygame.display.set_mode((500, 400))
+    if args.mode == 'host':
+        pygame.display.set_caption('Pong (host)')
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp.bind((args.address, args.port))
+        link = LossyLink(udp, args.latency, args.jitter, args.loss)
+        session = Host(pong.Game(surface), link, args.snapshot_interval)
+        play(session, pygame.K_q, pygame.K_a)
+    else:
+        pygame.display.set_caption('Pong (client)')
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp.bind(('', 0))
+        link = LossyLink(udp, args.latency, args.jitter, args.loss)
+        session = Client(pong.Game(surface), link, (args.address, args.port), args.input_delay)
+        play(session, pygame.K_p, pygame.K_l)
+    pygame.quit()
+
+
+def play(session, up_key, down_key):
+    # Play a networked match in the window until the player presses the close box.
+    # The frame loop is the one of pong.Game.play, with the steps run by the session.
+    # - session is the Host or Client
+    # - up_key and down_key are the pygame keys that move the player's paddle
+
+    game = session.game
+    direction = 0
+    accumulator = 0.0
+    previous_time = time.perf_counter()
+    while not game.close_clicked:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.close_clicked = True
+            elif event.type == pygame.VIDEOEXPOSE:
+                game.renderer.mark_all()
+            # The same keys as the local game: pressing one moves the paddle, releasing either stops it
+            elif event.type == pygame.KEYDOWN and event.key in (up_key, down_key):
+                direction = -1 if event.key == up_key else 1
+            elif event.type == pygame.KEYUP and event.key in (up_key, down_key):
+                direction = 0
+        session.receive()
+
+        step_time = 1 / game.physics_rate
+        now = time.perf_counter()
+        accumulator = accumulator + now - previous_time
+        previous_time = now
+        steps = 0
+        while accumulator >= step_time and steps < game.max_steps_per_frame:
+            accumulator = accumulator - step_time
+            steps = steps + 1
+        if accumulator >= step_time:
+            accumulator = accumulator % step_time
+        for count in range(session.steps_to_run(steps)):
+            session.step(direction)
+
+        game.draw(accumulator / step_time)
+        game.game_Clock.tick(game.FPS)
+
+
+def get_state(game):
+    # Return the state of a match as a tuple in the order of FIELDS
+    # - game is the pong.Game
+    ball = game.small_ball
+    return (game.left_paddle.rect.top, game.left_paddle.vertical_velocity,
+            game.right_paddle.rect.top, game.right_paddle.vertical_velocity,
+            float(ball.center[0]), float(ball.center[1]), float(ball.velocity[0]), float(ball.velocity[1]),
+            game.left_score, game.right_score, int(game.continue_game))
+
+
+def set_state(game, step, state):
+    # Put a match in a state returned by get_state
+    # - game is the pong.Game to change
+    # - step is the int number of physics steps the state was taken after
+    # - state is the tuple of field values
+
+    (left_top, left_velocity, right_top, right_velocity, ball_x, ball_y, velocity_x, velocity_y,
+     left_score, right_score, continue_game) = state
+    game.left_paddle.rect.top = left_top
+    game.left_paddle.vertical_velocity = left_velocity
+    game.right_paddle.rect.top = right_top
+    game.right_paddle.vertical_velocity = right_velocity
+    # The game keeps references to the ball's lists, so they are changed in place
+    game.small_ball.center[:] = [ball_x, ball_y]
+    game.small_ball.velocity[:] = [velocity_x, velocity_y]
+    game.left_score = left_score
+    game.right_score = right_score
+    game.continue_game = bool(continue_game)
+    game.steps = step
+    # Frames drawn before the next step start from the new state, not from where the objects were before it
+    game.left_paddle.save_position()
+    game.right_paddle.save_position()
+    game.small_ball.save_position()
+
+
+def encode_snapshot(step, state, base_step, base_state, input_step):
+    # Return the bytes of a snapshot holding only the fields that differ from a base snapshot
+    # - step is the int step of the snapshot
+    # - state is the tuple of field values
+    # - base_step is the int step of a snapshot the client has, or NO_STEP to send every field
+    # - base_state is the tuple of field values of the base snapshot, or None
+    # - input_step is the int newest client input step the host has received, or NO_STEP
+
+    mask = 0
+    fields = bytearray()
+    for index, value in enumerate(state):
+        if base_state is None or base_state[index] != value:
+            mask |= 1 << index
+            fields += FIELD_FORMATS[index].pack(value)
+    return SNAPSHOT_HEADER.pack(SNAPSHOT, step, base_step, input_step, mask) + fields
+
+
+def decode_snapshot(data, snapshots):
+    # Return (step, state, input step) of a snapshot, or None if it is malformed or its base snapshot is unknown
+    # - data is the bytes of the snapshot
+    # - snapshots is the dictionary of step -> state of the snapshots received before
+
+    if len(data) < SNAPSHOT_HEADER.size:
+        return None
+    packet_type, step, base_step, input_step, mask = SNAPSHOT_HEADER.unpack_from(data)
+    if base_step == NO_STEP:
+        base_state = None
+    elif base_step in snapshots:
+        base_state = snapshots[base_step]
+    else:
+        return None
+    state = []
+    position = SNAPSHOT_HEADER.size
+    for index, field_format in enumerate(FIELD_FORMATS):
+        if mask & (1 << index):
+            if position + field_format.size > len(data):
+                return None
+            state.append(field_format.unpack_from(data, position)[0])
+            position += field_format.size
+        elif base_state is None:
+            return None
+        else:
+            state.append(base_state[index])
+    if position != len(data):
+        return None
+    return step, tuple(state), input_step
+
+
+def run_loopback(steps, rtt, jitter=0, loss=0.0, input_delay=0, snapshot_interval=1, seed=0):
+    # Play a match between a host and a client on two localhost UDP sockets, with scripted
+    # players on both sides, and return a dictionary of statistics.
+    # Time is virtual, so the match runs as fast as the CPU allows whatever the round trip time is.
+    # - steps is the int number of host steps to run
+    # - rtt is the float round trip time in milliseconds, split evenly between both directions
+    # - jitter and loss are the extra random delay and the fraction of packets dropped in each direction
+    # - input_delay is the int number of steps the client waits before using its own input
+    # - snapshot_interval is the int number of steps between two snapshots
+    # - seed is the int seed of the match, the packet loss and the players
+
+    clock = VirtualClock()
+    rng = random.Random(seed)
+    host_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    host_socket.bind(('127.0.0.1', 0))
+    client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client_socket.bind(('127.0.0.1', 0))
+    host = Host(pong.Game(pygame.Surface((500, 400)), rng=random.Random(seed)),
+                LossyLink(host_socket, rtt / 2, jitter, loss, clock.now, random.Random(rng.random())),
+                snapshot_interval)
+    client = Client(pong.Game(pygame.Surface((500, 400))),
+                    LossyLink(client_socket, rtt / 2, jitter, loss, clock.now, random.Random(rng.random())),
+                    host_socket.getsockname(), input_delay, clock.now)
+
+    step_ms = 1000 / host.game.physics_rate
+    client_steps = 0
+    start = time.perf_counter()
+    while host.game.steps < steps:
+        client.receive()
+        for count in range(client.steps_to_run(1)):
+            client.step(follow_ball(client.game, client.game.right_paddle, rng))
+            client_steps += 1
+        host.receive()
+        host.step(follow_ball(host.game, host.game.left_paddle, rng))
+        clock.advance(step_ms)
+    elapsed = time.perf_counter() - start
+    lead_steps = client.game.steps - host.game.steps
+
+    # Bring the host to the client's step and repeat its snapshot until the client has it, so that
+    # whatever packets were lost the client ends on the host's state unless prediction went wrong
+    while host.game.steps < client.game.steps:
+        host.receive()
+        host.step(follow_ball(host.game, host.game.left_paddle, rng))
+        client.receive()
+        clock.advance(step_ms)
+    for tick in range(1000):
+        if client.snapshot_step == host.game.steps:
+            break
+        host.receive()
+        host.send_snapshot()
+        client.receive()
+        clock.advance(step_ms)
+    in_sync = client.snapshot_step == host.game.steps and get_state(client.game) == get_state(host.game)
+    host_socket.close()
+    client_socket.close()
+
+    stats = {'host_steps': host.game.steps, 'client_steps': client_steps, 'seconds': elapsed,
+             'rtt_ms': rtt, 'measured_rtt_ms': client.rtt, 'loss': loss, 'input_delay': input_delay,
+             'lead_steps': lead_steps, 'in_sync': in_sync}
+    stats.update(host.get_stats())
+    stats.update(client.get_stats())
+    stats.update(host.link.get_stats('host'))
+    stats.update(client.link.get_stats('client'))
+    stats['host_score'] = (host.game.left_score, host.game.right_score)
+    stats['client_score'] = (client.game.left_score, client.game.right_score)
+    return stats
+
+
+def follow_ball(game, paddle, rng):
+    # Return the direction (-1 up, 0 or 1 down) a scripted player moves its paddle: towards the ball, with some hesitation
+    # - game is the pong.Game the player sees
+    # - paddle is the player's Paddle
+    # - rng is the random.Random deciding when the player hesitates
+    if rng.random() < 0.6:
+        return 0
+    offset = game.small_ball.center[1] - paddle.rect.centery
+    if abs(offset) < game.paddle_increment:
+        return 0
+    return 1 if offset > 0 else -1
+
+
+def report(stats):
+    # Print the statistics returned by run_loopback
+    print('%d host steps, %d client steps in %.2f s' % (stats['host_steps'], stats['client_steps'], stats['seconds']))
+    print('round trip: %.0f ms set, %.1f ms measured; client %d steps ahead; input delay %d steps'
+          % (stats['rtt_ms'], stats['measured_rtt_ms'] or 0, stats['lead_steps'], stats['input_delay']))
+    print('packets dropped: host %d of %d, client %d of %d'
+          % (stats['host_dropped'], stats['host_sent'], stats['client_dropped'], stats['client_sent']))
+    print('snapshots: %d sent, %.1f bytes each on average, %d bytes with every field'
+          % (stats['snapshots'], stats['snapshot_bytes'], stats['full_snapshot_bytes']))
+    print('client inputs missing when the host needed them: %d' % stats['late_inputs'])
+    print('predictions: %d right, %d rolled back (%.1f%%), %d steps run again, mean ball correction %.2f px'
+          % (stats['predictions_right'], stats['rollbacks'],
+             100 * stats['rollbacks'] / max(1, stats['rollbacks'] + stats['predictions_right']),
+             stats['resimulated_steps'], stats['mean_correction']))
+    print('score: host %d - %d, client %d - %d' % (stats['host_score'] + stats['client_score']))
+    print('host and client ended in the same state: %s' % ('yes' if stats['in_sync'] else 'no'))
+
+
+# User-defined classes
+
+class LossyLink:
+    # An object in this class sends and receives UDP packets, holding back and dropping some of the
+    # packets it sends to act like a slower network.
+
+    def __init__(self, udp, latency=0, jitter=0, loss=0.0, clock=None, rng=None):
+        # Initialize a LossyLink.
+        # - self is the LossyLink to initialize
+        # - udp is the bound socket.socket to send and receive on; it is made non-blocking
+        # - latency is the float milliseconds every packet is held back
+        # - jitter is the float most milliseconds added at random to the latency
+        # - loss is the float fraction of packets dropped
+        # - clock is a function returning the time in milliseconds (time.perf_counter in milliseconds when None)
+        # - rng is the random.Random deciding the jitter and the dropped packets
+
+        udp.setblocking(False)
+        self.socket = udp
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        if clock is None:
+            clock = lambda: time.perf_counter() * 1000
+        self.clock = clock
+        if rng is None:
+            rng = random.Random()
+        self.rng = rng
+        self.queue = []  # heap of (due time, sequence, data, address)
+        self.sequence = itertools.count()
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+
+    def send(self, data, address):
+        # Send a packet after the latency, unless it is dropped
+        # - data is the bytes to send
+        # - address is the (host, port) to send to
+        self.sent += 1
+        self.bytes_sent += len(data)
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency
+        if self.jitter:
+            delay += self.rng.uniform(0, self.jitter)
+        heapq.heappush(self.queue, (self.clock() + delay, next(self.sequence), data, address))
+        self.flush()
+
+    def flush(self):
+        # Send the packets that have been held back long enough
+        now = self.clock()
+        while self.queue and self.queue[0][0] <= now:
+            due, sequence, data, address = heapq.heappop(self.queue)
+            try:
+                self.socket.sendto(data, address)
+            except OSError:
+                pass  # a full buffer or an unreachable peer loses the packet, like the network would
+
+    def receive(self):
+        # Return the list of (data, address) of the packets that have arrived
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packets.append(self.socket.recvfrom(2048))
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+
+    def get_stats(self, prefix):
+        # Return a dictionary of packet counts, with names starting with prefix
+        return {prefix + '_sent': self.sent, prefix + '_dropped': self.dropped, prefix + '_bytes': self.bytes_sent}
+
+
+class Host:
+    # An object in this class runs the real match and sends snapshots of it to the client.
+
+    def __init__(self, game, link, snapshot_interval=1):
+        # Initialize a Host.
+        # - self is the Host to initialize
+        # - game is the pong.Game to run; the host moves its left paddle, the client its right paddle
+        # - link is the LossyLink to the client
+        # - snapshot_interval is the int number of steps between two snapshots
+
+        self.game = game
+        self.link = link
+        self.snapshot_interval = snapshot_interval
+        self.client_address = None
+        self.client_inputs = {}  # step -> direction of the client's paddle
+        self.last_client_input = 0  # used again when an input has not arrived in time
+        self.newest_input_step = NO_STEP
+        self.client_snapshot_step = NO_STEP  # newest snapshot the client confirmed, the base of the next delta
+        self.history = {game.steps: get_state(game)}  # step -> state of the last HISTORY steps
+        self.snapshots = 0
+        self.snapshot_bytes = 0
+        self.late_inputs = 0
+
+    def steps_to_run(self, steps):
+        # Return how many of the steps due the match should run: none until a client is there
+        return steps if self.client_address is not None else 0
+
+    def receive(self):
+        # Handle every packet that has arrived from the client.
+        # Packets that are empty, cut short or from another address while a client plays are dropped.
+        for data, address in self.link.receive():
+            if not data:
+                continue
+            if data[0] == HELLO:
+                if self.client_address is not None and address != self.client_address:
+                    continue  # someone else asking for a match that is already being played
+                # A new client starts from a full snapshot
+                self.client_address = address
+                self.client_inputs = {}
+                self.newest_input_step = NO_STEP
+                self.client_snapshot_step = NO_STEP
+                self.send_snapshot()
+            elif data[0] == INPUT and address == self.client_address:
+                self.receive_inputs(data)
+
+    def receive_inputs(self, data):
+        # Remember the client's inputs for the steps the match has not run yet
+        # - data is the bytes of an INPUT packet; one of the wrong length is dropped
+        if len(data) < INPUT_HEADER.size:
+            return
+        packet_type, snapshot_step, first_step, count = INPUT_HEADER.unpack_from(data)
+        if len(data) != INPUT_HEADER.size + count:
+            return
+        if snapshot_step != NO_STEP and (self.client_snapshot_step == NO_STEP or snapshot_step > self.client_snapshot_step):
+            self.client_snapshot_step = snapshot_step
+        inputs = struct.unpack_from('<%db' % count, data, INPUT_HEADER.size)
+        for offset, direction in enumerate(inputs):
+            if first_step + offset >= self.game.steps:
+                self.client_inputs[first_step + offset] = direction
+        newest = first_step + count - 1
+        if count and (self.newest_input_step == NO_STEP or newest > self.newest_input_step):
+            self.newest_input_step = newest
+
+    def step(self, direction):
+        # Run one physics step of the match and send a snapshot when one is due
+        # - direction is the int direction of the host's paddle: -1 up, 0 still or 1 down
+
+        game = self.game
+        client_direction = self.client_inputs.pop(game.steps, None)
+        if client_direction is None:
+            self.late_inputs += 1
+            client_direction = self.last_client_input
+        self.last_client_input = client_direction
+        game.left_paddle.set_vertical_velocity(direction * game.paddle_increment)
+        game.right_paddle.set_vertical_velocity(client_direction * game.paddle_increment)
+        game.step()
+        self.history[game.steps] = get_state(game)
+        self.history.pop(game.steps - HISTORY, None)
+        if game.steps % self.snapshot_interval == 0:
+            self.send_snapshot()
+
+    def send_snapshot(self):
+        # Send the state of the match, as a delta from the newest snapshot the client has confirmed
+        if self.client_address is None:
+            return
+        step = self.game.steps
+        base_step = self.client_snapshot_step
+        base_state = self.history.get(base_step)
+        if base_state is None:
+            base_step = NO_STEP
+        data = encode_snapshot(step, self.history[step], base_step, base_state, self.newest_input_step)
+        self.link.send(data, self.client_address)
+        self.snapshots += 1
+        self.snapshot_bytes += len(data)
+
+    def get_stats(self):
+        # Return a dictionary of snapshot and input statistics
+        return {'snapshots': self.snapshots, 'snapshot_bytes': self.snapshot_bytes / max(1, self.snapshots),
+                'full_snapshot_bytes': SNAPSHOT_HEADER.size + sum(field_format.size for field_format in FIELD_FORMATS),
+                'late_inputs': self.late_inputs}
+
+
+class Client:
+    # An object in this class runs a predicted copy of the match ahead of the host, sends the
+    # inputs of the right paddle and corrects the prediction from the host's snapshots.
+
+    def __init__(self, game, link, host_address, input_delay=0, clock=None):
+        # Initialize a Client and ask the host for the match.
+        # - self is the Client to initialize
+        # - game is the pong.Game that is predicted and drawn
+        # - link is the LossyLink to the host
+        # - host_address is the (host, port) of the host
+        # - input_delay is the int number of steps a key waits before it moves the paddle
+        # - clock is a function returning the time in milliseconds (time.perf_counter in milliseconds when None)
+
+        self.game = game
+        self.link = link
+        self.host_address = host_address
+        self.input_delay = input_delay
+        if clock is None:
+            clock = lambda: time.perf_counter() * 1000
+        self.clock = clock
+        self.connected = False
+        self.hello_time = None
+        self.inputs = {}  # step -> direction of the right paddle
+        self.predicted = {}  # step -> predicted state, for the steps the host has not confirmed yet
+        self.snapshots = {}  # step -> state of the last HISTORY snapshots received
+        self.snapshot_step = NO_STEP  # newest snapshot received
+        self.input_step = NO_STEP  # newest input step the host confirmed
+        self.sent_times = {}  # newest input step of a packet -> time it was sent, to measure the round trip
+        self.rtt = None
+        self.lead_margin = 2  # steps the client stays ahead of what the round trip needs
+        self.predictions_right = 0
+        self.rollbacks = 0
+        self.resimulated_steps = 0
+        self.correction = 0.0
+        self.say_hello()
+
+    def say_hello(self):
+        # Ask the host for the match; repeated until a snapshot arrives, in case the packet is lost
+        self.hello_time = self.clock()
+        self.link.send(bytes([HELLO]), self.host_address)
+
+    def steps_to_run(self, steps):
+        # Return how many steps to run instead of the steps due, to stay ahead of the host by the round trip time.
+        # - steps is the int number of steps the frame time asks for
+
+        if not self.connected:
+            if self.clock() - self.hello_time > 500:
+                self.say_hello()
+            return 0
+        step_ms = 1000 / self.game.physics_rate
+        target = self.snapshot_step + math.ceil((self.rtt or 0) / step_ms) + self.lead_margin
+        behind = target - self.game.steps
+        if behind > 2:
+            # Catch up quickly when far behind, as after connecting
+            return steps + min(behind - 2, self.game.max_steps_per_frame)
+        if behind < -2:
+            return max(0, steps - 1)
+        return steps
+
+    def step(self, direction):
+        # Run one predicted physics step and send the inputs the host has not confirmed
+        # - direction is the int direction of the client's paddle: -1 up, 0 still or 1 down
+
+        game = self.game
+        self.inputs[game.steps + self.input_delay] = direction
+        self.send_inputs(game.steps + self.input_delay)
+        # The client's own paddle moves with the input buffered for this step; the host's paddle keeps
+        # the velocity of the newest snapshot, which set_state gave it
+        game.right_paddle.set_vertical_velocity(self.inputs.get(game.steps, 0) * game.paddle_increment)
+        game.step()
+        self.predicted[game.steps] = get_state(game)
+
+    def send_inputs(self, newest):
+        # Send every input from the oldest one the host has not confirmed up to newest
+        # - newest is the int step of the newest input
+        first = newest - MAX_INPUTS + 1
+        if self.input_step != NO_STEP:
+            first = max(first, self.input_step + 1)
+        first = max(first, 0)
+        inputs = [self.inputs.get(step, 0) for step in range(first, newest + 1)]
+        data = INPUT_HEADER.pack(INPUT, self.snapshot_step, first, len(inputs)) + struct.pack('<%db' % len(inputs), *inputs)
+        self.link.send(data, self.host_address)
+        self.sent_times[newest] = self.clock()
+
+    def receive(self):
+        # Handle every snapshot that has arrived from the host
+        for data, address in self.link.receive():
+            if data and data[0] == SNAPSHOT:
+                snapshot = decode_snapshot(data, self.snapshots)
+                if snapshot is not None:
+                    self.receive_snapshot(*snapshot)
+
+    def receive_snapshot(self, step, state, input_step):
+        # Compare a snapshot with the prediction for its step and roll back when they differ
+        # - step is the int step of the snapshot
+        # - state is the tuple of field values
+        # - input_step is the int newest client input step the host had received
+
+        self.snapshots[step] = state
+        self.snapshots.pop(step - HISTORY, None)
+        if input_step != NO_STEP and (self.input_step == NO_STEP or input_step > self.input_step):
+            self.input_step = input_step
+            sent_time = self.sent_times.pop(input_step, None)
+            if sent_time is not None:
+                sample = self.clock() - sent_time
+                self.rtt = sample if self.rtt is None else 0.9 * self.rtt + 0.1 * sample
+            for old_step in [old_step for old_step in self.sent_times if old_step < input_step]:
+                del self.sent_times[old_step]
+        if self.snapshot_step != NO_STEP and step <= self.snapshot_step:
+            return  # arrived out of order; a newer snapshot was used already
+        self.snapshot_step = step
+
+        game = self.game
+        if not self.connected:
+            self.connected = True
+            set_state(game, step, state)
+            return
+        predicted = self.predicted.pop(step, None)
+        for old_step in [old_step for old_step in self.predicted if old_step < step]:
+            del self.predicted[old_step]
+        for old_step in [old_step for old_step in self.inputs if old_step < step]:
+            del self.inputs[old_step]
+        if game.steps < step:
+            # The client fell behind the host; start again from the snapshot
+            set_state(game, step, state)
+            return
+        if predicted == state:
+            self.predictions_right += 1
+            return
+
+        # Go back to the snapshot and run the steps since then again with the client's inputs
+        self.rollbacks += 1
+        shown = list(game.small_ball.center)
+        current = game.steps
+        set_state(game, step, state)
+        while game.steps < current:
+            game.right_paddle.set_vertical_velocity(self.inputs.get(game.steps, 0) * game.paddle_increment)
+            game.step()
+            self.predicted[game.steps] = get_state(game)
+            self.resimulated_steps += 1
+        self.correction += math.hypot(game.small_ball.center[0] - shown[0], game.small_ball.center[1] - shown[1])
+
+    def get_stats(self):
+        # Return a dictionary of prediction statistics
+        return {'predictions_right': self.predictions_right, 'rollbacks': self.rollbacks,
+                'resimulated_steps': self.resimulated_steps,
+                'mean_correction': self.correction / max(1, self.rollbacks)}
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# Headless benchmarks for the Memory and Pong games.
+# Run the whole suite with: python -m benchmarks
@@ -0,0 +1,62 @@
+# Runs the benchmark suite and compares the results with a stored baseline.
+#
+#   python -m benchmarks                    run and compare with benchmarks/baseline.json
+#   python -m benchmarks --save FILE        also store the results as a new baseline
+#   python -m benchmarks --only memory      run only the benchmarks whose name contains 'memory'
+#
+# The exit status is 1 when a benchmark is slower than the baseline by more than the tolerance.
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.common import setup
+from benchmarks import bench_launcher, bench_memory, bench_pong
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Memory and Pong benchmarks')
+    parser.add_argument('--quick', action='store_true', help='time fewer calls')
+    parser.add_argument('--only', help='run only benchmarks whose name contains this text')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline JSON file to compare with')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    # Calls of well under a microsecond time up to about 1.7x apart on a busy machine, so only twice as slow counts
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help='fraction a benchmark may be slower than the baseline (default 1.0)')
+    args = parser.parse_args()
+
+    setup()
+    results = {}
+    for module in (bench_memory, bench_pong, bench_launcher):
+        results.update(module.run(args.quick, args.only))
+
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    regressions = 0
+    print('%-36s %12s %12s %8s' % ('benchmark', 'us/call', 'baseline', 'ratio'))
+    for name, seconds in results.items():
+        line = '%-36s %12.2f' % (name, seconds * 1e6)
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += ' %12.2f %7.2fx' % (baseline[name] * 1e6, ratio)
+            if ratio > 1 + args.tolerance:
+                line += '  SLOWER'
+                regressions += 1
+        print(line)
+
+    if args.save:
+        with open(args.save, 'w') as save_file:
+            json.dump({'results': results}, save_file, indent=2, sort_keys=True)
+    if regressions:
+        print('%d benchmark(s) slower than the baseline' % regressions)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
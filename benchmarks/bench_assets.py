@@ -0,0 +1,68 @@
+# Benchmark for the Memory tile images.
+# Compares the frame time of a full Game.draw when every tile reads its image from disk on
+# every frame (how Tile.draw used to work) with the frame time when the images come from the
+# shared AssetManager cache and atlas.
+# Run with: python -m benchmarks.bench_assets [frames]
+
+import os
+import sys
+
+from benchmarks.common import MEMORY_DIRECTORY, measure, setup
+
+import pygame
+import memory
+
+
+class UncachedAssets:
+    # Stand-in for AssetManager that reads the image file on every lookup, like the old Tile.draw
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def add_image(self, name, image):
+        pass
+
+    def is_loading(self):
+        # Every image is read when it is drawn, so none is ever waiting on a loader thread
+        return False
+
+    def build_atlas(self, filenames, size=None):
+        return None
+
+    def get(self, filename):
+        return pygame.image.load(os.path.join(self.directory, filename)), None
+
+
+def time_full_draw(game, frames):
+    # Return the time in seconds of one Game.draw call that redraws the whole board
+    # - game is the memory.Game to draw
+    # - frames is the int number of frames to time
+
+    # Expose half the board so both the hidden and the face images are drawn
+    for row in game.board[:len(game.board) // 2]:
+        for tile in row:
+            tile.set_expose(True)
+
+    def full_draw():
+        game.renderer.mark_all()
+        game.draw()
+    return measure(full_draw, frames)
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    setup()
+    surface = pygame.Surface((500, 400))
+
+    before = time_full_draw(memory.Game(surface, UncachedAssets(MEMORY_DIRECTORY)), frames)
+    after = time_full_draw(memory.Game(surface), frames)
+
+    print('Memory full Game.draw over %d frames' % frames)
+    print('  load per frame : %8.3f ms/frame' % (before * 1000))
+    print('  cached atlas   : %8.3f ms/frame' % (after * 1000))
+    print('  speed-up       : %8.1fx' % (before / after))
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
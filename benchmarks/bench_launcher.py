@@ -0,0 +1,30 @@
+# Benchmarks for the launcher: switching between the Memory and Pong scenes of one window,
+# timed from the switch to the first frame the scene shown has drawn.
+
+import pygame
+
+from benchmarks.common import is_selected, measure
+from launcher.scenes import Launcher, MemoryScene, PongScene, WINDOW_SIZE
+
+
+def run(quick=False, only=None):
+    # Return a dictionary of benchmark name -> seconds per call
+    # - quick is True to time fewer calls
+    # - only is the text the names of the benchmarks to run contain, or None to run them all
+    number = 50 if quick else 500
+    results = {}
+    if not is_selected('launcher switch', only):
+        return results
+    launcher = Launcher(pygame.Surface(WINDOW_SIZE), {'memory': MemoryScene, 'pong': PongScene})
+    launcher.show('memory')
+    launcher.scene.game.assets.finish_loading()
+    launcher.scene.play_frame([])
+    launcher.show('pong')
+    launcher.scene.play_frame([])
+
+    def switch():
+        launcher.show('memory' if launcher.scene_name == 'pong' else 'pong')
+        launcher.scene.play_frame([])
+    results['launcher switch'] = measure(switch, number)
+    launcher.close()
+    return results
@@ -0,0 +1,102 @@
+# Benchmarks for memory.Game: update, draw and handle_mouse_up across board sizes,
+# and for the leaderboard: queueing a finished game and reading the top of a large board.
+
+import itertools
+import os
+import random
+import tempfile
+
+import pygame
+import memory
+import leaderboard
+
+from benchmarks.common import is_selected, measure
+
+# (rows, columns, window width, window height) of the boards to measure
+BOARDS = [(4, 4, 500, 400), (10, 10, 1000, 800), (50, 50, 1000, 800), (100, 100, 1600, 1200)]
+# Benchmarks run for every board, named after the board
+BOARD_BENCHMARKS = ['update', 'draw idle', 'draw flip', 'draw full', 'handle_mouse_up']
+LEADERBOARD_BENCHMARKS = ['memory leaderboard submit', 'memory leaderboard top 10', 'memory leaderboard personal best']
+
+
+def run(quick=False, only=None):
+    # Return a dictionary of benchmark name -> seconds per call
+    # - quick is True to time fewer calls
+    # - only is the text the names of the benchmarks to run contain, or None to run them all
+    number = 200 if quick else 2000
+    results = {}
+    for rows, columns, width, height in BOARDS:
+        name = 'memory %dx%d ' % (rows, columns)
+        if not any(is_selected(name + benchmark, only) for benchmark in BOARD_BENCHMARKS):
+            continue
+        surface = pygame.Surface((width, height))
+        game = memory.Game(surface, rows=rows, columns=columns)
+        game.draw()
+
+        def update():
+            game.update()
+            game.decide_continue()
+        if is_selected(name + 'update', only):
+            results[name + 'update'] = measure(update, number)
+
+        # A frame where nothing changed
+        if is_selected(name + 'draw idle', only):
+            results[name + 'draw idle'] = measure(game.draw, number)
+
+        # A frame where one tile was turned over
+        tile = game.board[rows // 2][columns // 2]
+
+        def draw_flip():
+            game.expose_tile(tile, not tile.get_expose())
+            game.draw()
+        if is_selected(name + 'draw flip', only):
+            results[name + 'draw flip'] = measure(draw_flip, number)
+
+        def draw_full():
+            game.renderer.mark_all()
+            game.draw()
+        if is_selected(name + 'draw full', only):
+            results[name + 'draw full'] = measure(draw_full, max(10, number // 20))
+
+        # Click every tile in turn, putting it back afterwards so every click selects a tile
+        tile.set_expose(False)
+        positions = [tile.get_rect().center for row in game.board for tile in row]
+        events = [pygame.event.Event(pygame.MOUSEBUTTONUP, pos=position, button=1) for position in positions[:number]]
+        clicks = itertools.cycle(events)
+
+        def click():
+            game.handle_mouse_up(next(clicks))
+            clicked = game.selected_tile.pop()
+            clicked.set_expose(False)
+            game.dirty_tiles.clear()
+        if is_selected(name + 'handle_mouse_up', only):
+            results[name + 'handle_mouse_up'] = measure(click, number)
+    if any(is_selected(name, only) for name in LEADERBOARD_BENCHMARKS):
+        results.update(run_leaderboard(quick, only))
+    return results
+
+
+def run_leaderboard(quick=False, only=None):
+    # Return a dictionary of benchmark name -> seconds per call for a leaderboard file of many games
+    # - quick is True to store and time fewer games
+    # - only is the text the names of the benchmarks to run contain, or None to run them all
+    games = 20000 if quick else 200000
+    number = 200 if quick else 2000
+    results = {}
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        board = leaderboard.Leaderboard(os.path.join(directory, 'leaderboard.sqlite'))
+        for game in range(games):
+            board.submit('player%d' % rng.randrange(1000), rng.choice([4, 6, 8]), rng.choice([4, 6, 8]),
+                         rng.randrange(5000, 500000), rng.randrange(8, 200))
+        board.flush()
+        # What a finished game costs the frame that finds the last pair
+        if is_selected('memory leaderboard submit', only):
+            results['memory leaderboard submit'] = measure(lambda: board.submit('player', 4, 4, 60000, 20), number)
+            board.flush()
+        if is_selected('memory leaderboard top 10', only):
+            results['memory leaderboard top 10'] = measure(lambda: board.top(4, 4, 10), number)
+        if is_selected('memory leaderboard personal best', only):
+            results['memory leaderboard personal best'] = measure(lambda: board.personal_best('player7', 4, 4), number)
+        board.close()
+    return results
@@ -0,0 +1,126 @@
+# Benchmarks for pong.Game (update, draw, collide), the computer player's prediction and
+# pong_batch.BatchPong and BatchPaddleAI across ball counts.
+
+import random
+
+import pygame
+import pong
+import pong_ai
+
+from benchmarks.common import is_selected, measure
+
+# Numbers of balls (one per match) stepped together by BatchPong
+BALL_COUNTS = [1, 100, 10000]
+# Number of balls on the field of the multi-ball game
+MULTIBALL_COUNT = 1000
+
+
+def run(quick=False, only=None):
+    # Return a dictionary of benchmark name -> seconds per call
+    # - quick is True to time fewer calls
+    # - only is the text the names of the benchmarks to run contain, or None to run them all
+    number = 500 if quick else 5000
+    results = {}
+    random.seed(0)
+    surface = pygame.Surface((500, 400))
+    game = pong.Game(surface)
+    game.left_paddle.set_vertical_velocity(game.paddle_increment)
+    game.right_paddle.set_vertical_velocity(-game.paddle_increment)
+
+    def update():
+        game.step()
+        if not game.continue_game:
+            game.left_score = game.right_score = 0
+            game.continue_game = True
+    if is_selected('pong update', only):
+        results['pong update'] = measure(update, number)
+    if is_selected('pong draw', only):
+        results['pong draw'] = measure(lambda: game.draw(0.5), number)
+
+    def draw_full():
+        game.renderer.mark_all()
+        game.draw(0.5)
+    if is_selected('pong draw full', only):
+        results['pong draw full'] = measure(draw_full, number // 10)
+
+    # A ball that hits the left paddle in the middle of every step
+    paddle = game.left_paddle.rect
+    ball = game.small_ball
+
+    def collide_hit():
+        ball.move_start[:] = [paddle.right + 10, paddle.centery]
+        ball.center[:] = [paddle.right - 2, paddle.centery]
+        ball.velocity[:] = [-12, 0]
+        game.collide()
+    if is_selected('pong collide hit', only):
+        results['pong collide hit'] = measure(collide_hit, number)
+
+    def collide_miss():
+        ball.move_start[:] = [250, 200]
+        ball.center[:] = [246, 201]
+        ball.velocity[:] = [-4, 1]
+        game.collide()
+    if is_selected('pong collide miss', only):
+        results['pong collide miss'] = measure(collide_miss, number)
+
+    # Where a ball moving away from the right paddle reaches it after bouncing off the far side and the walls
+    if is_selected('pong ai predict', only):
+        results['pong ai predict'] = measure(
+            lambda: pong_ai.predict_crossing((250.0, 200.0), (-4.0, 7.0), 370, 1, 500, 400, 5), number)
+
+    try:
+        import pong_batch
+    except ImportError:
+        return results  # NumPy is not installed
+    for count in BALL_COUNTS:
+        name = 'pong batch %d balls ' % count
+        if not (is_selected(name + 'step', only) or is_selected(name + 'ai', only)):
+            continue
+        batch = pong_batch.BatchPong(count, seed=0)
+        actions = [1] * count
+
+        def step():
+            batch.step(actions, actions)
+            batch.reset(~batch.continue_game)
+        if is_selected(name + 'step', only):
+            results[name + 'step'] = measure(step, max(10, number // 10))
+
+        if is_selected(name + 'ai', only):
+            # Matches of their own, a fixed number of steps in, so the timing does not depend on the step benchmark
+            ai_batch = pong_batch.BatchPong(count, seed=0)
+            for warm_up in range(50):
+                ai_batch.step(actions, actions)
+            player = pong_batch.BatchPaddleAI('right', count, seed=0)
+            results[name + 'ai'] = measure(lambda: player.actions(ai_batch), max(10, number // 10))
+
+    # Many balls on one field: arrays and a grid against one Ball object per ball and every pair tested
+    name = 'pong multiball %d ' % MULTIBALL_COUNT
+    if not any(is_selected(name + benchmark, only) for benchmark in ['step', 'draw', 'naive step']):
+        return results
+    import pong_multiball
+    multiball = pong_multiball.MultiBallGame(pygame.Surface((500, 400)), MULTIBALL_COUNT, seed=0)
+    if is_selected(name + 'step', only):
+        results[name + 'step'] = measure(multiball.step, max(10, number // 10))
+    if is_selected(name + 'draw', only):
+        results[name + 'draw'] = measure(multiball.draw, max(10, number // 10))
+    if is_selected(name + 'naive step', only):
+        results[name + 'naive step'] = measure(naive_step(surface, MULTIBALL_COUNT), 3)
+    return results
+
+
+def naive_step(surface, count):
+    # Return a function that moves count Ball objects one at a time and tests every pair of them
+    rng = random.Random(0)
+    balls = [pong.Ball('white', 3, [rng.uniform(3, 497), rng.uniform(3, 397)], [rng.uniform(-5, 5), rng.uniform(-5, 5)],
+                       surface) for index in range(count)]
+
+    def step():
+        for ball in balls:
+            ball.move()
+        for index, ball in enumerate(balls):
+            for other in balls[index + 1:]:
+                offset_x = other.center[0] - ball.center[0]
+                offset_y = other.center[1] - ball.center[1]
+                if offset_x * offset_x + offset_y * offset_y < 36:
+                    ball.velocity, other.velocity = other.velocity, ball.velocity
+    return step
@@ -0,0 +1,60 @@
+# Setup and timing helpers shared by the benchmarks.
+# Importing this module selects the SDL dummy video driver, so no window is ever shown, and
+# puts both game directories on sys.path so that memory and pong can be imported.
+
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEMORY_DIRECTORY = os.path.join(ROOT, 'Memory game (Pygame)')
+PONG_DIRECTORY = os.path.join(ROOT, 'Pong game (Pygame)')
+for directory in (MEMORY_DIRECTORY, PONG_DIRECTORY):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+import pygame
+
+from pygame_common.startup import init_pygame
+
+
+# Shortest time in seconds of one timing run of measure
+MIN_RUN_SECONDS = 0.02
+
+
+def setup():
+    # Initialize pygame the way the games do, with a tiny display so images can be converted and display.update works
+    init_pygame()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+
+def is_selected(name, only):
+    # Return True if a benchmark is to be run
+    # - name is the string name of the benchmark
+    # - only is the text the name must contain, or None to run every benchmark
+    return only is None or only in name
+
+
+def measure(function, number, repeat=7):
+    # Return the time in seconds of one call of a function, from the fastest of several timing runs;
+    # other work on the machine only ever makes a run slower, so the fastest run varies least
+    # - function is the function (without arguments) to time
+    # - number is the int least number of calls in one timing run; it is doubled until a run takes MIN_RUN_SECONDS
+    # - repeat is the int number of timing runs
+
+    function()  # warm up caches before timing
+    runs = []
+    while len(runs) < repeat:
+        start = time.perf_counter()
+        for call in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if not runs and elapsed < MIN_RUN_SECONDS:
+            # Runs of calls that take microseconds are too short for the timer and the scheduler
+            number = number * 2
+            continue
+        runs.append(elapsed / number)
+    return min(runs)
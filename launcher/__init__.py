@@ -0,0 +1,14 @@
+# Game launcher for the Memory and Pong games.
+# Run it with: python -m launcher
+# Importing the package puts both game directories on sys.path so that memory and pong can be
+# imported, and the repository root so that pygame_common can.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEMORY_DIRECTORY = os.path.join(ROOT, 'Memory game (Pygame)')
+PONG_DIRECTORY = os.path.join(ROOT, 'Pong game (Pygame)')
+for directory in (ROOT, MEMORY_DIRECTORY, PONG_DIRECTORY):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
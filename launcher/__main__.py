@@ -0,0 +1,65 @@
+# Memory and Pong in one window.
+# Starts pygame and opens the window once; F1 shows Memory, F2 shows Pong, F5 starts a new game
+# of the one shown and Esc goes back to the menu (or quits from the menu). A game that is not
+# shown waits where it was left, with its clock stopped.
+#
+# Example: python -m launcher
+#          python -m launcher --start pong --ai right --switch-report
+
+import argparse
+
+import pygame
+
+from launcher.scenes import Launcher, MenuScene, MemoryScene, PongScene, WINDOW_SIZE
+from pygame_common.startup import init_pygame
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m launcher', description='Memory and Pong in one window')
+    parser.add_argument('--start', choices=['menu', 'memory', 'pong'], default='menu', help='scene shown first')
+    parser.add_argument('--rows', type=int, default=4, help='number of Memory tile rows')
+    parser.add_argument('--columns', type=int, default=None, help='number of Memory tile columns (default: same as rows)')
+    parser.add_argument('--generate-faces', action='store_true', help='draw a distinct face for every Memory pair')
+    parser.add_argument('--ai', choices=['left', 'right', 'both'], help='let the computer move this Pong paddle')
+    parser.add_argument('--ai-level', choices=['easy', 'normal', 'hard', 'perfect'], default='normal',
+                        help='how well the computer plays Pong')
+    parser.add_argument('--player', default=None, help='name finished Memory games are stored under (default: login name)')
+    parser.add_argument('--leaderboard', default=None, help='Memory leaderboard file (default: .memory_leaderboard.sqlite in the home directory)')
+    parser.add_argument('--no-leaderboard', action='store_true', help='do not store finished Memory games')
+    parser.add_argument('--resizable', action='store_true', help='let the window be resized')
+    parser.add_argument('--fullscreen', action='store_true', help='play fullscreen at the resolution of the desktop')
+    parser.add_argument('--switch-report', action='store_true',
+                        help='print how long every switch took, from the key press to the first frame of the scene shown')
+    args = parser.parse_args()
+
+    # Initialize only the parts of pygame the games use, once for every scene
+    init_pygame()
+    if args.fullscreen:
+        surface = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    elif args.resizable:
+        surface = pygame.display.set_mode(WINDOW_SIZE, pygame.RESIZABLE)
+    else:
+        surface = pygame.display.set_mode(WINDOW_SIZE)
+    # Neither game uses mouse motion, and those events would wake the loop up when it is idle
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
+    launcher = Launcher(surface, {
+        'menu': lambda launcher: MenuScene(launcher, [('memory', 'Memory'), ('pong', 'Pong')]),
+        'memory': lambda launcher: MemoryScene(launcher, args.rows, args.columns, args.generate_faces),
+        'pong': lambda launcher: PongScene(launcher, args.ai, args.ai_level)})
+    if not args.no_leaderboard:
+        # The file is opened and written on the leaderboard's own thread, so no game waits for it
+        import getpass
+        from leaderboard import Leaderboard, DEFAULT_PATH
+        launcher.leaderboard = Leaderboard(args.leaderboard or DEFAULT_PATH)
+        launcher.player = args.player or getpass.getuser()
+    launcher.show(args.start)
+    launcher.play()
+    launcher.close()
+    if args.switch_report:
+        launcher.report_switches()
+    # quit pygame and clean up the pygame window
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
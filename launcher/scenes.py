@@ -0,0 +1,411 @@
+# Scenes of the game launcher.
+# The launcher keeps one pygame context and one window for the whole session and shows one
+# scene at a time in it: the menu, Memory or Pong. It owns the event loop and hands every
+# scene the events of a frame, so switching from one game to the other is a function call
+# instead of a new process that starts pygame and reads every file again.
+#
+# All scenes share the launcher's TextCache and AssetManager, so fonts, rendered text, the
+# tile images and their scaled copies are made once per session. A scene is only created
+# (and its game module imported) the first time it is shown. When the launcher switches away
+# from a scene, the scene is suspended: it keeps its state but plays no frames, and the clock
+# of its game stands still, so the Memory score does not count the time spent playing Pong.
+
+import random
+import sqlite3
+import time
+
+import pygame
+
+from launcher import MEMORY_DIRECTORY
+from pygame_common.assets import AssetManager
+from pygame_common.render import DirtyRenderer
+from pygame_common.text import TextCache
+from pygame_common.timers import PausableClock
+
+# Size of the window unless it is resizable or fullscreen, the size both games are made for
+WINDOW_SIZE = (500, 400)
+
+# Keys that switch scenes in every scene; F5 starts a new game in the scene shown
+SCENE_KEYS = {pygame.K_F1: 'memory', pygame.K_F2: 'pong', pygame.K_ESCAPE: 'menu'}
+
+
+# User-defined classes
+
+class Scene:
+    # An object in this class is something the launcher shows in its window.
+    # This class shows nothing; games and the menu override the methods they need.
+
+    title = ''  # caption of the window while the scene is shown
+
+    def __init__(self, launcher):
+        # Initialize a Scene.
+        # - self is the Scene to initialize
+        # - launcher is the Launcher showing the scene
+
+        self.launcher = launcher
+        self.FPS = 60  # most frames per second while the scene is not static
+
+    def resume(self, surface):
+        # Start showing the scene again, drawing all of it on the next frame
+        # - self is the Scene to show
+        # - surface is the display window surface object, which may have changed size while the scene was away
+        pass
+
+    def suspend(self):
+        # Stop showing the scene; it keeps its state until it is resumed or closed
+        # - self is the Scene to put aside
+        pass
+
+    def play_frame(self, events):
+        # Handle the events of a frame, update the scene and draw what changed
+        # - self is the Scene to play
+        # - events is the list of pygame events of the frame the launcher did not use itself
+        pass
+
+    def is_static(self):
+        # Return True if the next frame would draw nothing unless an event or the scene's own timers change it
+        # - self is the Scene to check
+        return False
+
+    def get_wait_time(self):
+        # Return the int milliseconds a static scene may sleep before it changes by itself, or None to wait for an event
+        # - self is the Scene to check
+        return None
+
+    def close(self):
+        # Let go of what the scene holds, such as files it writes
+        # - self is the Scene to close
+        pass
+
+
+class MenuScene(Scene):
+    # An object in this class lists the games of the launcher and shows the one picked with a key or a click.
+
+    title = 'Games'
+
+    def __init__(self, launcher, entries):
+        # Initialize a MenuScene.
+        # - self is the MenuScene to initialize
+        # - launcher is the Launcher showing the scene
+        # - entries is the list of (scene name, label) pairs to list, picked with the keys 1, 2, ...
+
+        Scene.__init__(self, launcher)
+        self.surface = launcher.surface
+        self.renderer = DirtyRenderer(self.surface)
+        self.entries = entries
+        self.entry_rects = []  # Rect of every entry as drawn, in the order of entries
+        self.bg_color = pygame.Color('black')
+        self.fg_color = 'white'
+
+    def resume(self, surface):
+        # - self is the MenuScene to show
+        # - surface is the display window surface object
+        self.surface = surface
+        self.renderer.set_surface(surface)
+
+    def play_frame(self, events):
+        # - self is the MenuScene to play
+        # - events is the list of pygame events of the frame
+
+        resized = False
+        for event in events:
+            picked = None
+            if event.type == pygame.KEYDOWN and pygame.K_1 <= event.key < pygame.K_1 + len(self.entries):
+                picked = event.key - pygame.K_1
+            elif event.type == pygame.MOUSEBUTTONUP:
+                picked = pygame.Rect(event.pos, (1, 1)).collidelist(self.entry_rects)
+                if picked < 0:
+                    picked = None
+            elif event.type == pygame.VIDEOEXPOSE:
+                self.renderer.mark_all()
+            elif event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+                resized = True
+            if picked is not None:
+                # The rest of the frame belongs to the game that is shown now
+                self.launcher.show(self.entries[picked][0])
+                return
+        if resized and pygame.display.get_surface() is not None:
+            self.resume(pygame.display.get_surface())
+        self.draw()
+
+    def draw(self):
+        # Draw the whole menu when it has to be drawn again
+        # - self is the MenuScene to draw
+
+        if self.renderer.full:
+            width, height = self.surface.get_size()
+            scale = min(width / WINDOW_SIZE[0], height / WINDOW_SIZE[1])
+            self.surface.fill(self.bg_color)
+            text_cache = self.launcher.text_cache
+            y = round(60 * scale)
+            self.entry_rects = []
+            for number, (name, label) in enumerate(self.entries, 1):
+                image = text_cache.render('%d  %s' % (number, label), '', max(8, round(56 * scale)), self.fg_color,
+                                          self.bg_color)
+                rect = image.get_rect(midtop=(width // 2, y))
+                self.surface.blit(image, rect)
+                self.entry_rects.append(rect)
+                y = rect.bottom + round(20 * scale)
+            help_image = text_cache.render('F1 Memory   F2 Pong   F5 new game   Esc menu', '', max(8, round(22 * scale)),
+                                           self.fg_color, self.bg_color)
+            self.surface.blit(help_image, help_image.get_rect(midbottom=(width // 2, height - round(20 * scale))))
+        self.renderer.flush()
+
+    def is_static(self):
+        # - self is the MenuScene to check
+        return not self.renderer.is_dirty()
+
+
+class MemoryScene(Scene):
+    # An object in this class plays a game of Memory in the launcher's window.
+
+    title = 'Memory'
+
+    def __init__(self, launcher, rows=4, columns=None, generate_faces=False):
+        # Initialize a MemoryScene with a new game.
+        # - self is the MemoryScene to initialize
+        # - launcher is the Launcher showing the scene
+        # - rows, columns and generate_faces set up the board as in memory.Game
+
+        import memory
+        Scene.__init__(self, launcher)
+        # The game's time only runs while it is shown
+        self.clock = PausableClock()
+        # The images are read while the first frame already shows the board, unless an earlier game read them
+        self.game = memory.Game(launcher.surface, launcher.assets, launcher.text_cache, rows, columns, generate_faces,
+                                clock=self.clock.now, load_in_background=True)
+        self.game.leaderboard = launcher.leaderboard
+        self.game.player = launcher.player
+        self.FPS = self.game.FPS
+
+    def resume(self, surface):
+        # - self is the MemoryScene to show
+        # - surface is the display window surface object
+        self.clock.resume()
+        self.game.resize(surface)
+
+    def suspend(self):
+        # - self is the MemoryScene to put aside
+        self.clock.pause()
+
+    def play_frame(self, events):
+        # The frame of memory.Game.play, with the launcher waiting between frames
+        # - self is the MemoryScene to play
+        # - events is the list of pygame events of the frame
+
+        game = self.game
+        game.handle_event(events)
+        game.draw()
+        if game.continue_game:
+            game.update()
+            game.decide_continue()
+
+    def is_static(self):
+        # - self is the MemoryScene to check
+        return self.game.is_static()
+
+    def get_wait_time(self):
+        # - self is the MemoryScene to check
+        return self.game.get_wait_time()
+
+
+class PongScene(Scene):
+    # An object in this class plays a match of Pong in the launcher's window.
+
+    title = 'Pong'
+
+    def __init__(self, launcher, ai=None, ai_level='normal'):
+        # Initialize a PongScene with a new match.
+        # - self is the PongScene to initialize
+        # - launcher is the Launcher showing the scene
+        # - ai is 'left', 'right' or 'both' to let the computer move those paddles, or None
+        # - ai_level is the name of a level in pong_ai.LEVELS
+
+        import pong
+        from pong_ai import LEVELS
+        Scene.__init__(self, launcher)
+        self.game = pong.Game(launcher.surface, launcher.text_cache, random.Random(), pong.FIELD_SIZE)
+        if ai:
+            reaction_steps, error = LEVELS[ai_level]
+            for side in (['left', 'right'] if ai == 'both' else [ai]):
+                self.game.add_ai(side, reaction_steps, error)
+        self.FPS = self.game.FPS
+        self.accumulator = 0.0  # seconds of game time that have passed but not been simulated yet
+        self.previous_time = time.perf_counter()
+
+    def resume(self, surface):
+        # - self is the PongScene to show
+        # - surface is the display window surface object
+        self.game.resize(surface)
+        # The time the match was away is not played
+        self.previous_time = time.perf_counter()
+
+    def suspend(self):
+        # - self is the PongScene to put aside
+
+        # Keys let go of while another scene is shown never reach the match, so the paddles stop here
+        self.game.left_paddle.set_vertical_velocity(0)
+        self.game.right_paddle.set_vertical_velocity(0)
+
+    def play_frame(self, events):
+        # The frame of pong.Game.play, with the launcher keeping the frame rate
+        # - self is the PongScene to play
+        # - events is the list of pygame events of the frame
+
+        game = self.game
+        game.handle_events(events)
+        step_time = 1 / game.physics_rate
+        now = time.perf_counter()
+        self.accumulator = self.accumulator + now - self.previous_time
+        self.previous_time = now
+        steps = 0
+        while self.accumulator >= step_time and steps < game.max_steps_per_frame:
+            game.step()
+            self.accumulator = self.accumulator - step_time
+            steps = steps + 1
+        if self.accumulator >= step_time:
+            self.accumulator = self.accumulator % step_time
+        game.draw(self.accumulator / step_time)
+
+
+class Launcher:
+    # An object in this class owns the window and the event loop and shows one scene at a time.
+
+    def __init__(self, surface, scene_types, text_cache=None, assets=None):
+        # Initialize a Launcher. No scene is created until it is shown.
+        # - self is the Launcher to initialize
+        # - surface is the display window surface object
+        # - scene_types is the dictionary from scene name to the function that creates the scene,
+        #   taking the Launcher; SCENE_KEYS switch to the scenes named 'memory', 'pong' and 'menu'
+        # - text_cache is the TextCache all scenes share (a new one when None)
+        # - assets is the AssetManager all scenes share (a new one for the Memory images when None)
+
+        self.surface = surface
+        self.scene_types = scene_types
+        self.scenes = {}  # scene name -> Scene created so far, shown or suspended
+        self.scene = None  # Scene shown
+        self.scene_name = None
+        if text_cache is None:
+            text_cache = TextCache()
+        self.text_cache = text_cache
+        if assets is None:
+            assets = AssetManager(MEMORY_DIRECTORY)
+        self.assets = assets
+        # A leaderboard.Leaderboard every Memory game is submitted to, under the name in player
+        self.leaderboard = None
+        self.player = None
+        self.game_Clock = pygame.time.Clock()
+        self.close_clicked = False
+        # Events received while the loop slept in wait_for_event, handled on the next frame
+        self.waited_events = []
+        # A switch is timed from the key press to the first frame the new scene has drawn
+        self.switch_start = None
+        self.switch_created = False
+        self.switches = []  # (scene name, seconds the switch took, True if the scene was created)
+
+    def play(self):
+        # Show scenes until the player presses the close box or Esc in the menu
+        # - self is the Launcher to run
+
+        while not self.close_clicked:
+            events = self.handle_events(self.waited_events + pygame.event.get())
+            self.waited_events = []
+            if self.close_clicked:
+                break
+            scene = self.scene
+            scene.play_frame(events)
+            if self.switch_start is not None and scene is self.scene:
+                self.switches.append((self.scene_name, time.perf_counter() - self.switch_start, self.switch_created))
+                self.switch_start = None
+            if self.scene.is_static():
+                self.wait_for_event()
+            else:
+                self.game_Clock.tick(self.scene.FPS)
+
+    def handle_events(self, events):
+        # Act on the events that switch scenes and return the others for the scene shown
+        # - self is the Launcher
+        # - events is the list of pygame events of the frame
+
+        scene_events = []
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.close_clicked = True
+            elif event.type == pygame.KEYDOWN and event.key in SCENE_KEYS:
+                name = SCENE_KEYS[event.key]
+                if name == 'menu' and self.scene_name == 'menu':
+                    self.close_clicked = True
+                else:
+                    self.show(name)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5 and self.scene_name != 'menu':
+                self.restart()
+            else:
+                if event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED) and pygame.display.get_surface() is not None:
+                    # The scene shown lays itself out again; the others do when they are resumed
+                    self.surface = pygame.display.get_surface()
+                scene_events.append(event)
+        return scene_events
+
+    def wait_for_event(self):
+        # Sleep until an event arrives or until the scene shown changes by itself
+        # - self is the Launcher that waits
+
+        timeout = self.scene.get_wait_time()
+        if timeout is None:
+            event = pygame.event.wait()
+        else:
+            event = pygame.event.wait(max(1, timeout))
+        if event.type != pygame.NOEVENT:
+            self.waited_events.append(event)
+
+    def show(self, name):
+        # Switch to a scene, creating it if it was never shown and suspending the one shown before
+        # - self is the Launcher
+        # - name is the string name of the scene in scene_types
+
+        if name == self.scene_name:
+            return
+        start = time.perf_counter()
+        if self.scene is not None:
+            self.scene.suspend()
+        scene = self.scenes.get(name)
+        created = scene is None
+        if created:
+            scene = self.scene_types[name](self)
+            self.scenes[name] = scene
+        self.scene = scene
+        self.scene_name = name
+        scene.resume(self.surface)
+        pygame.display.set_caption(scene.title)
+        self.switch_start = start
+        self.switch_created = created
+
+    def restart(self):
+        # Replace the scene shown with a new one, such as a new game
+        # - self is the Launcher
+
+        name = self.scene_name
+        self.scenes.pop(name).close()
+        self.scene = None
+        self.scene_name = None
+        self.show(name)
+
+    def close(self):
+        # Close every scene and the leaderboard
+        # - self is the Launcher to close
+
+        for scene in self.scenes.values():
+            scene.close()
+        self.scenes = {}
+        if self.leaderboard is not None:
+            # A leaderboard file that cannot be written costs the stored games, not the shutdown
+            try:
+                self.leaderboard.close()
+            except sqlite3.Error as error:
+                print('warning: the leaderboard %s could not be used: %s' % (self.leaderboard.path, error))
+
+    def report_switches(self):
+        # Print how long every switch took, from the key press to the first frame of the new scene
+        # - self is the Launcher
+        for name, seconds, created in self.switches:
+            print('%-7s %7.2f ms%s' % (name, seconds * 1000, '  (created)' if created else ''))
@@ -0,0 +1,2 @@
+# Helpers shared by the Pygame games in this repository.
+# Each game adds the repository root to sys.path so that it can import from this package.
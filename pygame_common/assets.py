@@ -0,0 +1,200 @@
+# Image asset cache shared by the games.
+# Every image file is read from disk once, converted to the pixel format of the display
+# (when there is one) and then handed out as the same Surface to every object that draws it.
+# The images can also be packed into a single atlas Surface, in which case a lookup returns
+# the atlas together with the area of the atlas that holds the image.
+# Files can be read on a background thread while the game already shows its first frames.
+# Scaled copies are made with smoothscale once per image and size, and only the most recently
+# used sizes are kept, so resizing a window many times does not keep every old size alive.
+
+import os
+import threading
+from collections import OrderedDict
+import pygame
+
+
+class AssetManager:
+    # An object in this class loads image files once and keeps the loaded Surfaces.
+
+    def __init__(self, directory='', max_scaled=64):
+        # Initialize an AssetManager.
+        # - self is the AssetManager to initialize
+        # - directory is the string path that relative filenames are resolved against
+        # - max_scaled is the int number of scaled images kept before the least recently used is dropped
+
+        self.directory = directory
+        self.images = {}  # filename -> converted Surface
+        self.scaled = OrderedDict()  # (filename, size) -> Surface scaled to size, least recently used first
+        self.max_scaled = max_scaled
+        self.atlas = None  # Surface holding every packed image, or None
+        self.atlas_size = None  # size every packed image was scaled to, or None
+        self.atlas_areas = {}  # filename -> Rect of the image inside self.atlas
+        self.loader = None  # Thread reading files in the background, until finish_loading
+        self.loaded = {}  # filename -> Surface read by the loader, not converted yet
+        self.load_error = None  # exception raised in the loader
+
+    def path(self, filename):
+        # Return the full path of an image file
+        # - filename is the string filename of the image
+        return os.path.join(self.directory, filename)
+
+    def load(self, filename):
+        # Return the Surface of an image, reading it from disk only the first time
+        # - filename is the string filename of the image
+
+        image = self.images.get(filename)
+        if image is None and self.loader is not None:
+            # The file may be on its way from the background loader
+            self.finish_loading()
+            image = self.images.get(filename)
+        if image is None:
+            image = self.convert(pygame.image.load(self.path(filename)))
+            self.images[filename] = image
+        return image
+
+    def convert(self, image):
+        # Return an image converted to the pixel format of the display, for fast blits
+        # - image is the Surface read from a file
+
+        # convert() needs a display mode; headless users without a window keep the file format
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            if image.get_flags() & pygame.SRCALPHA:
+                return image.convert_alpha()
+            return image.convert()
+        return image
+
+    def start_loading(self, filenames):
+        # Start reading image files on a background thread.
+        # The images are ready once is_ready() is True and finish_loading() has been called;
+        # load() waits for the thread instead of reading a file a second time.
+        # - filenames is the list of string filenames to read
+
+        self.finish_loading()
+        names = [name for name in dict.fromkeys(filenames) if name not in self.images]
+        if not names:
+            return
+        self.loaded = {}
+        self.load_error = None
+        self.loader = threading.Thread(target=self.read_files, args=(names,), daemon=True)
+        self.loader.start()
+
+    def read_files(self, filenames):
+        # Read image files into self.loaded; runs on the loader thread
+        # - filenames is the list of string filenames to read
+        try:
+            for filename in filenames:
+                self.loaded[filename] = pygame.image.load(self.path(filename))
+        except Exception as error:
+            self.load_error = error
+
+    def is_loading(self):
+        # Return True if images started with start_loading are not in the cache yet
+        return self.loader is not None
+
+    def is_ready(self):
+        # Return True if finish_loading can run without waiting for the loader thread
+        return self.loader is None or not self.loader.is_alive()
+
+    def finish_loading(self):
+        # Wait for the loader thread and put the images it read into the cache, converted for the display.
+        # Raises the error the loader ran into, if any.
+
+        if self.loader is None:
+            return
+        self.loader.join()
+        self.loader = None
+        for filename, image in self.loaded.items():
+            self.images[filename] = self.convert(image)
+        self.loaded = {}
+        if self.load_error is not None:
+            error = self.load_error
+            self.load_error = None
+            raise error
+
+    def add_image(self, name, image):
+        # Keep an image that was made by the program instead of read from a file
+        # - name is the string name used to look the image up
+        # - image is the Surface of the image
+        self.images[name] = image
+        # Scaled copies of an image that was replaced are out of date
+        for key in [key for key in self.scaled if key[0] == name]:
+            del self.scaled[key]
+
+    def load_scaled(self, filename, size):
+        # Return an image scaled to a size, scaling it only the first time
+        # - filename is the string filename of the image
+        # - size is the (width, height) of the scaled image
+
+        image = self.load(filename)
+        size = tuple(size)
+        if image.get_size() == size:
+            return image
+        key = (filename, size)
+        scaled = self.scaled.get(key)
+        if scaled is None:
+            if image.get_bitsize() >= 24:
+                scaled = pygame.transform.smoothscale(image, size)
+            else:
+                # smoothscale only works on 24 and 32 bit images
+                deep = pygame.Surface(image.get_size(), 0, 32)
+                deep.blit(image, (0, 0))
+                scaled = self.convert(pygame.transform.smoothscale(deep, size))
+            self.scaled[key] = scaled
+            if len(self.scaled) > self.max_scaled:
+                self.scaled.popitem(last=False)
+        else:
+            self.scaled.move_to_end(key)
+        return scaled
+
+    def build_atlas(self, filenames, size=None):
+        # Pack a group of images into one atlas Surface, left to right in rows.
+        # Does nothing if the images are already packed at that size.
+        # - filenames is the list of string filenames to pack
+        # - size is the (width, height) to scale every image to, or None to keep their size
+
+        names = list(dict.fromkeys(filenames))  # drop repeated names, keeping the order
+        if size is not None:
+            size = tuple(size)
+        if self.atlas is not None and size == self.atlas_size:
+            if all(name in self.atlas_areas for name in names):
+                return self.atlas
+            # Keep the images that were packed before so earlier lookups stay valid
+            names = list(dict.fromkeys(names + list(self.atlas_areas)))
+        if size is None:
+            images = [self.load(name) for name in names]
+        else:
+            images = [self.load_scaled(name, size) for name in names]
+
+        # Pack into roughly square rows so the atlas does not exceed texture size limits
+        per_row = max(1, int(len(images) ** 0.5 + 0.5))
+        areas = []
+        atlas_width = 0
+        atlas_height = 0
+        for start in range(0, len(images), per_row):
+            row = images[start:start + per_row]
+            x = 0
+            row_height = 0
+            for image in row:
+                areas.append(pygame.Rect(x, atlas_height, image.get_width(), image.get_height()))
+                x = x + image.get_width()
+                row_height = max(row_height, image.get_height())
+            atlas_width = max(atlas_width, x)
+            atlas_height = atlas_height + row_height
+
+        atlas = pygame.Surface((atlas_width, atlas_height), 0, images[0])
+        for image, area in zip(images, areas):
+            atlas.blit(image, area)
+        self.atlas = atlas
+        self.atlas_size = size
+        self.atlas_areas = dict(zip(names, areas))
+        return atlas
+
+    def get(self, filename):
+        # Return the (Surface, area) pair to blit for an image.
+        # The area is None when the image is not part of the atlas.
+        # - filename is the string filename of the image
+
+        area = self.atlas_areas.get(filename)
+        if area is not None:
+            return self.atlas, area
+        return self.load(filename), None
@@ -0,0 +1,229 @@
+# Frame capture shared by the games.
+# After a game has drawn a frame, capture() copies the pixels of its surface straight out of the
+# surface's buffer into one of a few preallocated arrays, without making a Surface. A writer
+# thread takes the arrays from a bounded queue and either pipes the raw pixels to an encoder such
+# as ffmpeg or saves them as a sequence of PNG files, then hands the arrays back for reuse. The
+# memory used is therefore the same however long the recording is; when the writer falls behind,
+# capture() waits for it (or drops the frame, if asked to), so headless runs go as fast as the
+# encoder allows.
+#
+# Frames are stamped with their game time. A video has a fixed frame rate, so every captured
+# frame is written as often as the video frames it stays on screen for: once per step for Pong
+# at the video rate, many times for a Memory board that sat still for a few seconds.
+
+import math
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pygame
+
+
+def get_pixel_layout(surface):
+    # Return (pix_fmt, channels) describing how the pixels of a surface are laid out in memory:
+    # the ffmpeg pixel format name and the byte offsets of red, green and blue within a pixel
+    # - surface is the pygame.Surface to describe
+
+    bytesize = surface.get_bytesize()
+    if bytesize not in (3, 4):
+        raise ValueError('only 24 and 32 bit surfaces can be captured, not %d bit' % surface.get_bitsize())
+    names = ['0'] * bytesize
+    channels = []
+    for name, shift in zip('rgb', surface.get_shifts()[:3]):
+        offset = shift // 8
+        if sys.byteorder == 'big':
+            offset = bytesize - 1 - offset
+        names[offset] = name
+        channels.append(offset)
+    pix_fmt = ''.join(names)
+    if bytesize == 3:
+        pix_fmt = pix_fmt + '24'
+    return pix_fmt, channels
+
+
+def get_encoder_error(path, command=None):
+    # Return a message saying why frames cannot be written to an output, or None if they can
+    # - path is the string name of the output, as given to FrameCapture
+    # - command is the list of the encoder program and its arguments (ffmpeg when None)
+
+    if path.lower().endswith('.png'):
+        return None
+    program = command[0] if command else 'ffmpeg'
+    if shutil.which(program) is None:
+        return ('%s was not found, so the video %s cannot be written; install it or capture numbered PNG files '
+                'instead, with a name ending in .png' % (program, path))
+    return None
+
+
+class FrameCapture:
+    # An object in this class copies the frames of a surface and writes them to a video or PNG files on a thread.
+
+    def __init__(self, path, surface, fps=60, max_frames=8, block=True, command=None):
+        # Initialize a FrameCapture and start its writer thread.
+        # - self is the FrameCapture to initialize
+        # - path is the string name of the output: a name ending in .png writes one file per frame,
+        #   numbered with a %d pattern in the name (or before .png when there is none); any other
+        #   name is a video written by the encoder
+        # - surface is the pygame.Surface whose frames are captured; its size must not change
+        # - fps is the int frame rate of the output
+        # - max_frames is the int number of frames that can wait for the writer
+        # - block is True to wait for the writer when max_frames are waiting, False to drop the frame
+        # - command is the list of the encoder program and its arguments, reading raw frames from
+        #   stdin (ffmpeg writing path when None)
+
+        self.path = path
+        self.size = surface.get_size()
+        self.fps = fps
+        self.block = block
+        self.pix_fmt, self.channels = get_pixel_layout(surface)
+        self.bytesize = surface.get_bytesize()
+        self.pitch = surface.get_pitch()
+        self.frames = 0  # number of output frames written or queued
+        self.dropped = 0  # number of captures dropped because the writer was behind
+        self.start_time = None  # game time of the first captured frame
+        self.held = None  # (buffer, time) of the last frame, queued once the next frame shows how long it stayed
+        self.free = queue.Queue()  # buffers ready to be filled
+        for index in range(max_frames + 1):
+            self.free.put(np.empty((self.size[1], self.pitch), np.uint8))
+        self.pending = queue.Queue()  # (buffer, count) waiting to be written, then None to stop
+        self.write_error = None  # exception raised in the writer
+
+        if path.lower().endswith('.png'):
+            if '%' not in path:
+                path = path[:-4] + '%05d.png'
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.pattern = path
+            self.encoder = None
+        else:
+            error = get_encoder_error(path, command)
+            if error is not None:
+                raise RuntimeError(error)
+            if command is None:
+                command = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', self.pix_fmt,
+                           '-s', '%dx%d' % self.size, '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', path]
+            self.pattern = None
+            self.encoder = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.writer = threading.Thread(target=self.write_frames, daemon=True)
+        self.writer.start()
+
+    def capture(self, surface, time=None):
+        # Copy the pixels of a frame that was just drawn.
+        # Returns False if the frame was dropped because the writer is behind and block is False.
+        # - surface is the pygame.Surface the frame was drawn on
+        # - time is the float game time in seconds the frame is shown at, or None to make it exactly one output frame
+
+        if surface.get_size() != self.size:
+            raise ValueError('the captured surface changed size from %s to %s' % (self.size, surface.get_size()))
+        if self.write_error is not None:
+            raise self.write_error
+        try:
+            buffer = self.free.get(self.block)
+        except queue.Empty:
+            self.dropped = self.dropped + 1
+            return False
+        # A view of the surface's own pixels; deleting it unlocks the surface again
+        pixels = np.frombuffer(surface.get_buffer(), np.uint8)
+        np.copyto(buffer, pixels.reshape(buffer.shape))
+        del pixels
+        if time is None:
+            self.release_held(1)
+            self.pending.put((buffer, 1))
+            self.frames = self.frames + 1
+        else:
+            if self.start_time is None:
+                self.start_time = time
+            self.release_held(self.get_frame_count(time))
+            self.held = (buffer, time)
+        return True
+
+    def get_frame_count(self, time):
+        # Return the int number of output frames the held frame stays on screen for until a game time
+        # - time is the float game time in seconds
+        if self.held is None:
+            return 0
+        # Output frame k shows the game at start_time + k / fps
+        first = math.ceil(round((self.held[1] - self.start_time) * self.fps, 6))
+        last = math.ceil(round((time - self.start_time) * self.fps, 6))
+        return max(0, last - first)
+
+    def release_held(self, count):
+        # Queue the held frame to be written count times, or give its buffer back when count is 0
+        # - count is the int number of output frames
+        if self.held is None:
+            return
+        buffer = self.held[0]
+        self.held = None
+        if count > 0:
+            self.pending.put((buffer, count))
+            self.frames = self.frames + count
+        else:
+            self.free.put(buffer)
+
+    def write_frames(self):
+        # Write queued frames until None is queued; runs on the writer thread
+        number = 0
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            buffer, count = item
+            try:
+                if self.write_error is None:
+                    if self.encoder is not None:
+                        self.write_raw(buffer, count)
+                    else:
+                        self.write_png(buffer, count, number)
+            except Exception as error:
+                self.write_error = error
+            number = number + count
+            self.free.put(buffer)
+
+    def write_raw(self, buffer, count):
+        # Send a frame to the encoder count times
+        # - buffer is the array with the frame's pixel rows
+        # - count is the int number of output frames
+        row_bytes = self.size[0] * self.bytesize
+        if row_bytes != self.pitch:
+            # Rows of a surface can be padded; the encoder wants them back to back
+            buffer = np.ascontiguousarray(buffer[:, :row_bytes])
+        data = memoryview(buffer).cast('B')
+        for repeat in range(count):
+            self.encoder.stdin.write(data)
+
+    def write_png(self, buffer, count, number):
+        # Save a frame as count numbered PNG files
+        # - buffer is the array with the frame's pixel rows
+        # - count is the int number of output frames
+        # - number is the int number of the first file
+        width, height = self.size
+        pixels = buffer[:, :width * self.bytesize].reshape(height, width, self.bytesize)
+        rgb = np.ascontiguousarray(pixels[:, :, self.channels])
+        first = self.pattern % number
+        pygame.image.save(pygame.image.frombuffer(rgb, self.size, 'RGB'), first)
+        for index in range(number + 1, number + count):
+            # Frames the game showed for longer are the same picture again
+            shutil.copyfile(first, self.pattern % index)
+
+    def close(self, time=None):
+        # Write the remaining frames and wait until the output is complete.
+        # Raises the error the writer ran into, if any.
+        # - time is the float game time in seconds the last held frame stays on screen until
+        #   (one output frame more when None)
+
+        if self.held is not None:
+            count = 1 if time is None else max(1, self.get_frame_count(time))
+            self.release_held(count)
+        self.pending.put(None)
+        self.writer.join()
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            if self.encoder.wait() != 0 and self.write_error is None:
+                self.write_error = RuntimeError('the encoder stopped with exit status %d' % self.encoder.returncode)
+        if self.write_error is not None:
+            raise self.write_error
@@ -0,0 +1,102 @@
+# Input-to-display latency probe shared by the games.
+# When an input is read, the game starts a measurement together with the value it expects the
+# input to change on screen, such as the drawn position of a paddle. After every frame has been
+# pushed to the display the game passes the values as drawn; the first frame whose value differs
+# ends the measurement. The probe keeps the time from reading the input to that frame and the
+# number of frames it took, and reports their distributions.
+
+import time
+
+
+def get_percentile(values, fraction):
+    # Return the value below which a fraction of a sorted list of values lies
+    # - values is the sorted list of numbers, not empty
+    # - fraction is the float fraction between 0 and 1
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class LatencyProbe:
+    # An object in this class measures how long inputs take to show on the display.
+
+    def __init__(self, max_frames=60):
+        # Initialize a LatencyProbe.
+        # - self is the LatencyProbe to initialize
+        # - max_frames is the int number of frames after which an input that changed nothing is given up
+
+        self.max_frames = max_frames
+        self.frame = 0  # number of frames shown so far
+        self.pending = {}  # name -> (start time, frame number, value when the input was read)
+        self.latencies = []  # seconds from reading an input to the frame showing it
+        self.frame_counts = []  # frames shown from reading an input up to and including the one showing it
+        self.given_up = 0  # inputs taken back or not shown within max_frames, such as a paddle pushed against a wall
+
+    def start(self, name, value, now=None):
+        # Start measuring an input. An input whose earlier one has not shown yet is not measured
+        # on its own, since the next change on screen belongs to the earlier one.
+        # - name is the string name of what the input changes, such as 'left paddle'
+        # - value is what is drawn for it now; the measurement ends when a frame draws something else
+        # - now is the float time.perf_counter() the input was read at (the current time when None)
+
+        if name in self.pending:
+            return
+        if now is None:
+            now = time.perf_counter()
+        self.pending[name] = (now, self.frame, value)
+
+    def check(self, name, value, now=None):
+        # Tell the probe what a frame that was just pushed to the display shows
+        # - name is the string name given to start
+        # - value is what the frame drew for it
+        # - now is the float time.perf_counter() the frame was pushed at (the current time when None)
+
+        measurement = self.pending.get(name)
+        if measurement is None or measurement[2] == value:
+            return
+        if now is None:
+            now = time.perf_counter()
+        start_time, start_frame, start_value = measurement
+        self.latencies.append(now - start_time)
+        self.frame_counts.append(self.frame - start_frame + 1)
+        del self.pending[name]
+
+    def cancel(self, name):
+        # Give up measuring an input that was taken back before it showed, such as a key released again
+        # - name is the string name given to start
+        if self.pending.pop(name, None) is not None:
+            self.given_up = self.given_up + 1
+
+    def end_frame(self):
+        # Count a frame, giving up on inputs that have waited for max_frames frames
+        self.frame = self.frame + 1
+        for name, measurement in list(self.pending.items()):
+            if self.frame - measurement[1] >= self.max_frames:
+                del self.pending[name]
+                self.given_up = self.given_up + 1
+
+    def get_stats(self):
+        # Return a dictionary with the number of measured inputs and the latency and frame count percentiles, or None
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        frame_counts = sorted(self.frame_counts)
+        return {'inputs': len(latencies), 'given_up': self.given_up,
+                'mean_ms': 1000 * sum(latencies) / len(latencies),
+                'min_ms': 1000 * latencies[0],
+                'p50_ms': 1000 * get_percentile(latencies, 0.5),
+                'p90_ms': 1000 * get_percentile(latencies, 0.9),
+                'p99_ms': 1000 * get_percentile(latencies, 0.99),
+                'max_ms': 1000 * latencies[-1],
+                'frames_p50': get_percentile(frame_counts, 0.5),
+                'frames_max': frame_counts[-1]}
+
+    def report(self):
+        # Print the latency distribution
+        stats = self.get_stats()
+        if stats is None:
+            print('input latency: no inputs measured')
+            return
+        print('input latency over %d inputs: min %.1f ms, p50 %.1f ms, p90 %.1f ms, p99 %.1f ms, max %.1f ms, mean %.1f ms'
+              % (stats['inputs'], stats['min_ms'], stats['p50_ms'], stats['p90_ms'], stats['p99_ms'], stats['max_ms'],
+                 stats['mean_ms']))
+        print('frames until shown: p50 %d, max %d; %d inputs never showed'
+              % (stats['frames_p50'], stats['frames_max'], stats['given_up']))
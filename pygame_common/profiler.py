@@ -0,0 +1,153 @@
+# Per-phase frame profiler shared by the games.
+# A game loop marks the end of every phase of a frame (handling events, updating, drawing,
+# waiting for the clock). The profiler keeps the timings of the last frames in a ring buffer,
+# can draw an overlay with the frame rate, the median and 99th percentile frame time and the
+# slowest phase, and can write the frames it kept to a CSV or JSON file.
+
+import time
+import pygame
+
+
+class FrameProfiler:
+    # An object in this class records how long each phase of the last frames took.
+
+    def __init__(self, phases, capacity=600):
+        # Initialize a FrameProfiler.
+        # - self is the FrameProfiler to initialize
+        # - phases is the list of string phase names, in the order they run in a frame
+        # - capacity is the int number of frames kept in the ring buffer
+
+        self.phases = list(phases)
+        self.capacity = capacity
+        # One preallocated list per phase, plus the frame start times and totals, used as a ring buffer
+        self.timings = dict((phase, [0.0] * capacity) for phase in self.phases)
+        self.starts = [0.0] * capacity
+        self.totals = [0.0] * capacity
+        self.frame_numbers = [0] * capacity
+        self.index = 0  # slot of the frame being recorded
+        self.count = 0  # number of finished frames, including the ones overwritten
+        self.origin = time.perf_counter()
+        self.frame_start = self.origin
+        self.last_mark = self.origin
+
+        # Overlay state; the text is only rendered again a few times per second
+        self.overlay_interval = 0.5
+        self.overlay_updated = 0.0
+        self.overlay_image = None
+
+    def begin_frame(self):
+        # Start recording a new frame
+        now = time.perf_counter()
+        self.frame_start = now
+        self.last_mark = now
+        for phase in self.phases:
+            self.timings[phase][self.index] = 0.0
+
+    def mark(self, phase):
+        # Record that a phase ended now; it took the time since the previous mark
+        # - phase is the string name of the phase
+        now = time.perf_counter()
+        self.timings[phase][self.index] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        # Finish recording the current frame
+        now = time.perf_counter()
+        self.starts[self.index] = self.frame_start - self.origin
+        self.totals[self.index] = now - self.frame_start
+        self.frame_numbers[self.index] = self.count
+        self.count += 1
+        self.index = (self.index + 1) % self.capacity
+
+    def get_frames(self):
+        # Return the slots of the kept frames, oldest first
+        kept = min(self.count, self.capacity)
+        first = (self.index - kept) % self.capacity
+        return [(first + offset) % self.capacity for offset in range(kept)]
+
+    def get_stats(self):
+        # Return a dictionary with the frame rate, frame time percentiles and mean phase times (in ms) of the kept frames
+        slots = self.get_frames()
+        if not slots:
+            return None
+        totals = sorted(self.totals[slot] for slot in slots)
+        span = self.starts[slots[-1]] + self.totals[slots[-1]] - self.starts[slots[0]]
+        phase_means = dict((phase, 1000 * sum(self.timings[phase][slot] for slot in slots) / len(slots))
+                           for phase in self.phases)
+        return {'frames': len(slots),
+                'fps': len(slots) / span if span > 0 else 0.0,
+                'p50_ms': 1000 * totals[len(totals) // 2],
+                'p99_ms': 1000 * totals[min(len(totals) - 1, len(totals) * 99 // 100)],
+                'phase_ms': phase_means,
+                'slowest_phase': max(self.phases, key=lambda phase: phase_means[phase])}
+
+    def draw_overlay(self, renderer, text_cache):
+        # Draw the statistics along the bottom of the renderer's surface, just before it is flushed.
+        # Meant to be added with DirtyRenderer.add_overlay.
+        # - renderer is the DirtyRenderer of the game
+        # - text_cache is the TextCache used to render the text
+
+        now = time.perf_counter()
+        changed = False
+        if self.overlay_image is None or now - self.overlay_updated >= self.overlay_interval:
+            stats = self.get_stats()
+            if stats is not None:
+                text = '%.0f fps  p50 %.1f ms  p99 %.1f ms  %s %.2f ms' % (
+                    stats['fps'], stats['p50_ms'], stats['p99_ms'], stats['slowest_phase'],
+                    stats['phase_ms'][stats['slowest_phase']])
+                # Rendered directly; the text changes all the time, so caching it would only evict useful images
+                text_image = text_cache.get_font('', 20).render(text, True, 'yellow', 'black')
+                # The strip is as wide as the window, so a shorter text never leaves the old one behind
+                surface = renderer.surface
+                self.overlay_image = pygame.Surface((surface.get_width(), text_image.get_height()))
+                self.overlay_image.blit(text_image, (0, 0))
+                self.overlay_updated = now
+                changed = True
+        if self.overlay_image is None:
+            return
+
+        surface = renderer.surface
+        rect = self.overlay_image.get_rect(bottomleft=(0, surface.get_height()))
+        if changed or renderer.collides(rect):
+            surface.blit(self.overlay_image, rect)
+            renderer.mark(rect)
+
+    def dump(self, path):
+        # Write the kept frames to a file, as JSON if the name ends in .json and as CSV otherwise
+        # - path is the string name of the file
+
+        # Only needed when a trace is written, so they do not slow down starting a game
+        import csv
+        import json
+
+        rows = []
+        for slot in self.get_frames():
+            row = {'frame': self.frame_numbers[slot],
+                   'start_ms': round(1000 * self.starts[slot], 4),
+                   'total_ms': round(1000 * self.totals[slot], 4)}
+            for phase in self.phases:
+                row[phase + '_ms'] = round(1000 * self.timings[phase][slot], 4)
+            rows.append(row)
+
+        if path.endswith('.json'):
+            with open(path, 'w') as trace_file:
+                json.dump({'summary': self.get_stats(), 'frames': rows}, trace_file, indent=1)
+        else:
+            with open(path, 'w', newline='') as trace_file:
+                writer = csv.DictWriter(trace_file, ['frame', 'start_ms', 'total_ms'] + [phase + '_ms' for phase in self.phases])
+                writer.writeheader()
+                writer.writerows(rows)
+
+
+class NullProfiler:
+    # An object in this class has the methods of FrameProfiler but records nothing,
+    # so game loops can call it without checking whether profiling is on.
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
@@ -0,0 +1,75 @@
+# Dirty-rectangle rendering shared by the games.
+# Instead of pushing the whole window to the display every frame, a game marks the
+# rectangles that changed and the renderer updates only those parts of the display.
+# A frame that marked nothing does no display work at all.
+
+import pygame
+
+
+class DirtyRenderer:
+    # An object in this class collects the dirty rectangles of one display surface.
+
+    def __init__(self, surface, max_rects=64):
+        # Initialize a DirtyRenderer.
+        # - self is the DirtyRenderer to initialize
+        # - surface is the display surface whose changes are tracked
+        # - max_rects is the int number of rectangles above which they are merged into one
+
+        self.surface = surface
+        self.max_rects = max_rects
+        self.rects = []
+        # The first frame has to draw and update everything
+        self.full = True
+        # Functions drawn on top of the game just before every flush, such as a profiler overlay
+        self.overlays = []
+
+    def mark(self, rect):
+        # Remember that a rectangle of the surface changed
+        # - rect is the pygame.Rect (or rect-like tuple) that changed
+
+        rect = pygame.Rect(rect).clip(self.surface.get_rect())
+        if rect.width and rect.height:
+            self.rects.append(rect)
+
+    def set_surface(self, surface):
+        # Track a new display surface, for example after the window was resized, and redraw everything
+        # - surface is the display surface whose changes are tracked from now on
+        self.surface = surface
+        self.rects = []
+        self.full = True
+
+    def mark_all(self):
+        # Remember that the whole surface has to be redrawn and updated
+        self.full = True
+
+    def is_dirty(self):
+        # Return True if anything has to be updated this frame
+        return self.full or len(self.rects) > 0
+
+    def collides(self, rect):
+        # Return True if a rectangle overlaps an area that is updated this frame
+        # - rect is the pygame.Rect to check
+        return self.full or rect.collidelist(self.rects) != -1
+
+    def add_overlay(self, overlay):
+        # Draw something on top of the game before every flush
+        # - overlay is a function taking this DirtyRenderer; it draws onto self.surface and marks what it drew
+        self.overlays.append(overlay)
+
+    def flush(self):
+        # Push the dirty parts of the surface to the display and start a new frame.
+        # Returns True if anything was pushed, False if the frame was the same as the last one.
+
+        for overlay in self.overlays:
+            overlay(self)
+        changed = self.is_dirty()
+        if self.full:
+            pygame.display.update()
+        elif len(self.rects) > self.max_rects:
+            # Many small rectangles cost more to push one by one than their bounding box
+            pygame.display.update(self.rects[0].unionall(self.rects[1:]))
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects = []
+        self.full = False
+        return changed
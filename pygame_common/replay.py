@@ -0,0 +1,176 @@
+# Compact binary recording of game input, for replaying a game exactly.
+#
+# A recording starts with a header holding the random seed the game was created with and its
+# settings (as JSON), followed by one record per input. Every record is
+#   tick (unsigned varint, difference from the previous record's tick)
+#   type (one byte)
+#   payload (depends on the type)
+# The meaning of a tick is up to the game: Pong uses the number of physics steps run so far and
+# Memory uses the game time in milliseconds. Records are written as they happen, so long
+# sessions never build up in memory.
+
+import json
+import struct
+import pygame
+
+MAGIC = b'PGRP'
+VERSION = 1
+
+# Record types
+KEYDOWN = 1  # payload: key (varint)
+KEYUP = 2  # payload: key (varint)
+MOUSEBUTTONUP = 3  # payload: x (varint), y (varint), button (byte)
+UPDATE = 4  # the game updated itself at this tick; no payload
+END = 5  # the recording ends at this tick; no payload
+
+EVENT_TYPES = {pygame.KEYDOWN: KEYDOWN, pygame.KEYUP: KEYUP, pygame.MOUSEBUTTONUP: MOUSEBUTTONUP}
+
+
+def write_varint(output, value):
+    # Append an unsigned int to a bytearray, 7 bits per byte
+    # - output is the bytearray to append to
+    # - value is the int to write, at least 0
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def read_varint(data, position):
+    # Return (value, next position) of an unsigned int written by write_varint
+    # - data is the bytes to read from
+    # - position is the int index of the first byte
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class InputRecorder:
+    # An object in this class writes the input of one game to a recording file.
+
+    def __init__(self, path, seed, settings):
+        # Initialize an InputRecorder and write the header of the recording.
+        # - self is the InputRecorder to initialize
+        # - path is the string name of the recording file
+        # - seed is the int seed of the game's random number generator
+        # - settings is a dictionary (that can be written as JSON) needed to create the same game again
+
+        self.file = open(path, 'wb')
+        settings_data = json.dumps(settings, sort_keys=True).encode('utf-8')
+        self.file.write(MAGIC + struct.pack('<BQH', VERSION, seed, len(settings_data)) + settings_data)
+        self.last_tick = 0
+        self.records = 0
+        # Memory writes the tick of the update before and after a frame with input, see record_update
+        self.last_update_tick = 0
+        self.written_update_tick = None
+        self.input_since_update = False
+
+    def write(self, tick, record_type, payload=b''):
+        # Write one record
+        # - tick is the int tick of the record, never smaller than the previous one
+        # - record_type is one of the record type constants
+        # - payload is the bytes that follow the type
+        output = bytearray()
+        write_varint(output, tick - self.last_tick)
+        output.append(record_type)
+        output += payload
+        self.file.write(output)
+        self.last_tick = tick
+        self.records += 1
+
+    def record(self, tick, event):
+        # Write an input event, if it is one that is recorded
+        # - tick is the int tick of the game when the event was handled
+        # - event is the pygame.event.Event
+
+        record_type = EVENT_TYPES.get(event.type)
+        if record_type is None:
+            return
+        payload = bytearray()
+        if record_type == MOUSEBUTTONUP:
+            write_varint(payload, max(0, event.pos[0]))
+            write_varint(payload, max(0, event.pos[1]))
+            payload.append(event.button & 0xFF)
+        else:
+            write_varint(payload, event.key)
+        self.write(tick, record_type, bytes(payload))
+
+    def record_input_after_update(self, event):
+        # Write an input event for a game whose timers run in its update method (Memory).
+        # The tick of the last update is written first, so a replay runs its timers at the same point.
+        # - event is the pygame.event.Event
+        if event.type not in EVENT_TYPES:
+            return
+        if self.written_update_tick != self.last_update_tick:
+            self.write(self.last_update_tick, UPDATE)
+            self.written_update_tick = self.last_update_tick
+        self.record(self.last_update_tick, event)
+        self.input_since_update = True
+
+    def record_update(self, tick, changed=False):
+        # Note that a game updated itself at a tick; written only right after a frame with input
+        # or when the update changed the game by itself
+        # - tick is the int tick of the update
+        # - changed is True if the update did more than count time, for example ran a timer
+        self.last_update_tick = tick
+        if self.input_since_update or changed:
+            self.write(tick, UPDATE)
+            self.written_update_tick = tick
+            self.input_since_update = False
+
+    def finish(self, tick):
+        # Write the end of the recording and close the file
+        # - tick is the int tick the game ended at
+        self.write(max(tick, self.last_tick), END)
+        self.file.close()
+
+
+class InputLog:
+    # An object in this class is a recording read back from a file.
+
+    def __init__(self, path):
+        # Read a recording.
+        # - self is the InputLog to initialize
+        # - path is the string name of the recording file
+
+        with open(path, 'rb') as log_file:
+            data = log_file.read()
+        if data[:4] != MAGIC:
+            raise ValueError('%s is not an input recording' % path)
+        version, self.seed, settings_length = struct.unpack_from('<BQH', data, 4)
+        if version != VERSION:
+            raise ValueError('%s has recording version %d, expected %d' % (path, version, VERSION))
+        position = 4 + struct.calcsize('<BQH')
+        self.settings = json.loads(data[position:position + settings_length].decode('utf-8'))
+        position += settings_length
+
+        # Every record becomes (tick, record type, pygame.event.Event or None)
+        self.records = []
+        self.end_tick = 0
+        tick = 0
+        while position < len(data):
+            delta, position = read_varint(data, position)
+            tick += delta
+            record_type = data[position]
+            position += 1
+            event = None
+            if record_type in (KEYDOWN, KEYUP):
+                key, position = read_varint(data, position)
+                event = pygame.event.Event(pygame.KEYDOWN if record_type == KEYDOWN else pygame.KEYUP, key=key)
+            elif record_type == MOUSEBUTTONUP:
+                x, position = read_varint(data, position)
+                y, position = read_varint(data, position)
+                button = data[position]
+                position += 1
+                event = pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(x, y), button=button)
+            elif record_type == END:
+                self.end_tick = tick
+                break
+            self.records.append((tick, record_type, event))
+        self.end_tick = max(self.end_tick, tick)
@@ -0,0 +1,43 @@
+# Fast startup helpers shared by the games.
+# pygame.init() starts every pygame module, including the sound mixer and the joysticks,
+# which neither game uses and which can take a long time to start on some machines (the
+# mixer opens the sound device). init_pygame starts only what the games need.
+# StartupTimer records how long after launch the first frames reached the display.
+
+import time
+import pygame
+
+
+def init_pygame():
+    # Start only the pygame modules the games use: the display (which brings events), fonts and the timer
+
+    pygame.display.init()
+    pygame.font.init()
+    # pygame.time.get_ticks reads 0 until something starts SDL's timer, which pygame.init would
+    # have done; cancelling a timer that was never set starts it
+    pygame.time.set_timer(pygame.USEREVENT, 0)
+
+
+class StartupTimer:
+    # An object in this class records the times, counted from the launch of the program, at which
+    # the steps of starting a game happened.
+
+    def __init__(self, launch_time, quit_when_done=False):
+        # Initialize a StartupTimer.
+        # - self is the StartupTimer to initialize
+        # - launch_time is the time.perf_counter() value taken as the program started
+        # - quit_when_done is True to close the game once it has fully started, for timing launches
+
+        self.launch_time = launch_time
+        self.quit_when_done = quit_when_done
+        self.marks = {}  # step name -> float seconds since launch, in the order they happened
+
+    def mark(self, name):
+        # Record the time of a step, only the first time it happens
+        # - name is the string name of the step
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.launch_time
+
+    def report(self):
+        # Print the time of every step
+        print(', '.join('%s %.1f ms' % (name, seconds * 1000) for name, seconds in self.marks.items()))
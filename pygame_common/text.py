@@ -0,0 +1,77 @@
+# Font and rendered-text cache shared by the games.
+# Font objects are created once per (name, size) because SysFont searches the system fonts
+# every time it is called. Rendered text images are kept in a least-recently-used cache, so
+# a score that has not changed is never rendered again.
+
+from collections import OrderedDict
+import pygame
+
+
+class TextCache:
+    # An object in this class creates fonts and renders text, remembering the results.
+
+    def __init__(self, max_images=128):
+        # Initialize a TextCache.
+        # - self is the TextCache to initialize
+        # - max_images is the int number of rendered images kept before the oldest is evicted
+
+        self.max_images = max_images
+        self.fonts = {}  # (name, size) -> pygame.font.Font
+        self.images = OrderedDict()  # (text, name, size, antialias, fg, bg) -> Surface
+        # Counters that show how well the cache works
+        self.font_hits = 0
+        self.font_misses = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, name, size):
+        # Return the system font with a name and size, creating it only the first time
+        # - name is the string name of the font ('' for the default font)
+        # - size is the int size of the font
+
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            self.font_misses += 1
+            font = pygame.font.SysFont(name, size)
+            self.fonts[key] = font
+        else:
+            self.font_hits += 1
+        return font
+
+    def render(self, text, name, size, fg_color, bg_color=None, antialias=True):
+        # Return the Surface with a text rendered in a font, rendering it only if it is not cached
+        # - text is the string to render
+        # - name and size select the font as in get_font
+        # - fg_color is the colour of the text
+        # - bg_color is the colour behind the text, or None for a transparent background
+
+        fg_key = tuple(pygame.Color(fg_color))
+        bg_key = None if bg_color is None else tuple(pygame.Color(bg_color))
+        key = (text, name, size, antialias, fg_key, bg_key)
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return image
+
+        self.misses += 1
+        image = self.get_font(name, size).render(text, antialias, fg_color, bg_color)
+        self.images[key] = image
+        if len(self.images) > self.max_images:
+            # Evict the image that was used least recently
+            self.images.popitem(last=False)
+        return image
+
+    def get_stats(self):
+        # Return a dictionary with the hit and miss counters of the fonts and rendered images
+        return {'font_hits': self.font_hits, 'font_misses': self.font_misses,
+                'text_hits': self.hits, 'text_misses': self.misses,
+                'cached_images': len(self.images)}
+
+    def report(self):
+        # Return a one line description of the counters
+        stats = self.get_stats()
+        return ('fonts: %(font_hits)d hits / %(font_misses)d misses, '
+                'text: %(text_hits)d hits / %(text_misses)d misses, '
+                '%(cached_images)d images cached' % stats)
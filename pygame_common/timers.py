@@ -0,0 +1,124 @@
+# Timers that run inside a game loop without blocking it.
+# A game schedules a callback to run after a delay and calls update() once per frame;
+# the callback runs on the first frame after it is due while the loop keeps handling
+# events and drawing in the meantime.
+
+import heapq
+import itertools
+import pygame
+
+
+class Scheduler:
+    # An object in this class keeps the timers of a game, ordered by the time they are due.
+
+    def __init__(self, clock=None):
+        # Initialize a Scheduler.
+        # - self is the Scheduler to initialize
+        # - clock is a function returning the current time in int milliseconds;
+        #   pygame.time.get_ticks is used when it is None
+
+        if clock is None:
+            clock = pygame.time.get_ticks
+        self.clock = clock
+        self.timers = []  # heap of [due, sequence, callback]
+        self.sequence = itertools.count()  # keeps timers that are due together in order
+
+    def now(self):
+        # Return the current time of the scheduler's clock in milliseconds
+        return self.clock()
+
+    def schedule(self, delay, callback, now=None):
+        # Run a callback once after a delay and return the timer so it can be cancelled
+        # - delay is the int number of milliseconds to wait
+        # - callback is the function (without arguments) to run
+        # - now is the int time to count the delay from, or None for the clock's current time
+
+        if now is None:
+            now = self.now()
+        timer = [now + delay, next(self.sequence), callback]
+        heapq.heappush(self.timers, timer)
+        return timer
+
+    def cancel(self, timer):
+        # Stop a scheduled timer from running
+        # - timer is the object returned by schedule
+        timer[2] = None
+
+    def update(self, now=None):
+        # Run every callback that is due and return how many ran
+        # - now is the int time to compare with, or None for the clock's current time
+
+        if now is None:
+            now = self.now()
+        count = 0
+        while self.timers and self.timers[0][0] <= now:
+            due, sequence, callback = heapq.heappop(self.timers)
+            if callback is not None:
+                callback()
+                count += 1
+        return count
+
+    def pending(self):
+        # Return True if a timer is still waiting to run
+        return any(timer[2] is not None for timer in self.timers)
+
+    def time_until_next(self):
+        # Return the int milliseconds until the next timer is due, or None if there is none
+
+        while self.timers and self.timers[0][2] is None:
+            heapq.heappop(self.timers)
+        if not self.timers:
+            return None
+        return max(0, self.timers[0][0] - self.now())
+
+
+class VirtualClock:
+    # An object in this class is a clock that only moves when it is told to.
+    # Simulations and replays pass its now method to a game instead of pygame.time.get_ticks.
+
+    def __init__(self):
+        self.time = 0
+
+    def now(self):
+        # Return the current time in int milliseconds
+        return self.time
+
+    def advance(self, milliseconds):
+        # Move the clock forward
+        # - milliseconds is the int time to add
+        self.time = self.time + milliseconds
+
+
+class PausableClock:
+    # An object in this class is a clock that can be stopped and started again.
+    # A game that is put aside, such as a scene the launcher is not showing, passes its now
+    # method to a game instead of pygame.time.get_ticks so the time it is away does not count.
+
+    def __init__(self, clock=None):
+        # Initialize a running PausableClock.
+        # - self is the PausableClock to initialize
+        # - clock is a function returning the real time in int milliseconds;
+        #   pygame.time.get_ticks is used when it is None
+
+        if clock is None:
+            clock = pygame.time.get_ticks
+        self.clock = clock
+        self.paused_time = 0  # milliseconds the clock stood still in total
+        self.paused_at = None  # real time the clock was paused at, or None while it runs
+
+    def now(self):
+        # Return the current time in int milliseconds, not counting the time the clock was paused
+        if self.paused_at is not None:
+            return self.paused_at - self.paused_time
+        return self.clock() - self.paused_time
+
+    def pause(self):
+        # Stop the clock; does nothing if it is already stopped
+        if self.paused_at is None:
+            self.paused_at = self.clock()
+
+    def resume(self):
+        # Start the clock again where it stopped; does nothing if it is running
+        if self.paused_at is not None:
+            self.paused_time = self.paused_time + self.clock() - self.paused_at
+            self.paused_at = None
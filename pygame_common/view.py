@@ -0,0 +1,55 @@
+# Mapping from a game's playing field to a window of any size.
+# A game keeps its physics in field coordinates, so it plays the same in every window, and
+# only converts to window coordinates when it draws. The field is scaled to fit the window
+# without changing its proportions and centred, leaving bars at the sides that do not fit.
+
+import pygame
+
+
+class View:
+    # An object in this class scales and centres a playing field of a fixed size in a window.
+
+    def __init__(self, field_size, window_size):
+        # Initialize a View.
+        # - self is the View to initialize
+        # - field_size is the (width, height) of the playing field
+        # - window_size is the (width, height) of the window the field is shown in
+
+        self.field_size = tuple(field_size)
+        self.resize(window_size)
+
+    def resize(self, window_size):
+        # Fit the field into a window of a new size
+        # - window_size is the (width, height) of the window
+
+        field_width, field_height = self.field_size
+        window_width, window_height = window_size
+        self.scale = min(window_width / field_width, window_height / field_height)
+        self.offset_x = (window_width - field_width * self.scale) / 2
+        self.offset_y = (window_height - field_height * self.scale) / 2
+        # A field shown at its own size needs no conversion, which keeps drawing as fast as without a View
+        self.identity = self.scale == 1 and self.offset_x == 0 and self.offset_y == 0
+        self.field_rect = self.rect(pygame.Rect((0, 0), self.field_size))  # window Rect covered by the field
+
+    def point(self, x, y):
+        # Return the int (x, y) window position of a field position
+        # - x and y are the float field coordinates
+        if self.identity:
+            return (round(x), round(y))
+        return (round(self.offset_x + x * self.scale), round(self.offset_y + y * self.scale))
+
+    def length(self, length):
+        # Return the int window length of a field length, at least one pixel
+        # - length is the float field length
+        return max(1, round(length * self.scale))
+
+    def rect(self, rect):
+        # Return the window Rect covered by a field Rect; that is rect itself when the field is shown at its own size
+        # - rect is the pygame.Rect in field coordinates
+
+        if self.identity:
+            return rect
+        # Both corners are converted, so touching field rectangles also touch in the window
+        left, top = self.point(rect.left, rect.top)
+        right, bottom = self.point(rect.right, rect.bottom)
+        return pygame.Rect(left, top, max(1, right - left), max(1, bottom - top))
@@ -0,0 +1,89 @@
+# Input recordings: the varint records written by InputRecorder must read back unchanged, and a
+# recorded Memory game must replay to the same final state.
+
+import os
+import random
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'Memory game (Pygame)'))
+
+import pygame
+import memory
+from pygame_common.replay import InputLog, InputRecorder, KEYDOWN, KEYUP, MOUSEBUTTONUP, UPDATE
+from pygame_common.startup import init_pygame
+from pygame_common.timers import VirtualClock
+
+
+def test_records_read_back(tmp_path):
+    path = str(tmp_path / 'records.rec')
+    settings = {'game': 'test', 'size': [500, 400]}
+    recorder = InputRecorder(path, 2 ** 40 + 5, settings)
+    # Tick gaps and values on both sides of the one, two and three byte varints
+    recorder.record(0, pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a))
+    recorder.record(127, pygame.event.Event(pygame.KEYUP, key=pygame.K_a))
+    recorder.write(128, UPDATE)
+    recorder.record(256, pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(127, 128), button=1))
+    recorder.record(256, pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(20000, 0), button=3))
+    recorder.record(300256, pygame.event.Event(pygame.KEYDOWN, key=pygame.K_F1))
+    # Mouse motion is not an input the games replay
+    recorder.record(300300, pygame.event.Event(pygame.MOUSEMOTION, pos=(1, 1), rel=(1, 1), buttons=(0, 0, 0)))
+    recorder.finish(400000)
+
+    log = InputLog(path)
+    assert log.seed == 2 ** 40 + 5
+    assert log.settings == settings
+    assert log.end_tick == 400000
+    records = [(tick, record_type, event and event.dict) for tick, record_type, event in log.records]
+    assert records == [(0, KEYDOWN, {'key': pygame.K_a}),
+                       (127, KEYUP, {'key': pygame.K_a}),
+                       (128, UPDATE, None),
+                       (256, MOUSEBUTTONUP, {'pos': (127, 128), 'button': 1}),
+                       (256, MOUSEBUTTONUP, {'pos': (20000, 0), 'button': 3}),
+                       (300256, KEYDOWN, {'key': pygame.K_F1})]
+
+
+def get_board_state(game):
+    # Return what a finished or interrupted Memory game left behind, to compare a replay with
+    return (game.moves, game.matched_pairs, game.score, game.continue_game,
+            [[(tile.get_filename(), tile.get_expose()) for tile in row] for row in game.board])
+
+
+def test_memory_game_replays_to_same_state(tmp_path):
+    init_pygame()
+    path = str(tmp_path / 'memory.rec')
+    clock = VirtualClock()
+    surface = pygame.display.set_mode(memory.WINDOW_SIZE)
+    game = memory.Game(surface, clock=clock.now, rng=random.Random(11))
+    game.recorder = InputRecorder(path, 11, memory.get_settings(game))
+    # Find every pair, after a wrong guess for all but the last one; the click that comes while a
+    # wrong guess is still shown is ignored
+    tiles = sorted((tile for row in game.board for tile in row), key=lambda tile: tile.get_filename())
+    clicks = {}  # frame -> tile clicked
+    for index in range(0, len(tiles), 2):
+        frame = index * 40
+        if index + 2 < len(tiles):
+            clicks.update({frame: tiles[index], frame + 9: tiles[index + 2], frame + 18: tiles[index]})
+        clicks.update({frame + 45: tiles[index], frame + 54: tiles[index + 1]})
+    # Frames of 40 ms, as the game loop runs them, and key presses the game records but does not use
+    for frame in range(1000):
+        events = []
+        if frame in clicks:
+            events.append(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=clicks[frame].get_rect().center, button=1))
+        if frame % 50 == 0:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        game.handle_event(events)
+        game.draw()
+        if not game.continue_game:
+            break
+        game.update()
+        game.decide_continue()
+        clock.advance(40)
+    game.recorder.finish(game.recorder.last_update_tick)
+    assert game.matched_pairs == game.pair_count and not game.continue_game
+
+    replayed = memory.replay(path)
+    assert get_board_state(replayed) == get_board_state(game)
+    pygame.quit()
@@ -0,0 +1,91 @@
+# Memory par: the analyzer's expected moves must match a brute-force search over every tile a
+# player with perfect memory can turn over, and the table file must hold the analyzer's values.
+
+import os
+import sys
+from fractions import Fraction
+from functools import lru_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'Memory game (Pygame)'))
+
+import pytest
+from memory_par import ParAnalyzer, TABLE_PATH, read_par, read_table_value
+
+
+def brute_force_par(pairs):
+    # Return the exact Fraction of expected moves of the best play, found by trying every pair of
+    # tiles in every state of knowledge; tiles are 0 .. 2 * pairs - 1 and faces 0 .. pairs - 1
+    tiles = range(2 * pairs)
+
+    def face_chances(unseen, known, matched, shown=None):
+        # Return {face: Fraction} for an unseen tile, given the faces known, matched and already shown this move
+        left = {face: 2 for face in range(pairs)}
+        for face in list(known.values()) + [matched[tile] for tile in matched] + ([shown] if shown is not None else []):
+            left[face] -= 1
+        count = sum(left.values())
+        return {face: Fraction(number, count) for face, number in left.items() if number}
+
+    @lru_cache(maxsize=None)
+    def expected(known_items, matched_items):
+        known = dict(known_items)
+        matched = dict(matched_items)
+        if len(matched) == 2 * pairs:
+            return Fraction(0)
+        open_tiles = [tile for tile in tiles if tile not in matched]
+        unseen = [tile for tile in open_tiles if tile not in known]
+        best = None
+        for first in open_tiles:
+            if first in known:
+                first_outcomes = {known[first]: Fraction(1)}
+            else:
+                first_outcomes = face_chances(unseen, known, matched)
+            total = Fraction(0)
+            for first_face, first_chance in first_outcomes.items():
+                best_second = None
+                for second in open_tiles:
+                    if second == first or (first in known and second in known and known[first] != known[second]):
+                        continue  # the same tile, or a move that teaches nothing
+                    if second in known:
+                        second_outcomes = {known[second]: Fraction(1)}
+                    else:
+                        second_outcomes = face_chances(unseen, known, matched, None if first in known else first_face)
+                    cost = Fraction(0)
+                    for second_face, second_chance in second_outcomes.items():
+                        next_known = dict(known)
+                        next_matched = dict(matched)
+                        if first_face == second_face:
+                            next_known.pop(first, None)
+                            next_known.pop(second, None)
+                            next_matched[first] = next_matched[second] = first_face
+                        else:
+                            next_known[first] = first_face
+                            next_known[second] = second_face
+                        cost += second_chance * (1 + expected(tuple(sorted(next_known.items())),
+                                                              tuple(sorted(next_matched.items()))))
+                    if best_second is None or cost < best_second:
+                        best_second = cost
+                total += first_chance * best_second
+            if best is None or total < best:
+                best = total
+        return best
+
+    return expected((), ())
+
+
+@pytest.mark.parametrize('pairs', [1, 2, 3])
+def test_analyzer_matches_brute_force(pairs):
+    analyzer = ParAnalyzer()
+    analyzer.extend(2 * pairs)
+    assert analyzer.pars[pairs] == pytest.approx(float(brute_force_par(pairs)), abs=1e-12)
+
+
+def test_table_holds_analyzer_pars():
+    analyzer = ParAnalyzer(keep_rows=False)
+    for pairs in [1, 2, 8, 18, 50, 1250]:
+        expected = analyzer.get_par(pairs)
+        # The table keeps float32 values
+        assert read_table_value(pairs, TABLE_PATH) == pytest.approx(expected, rel=1e-6)
+        assert read_par(pairs) == read_table_value(pairs, TABLE_PATH)
+    assert read_par(0) is None
+    assert read_par(5001) is None
@@ -0,0 +1,96 @@
+# Networked Pong: snapshots must decode to exactly the state that was encoded, a lossy loopback
+# match must end with host and client agreeing, and malformed packets must be dropped.
+
+import os
+import struct
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'Pong game (Pygame)'))
+
+import pygame
+import pong
+import pong_net
+from pong_net import HELLO, INPUT, INPUT_HEADER, NO_STEP, SNAPSHOT_HEADER, decode_snapshot, encode_snapshot
+from pygame_common.startup import init_pygame
+
+BASE = (120, 0, 200, -5, 250.0, 200.0, 4.0, -3.5, 1, 2, 1)
+STATE = (120, 5, 200, -5, 254.0, 196.5, 4.0, -3.5, 1, 2, 1)
+CLIENT = ('127.0.0.1', 40001)
+
+
+class FakeLink:
+    # Stand-in for LossyLink that hands over the packets a test queues and keeps the ones sent
+
+    def __init__(self):
+        self.incoming = []
+        self.sent = []
+
+    def send(self, data, address):
+        self.sent.append((data, address))
+
+    def receive(self):
+        packets = self.incoming
+        self.incoming = []
+        return packets
+
+
+def make_host():
+    init_pygame()
+    link = FakeLink()
+    return pong_net.Host(pong.Game(pygame.Surface(pong.FIELD_SIZE)), link), link
+
+
+def test_snapshot_delta_round_trip():
+    full = encode_snapshot(10, BASE, NO_STEP, None, NO_STEP)
+    assert decode_snapshot(full, {}) == (10, BASE, NO_STEP)
+
+    delta = encode_snapshot(11, STATE, 10, BASE, 7)
+    # Only the left paddle's velocity and the ball's position changed
+    assert len(delta) == SNAPSHOT_HEADER.size + 1 + 8 + 8
+    assert decode_snapshot(delta, {10: BASE}) == (11, STATE, 7)
+    # A delta cannot be decoded without its base
+    assert decode_snapshot(delta, {9: BASE}) is None
+
+
+def test_malformed_snapshots_are_dropped():
+    delta = encode_snapshot(11, STATE, 10, BASE, 7)
+    for data in [b'', delta[:SNAPSHOT_HEADER.size - 1], delta[:-1], delta + b'\0']:
+        assert decode_snapshot(data, {10: BASE}) is None
+
+
+def test_loopback_ends_in_same_state():
+    init_pygame()
+    stats = pong_net.run_loopback(900, 100, jitter=20, loss=0.1, seed=3)
+    assert stats['host_dropped'] > 0 and stats['rollbacks'] > 0
+    assert stats['in_sync']
+
+
+def test_host_drops_malformed_inputs():
+    host, link = make_host()
+    link.incoming = [(bytes([HELLO]), CLIENT)]
+    host.receive()
+    inputs = INPUT_HEADER.pack(INPUT, NO_STEP, 0, 3) + struct.pack('<3b', 1, 1, -1)
+    link.incoming = [(b'', CLIENT), (inputs[:INPUT_HEADER.size - 1], CLIENT), (inputs[:-1], CLIENT),
+                     (inputs + b'\0', CLIENT)]
+    host.receive()
+    assert host.client_inputs == {} and host.newest_input_step == NO_STEP
+    link.incoming = [(inputs, CLIENT)]
+    host.receive()
+    assert host.client_inputs == {0: 1, 1: 1, 2: -1}
+
+
+def test_host_ignores_hello_from_second_client():
+    host, link = make_host()
+    link.incoming = [(bytes([HELLO]), CLIENT)]
+    host.receive()
+    link.incoming = [(bytes([HELLO]), ('127.0.0.1', 40002))]
+    host.receive()
+    assert host.client_address == CLIENT
+    assert [address for data, address in link.sent] == [CLIENT]
+    # The client asking again, as it does until a snapshot arrives, is answered
+    link.incoming = [(bytes([HELLO]), CLIENT)]
+    host.receive()
+    assert [address for data, address in link.sent] == [CLIENT, CLIENT]
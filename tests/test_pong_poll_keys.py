@@ -0,0 +1,50 @@
+# Pong with --poll-keys: pressing a key again must not fail, and a recording must replay the
+# paddle moves exactly.
+
+import os
+import random
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'Pong game (Pygame)'))
+
+import pygame
+import pong
+from pygame_common.replay import InputRecorder
+from pygame_common.startup import init_pygame
+
+
+def post_key(event_type, key):
+    pygame.event.post(pygame.event.Event(event_type, key=key, mod=0, unicode='', scancode=0))
+
+
+def test_key_pressed_twice_and_replayed(tmp_path):
+    init_pygame()
+    surface = pygame.display.set_mode(pong.FIELD_SIZE)
+    path = str(tmp_path / 'poll.rec')
+    game = pong.Game(surface, rng=random.Random(7), field_size=pong.FIELD_SIZE)
+    game.poll_keys = True
+    game.recorder = InputRecorder(path, 7, pong.get_settings(game))
+    tops = []
+    # Press and release the left paddle's down key twice, holding the right paddle's up key in between
+    for event_type, key in [(pygame.KEYDOWN, pygame.K_a), (pygame.KEYUP, pygame.K_a),
+                            (pygame.KEYDOWN, pygame.K_a), (pygame.KEYDOWN, pygame.K_p),
+                            (pygame.KEYUP, pygame.K_a), (pygame.KEYUP, pygame.K_p)]:
+        post_key(event_type, key)
+        # The events are read from pygame, as in the game loop
+        game.handle_events()
+        for step in range(3):
+            game.step()
+        tops.append((game.left_paddle.rect.top, game.right_paddle.rect.top))
+    game.recorder.finish(game.steps)
+    assert tops[2][0] > tops[1][0]
+    assert tops[3][1] < tops[2][1]
+
+    replayed = pong.replay(path)
+    assert replayed.steps == game.steps
+    assert replayed.left_paddle.rect.top == game.left_paddle.rect.top
+    assert replayed.right_paddle.rect.top == game.right_paddle.rect.top
+    assert replayed.small_ball.center == game.small_ball.center
+    pygame.quit()